@@ -0,0 +1,84 @@
+"""
+Prometheus metrics of the API, exposed at /metrics.
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty writable directory:
+each worker then writes its samples to memory-mapped files there and /metrics
+aggregates all of them (see gunicorn.conf.py for the worker cleanup hooks).
+"""
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUEST_LATENCY = Histogram(
+    'api_request_duration_seconds', 'Request latency by resolved view',
+    ['view', 'method', 'status'], buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'api_request_queries', 'SQL queries per request', ['view'], buckets=QUERY_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    'api_request_db_seconds', 'Time spent in SQL per request', ['view'], buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    'api_response_size_bytes', 'Response body size', ['view'], buckets=SIZE_BUCKETS,
+)
+QUERY_BUDGET_VIOLATIONS = Counter(
+    'api_query_budget_violations', 'Requests over their query budget or repeating a query shape (N+1)',
+    ['view', 'kind'],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'api_requests_in_flight', 'Requests being handled', multiprocess_mode='livesum',
+)
+
+
+def view_name(request):
+    """
+    Label for the resolved view, e.g. RideViewSet.list. Unresolved paths share
+    one label so that random URLs can't blow up the series count.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+
+    func = match.func
+    cls = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if cls is None:
+        return getattr(func, '__qualname__', match.view_name)
+
+    method = request.method.lower()
+    actions = getattr(func, 'actions', None)
+    if actions:
+        return f'{cls.__name__}.{actions.get(method, method)}'
+    return f'{cls.__name__}.{method}'
+
+
+def metrics_view(request):
+    """
+    Text exposition of every metric. Requires `Authorization: Bearer <METRICS_TOKEN>`
+    when METRICS_TOKEN is set.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
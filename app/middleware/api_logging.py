@@ -1,7 +1,12 @@
+import atexit
+import os
+import queue
+import random
+import threading
 import time
-import json
 import structlog
 
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 
 logger = structlog.get_logger("api")
@@ -9,6 +14,99 @@ logger = structlog.get_logger("api")
 SAFE_METHODS = {"POST", "PUT", "PATCH"}
 MAX_BODY_SIZE = 10_000
 
+
+def _decode_body(body):
+    """
+    Raw body bytes as text, logged as sent without parsing them again.
+    """
+    return body.decode("utf-8", errors="replace")
+
+
+class LogWriter:
+    """
+    Bounded queue of log records drained by a daemon thread.
+
+    The request thread only enqueues; decoding bodies, formatting and writing
+    happen on the writer thread. When the queue is full, records are dropped and
+    counted, and the count is logged once the writer catches up.
+    """
+
+    def __init__(self, maxsize=10_000, logger=logger):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.logger = logger
+        self.dropped = 0
+        self._reported = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, record):
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _ensure_started(self):
+        # Forked workers inherit the object but not the thread
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._thread = threading.Thread(target=self._run, name="api-log-writer", daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            try:
+                self.write(record)
+            except Exception:
+                self.logger.exception("api_logging_failed")
+            finally:
+                self.queue.task_done()
+
+    def write(self, record):
+        context = record.pop("context")
+        for key in ("request_body", "response_body"):
+            if key in record:
+                record[key] = _decode_body(record[key])
+        # The record wins over context keys bound by django-structlog (e.g. user_id)
+        self.logger.info("api_request", **{**context, **record})
+
+        if self.dropped > self._reported:
+            dropped, self._reported = self.dropped - self._reported, self.dropped
+            self.logger.warning("api_logging_dropped", dropped=dropped, total_dropped=self._reported)
+
+    def flush(self, timeout=None):
+        """
+        Waits until every queued record is written, or timeout seconds pass.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if self._pid != os.getpid() or (deadline is not None and time.monotonic() > deadline):
+                return False
+            time.sleep(0.005)
+        return True
+
+
+writer = LogWriter(maxsize=getattr(settings, "API_LOG_QUEUE_SIZE", 10_000))
+atexit.register(writer.flush, timeout=2)
+
+
+def sample_rate(path):
+    """
+    Sampling rate of the longest API_LOG_SAMPLE_RATES prefix matching path,
+    else API_LOG_SAMPLE_RATE.
+    """
+    rates = getattr(settings, "API_LOG_SAMPLE_RATES", {})
+    prefixes = [prefix for prefix in rates if path.startswith(prefix)]
+    if prefixes:
+        return rates[max(prefixes, key=len)]
+    return getattr(settings, "API_LOG_SAMPLE_RATE", 1.0)
+
+
 class APILoggingMiddleware(MiddlewareMixin):
     def process_request(self, request):
         request._start_time = time.monotonic()
@@ -19,41 +117,42 @@ class APILoggingMiddleware(MiddlewareMixin):
                 (time.monotonic() - request._start_time) * 1000, 2
             )
 
+            # Server errors are always logged, the rest is sampled per path
+            rate = sample_rate(request.path)
+            if response.status_code < 500 and rate < 1 and random.random() >= rate:
+                return response
+
             log_data = {
                 "method": request.method,
                 "path": request.path,
                 "status_code": response.status_code,
                 "duration_ms": duration_ms,
+                # Bound by django-structlog on this thread, e.g. request_id
+                "context": structlog.contextvars.get_contextvars(),
             }
 
             # user context
             if hasattr(request, "user") and request.user.is_authenticated:
                 log_data["user_id"] = request.user.id
 
-            # request body (safe methods only)
+            # request body (safe methods only), raw bytes decoded by the writer
             if request.method in SAFE_METHODS:
                 body = request.body[:MAX_BODY_SIZE]
                 if body:
-                    try:
-                        log_data["request_body"] = json.loads(body)
-                    except Exception:
-                        log_data["request_body"] = body.decode("utf-8", errors="ignore")
+                    log_data["request_body"] = body
 
             # response body (JSON + small only)
             content_type = response.get("Content-Type", "")
             if (
                 "application/json" in content_type
-                and hasattr(response, "content")
+                and not getattr(response, "streaming", False)
                 and len(response.content) <= MAX_BODY_SIZE
             ):
-                try:
-                    log_data["response_body"] = json.loads(response.content)
-                except Exception:
-                    pass
+                log_data["response_body"] = response.content
 
-            logger.info("api_request", **log_data)
+            writer.submit(log_data)
 
         except Exception:
             logger.exception("api_logging_failed")
 
-        return response
\ No newline at end of file
+        return response
@@ -0,0 +1,59 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connection
+
+from app.metrics import (
+    REQUEST_DB_TIME,
+    REQUEST_LATENCY,
+    REQUEST_QUERIES,
+    REQUESTS_IN_FLIGHT,
+    RESPONSE_SIZE,
+    view_name,
+)
+from app.middleware.profiling import QueryRecorder
+
+
+class MetricsMiddleware:
+    """
+    Records latency, SQL queries and DB time, response size and in-flight
+    requests for every request. Meant to be the outermost middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        recorder = QueryRecorder(keep_sql=False)
+        started = time.perf_counter()
+        with REQUESTS_IN_FLIGHT.track_inprogress(), connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.observe(request, response, started, recorder)
+        return response
+
+    async def __acall__(self, request):
+        # Async views query from other threads, out of reach of execute_wrapper
+        started = time.perf_counter()
+        with REQUESTS_IN_FLIGHT.track_inprogress():
+            response = await self.get_response(request)
+        self.observe(request, response, started, None)
+        return response
+
+    def observe(self, request, response, started, recorder):
+        view = view_name(request)
+        REQUEST_LATENCY.labels(view, request.method, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+        if recorder is not None:
+            REQUEST_QUERIES.labels(view).observe(recorder.count)
+            REQUEST_DB_TIME.labels(view).observe(recorder.seconds)
+        if not getattr(response, 'streaming', False):
+            RESPONSE_SIZE.labels(view).observe(len(response.content))
@@ -0,0 +1,187 @@
+"""
+Sampling profiler, the production replacement for always-on Silk.
+
+A request is fully profiled (cProfile and its SQL queries) when it is one in
+PROFILING_SAMPLE_EVERY requests, or when it carries a valid signed
+PROFILING_HEADER. Any other request is only timed with a query counter, and is
+kept as a summary if it takes longer than PROFILING_SLOW_MS.
+
+Samples go to a per-process ring buffer of PROFILING_BUFFER_SIZE entries, read
+by the admin endpoint /api/base/profiles. Nothing is written to the database.
+"""
+import cProfile
+import io
+import itertools
+import pstats
+import time
+from collections import deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.db import connection
+from django.utils import timezone
+
+HEADER_SALT = "profiling"
+TOP_FUNCTIONS = 30
+TOP_QUERIES = 10
+MAX_SQL_LENGTH = 500
+
+samples = deque(maxlen=getattr(settings, "PROFILING_BUFFER_SIZE", 100))
+_requests = itertools.count(1)
+
+
+def header_name():
+    return getattr(settings, "PROFILING_HEADER", "X-Profile")
+
+
+def make_header_token():
+    """
+    Signed value for PROFILING_HEADER, valid for PROFILING_HEADER_MAX_AGE seconds.
+    """
+    return signing.TimestampSigner(salt=HEADER_SALT).sign("profile")
+
+
+def has_valid_header(request):
+    token = request.headers.get(header_name())
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=HEADER_SALT).unsign(
+            token, max_age=getattr(settings, "PROFILING_HEADER_MAX_AGE", 3600)
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper counting queries and their time, keeping the SQL
+    only for profiled requests.
+    """
+
+    def __init__(self, keep_sql):
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = [] if keep_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if self.queries is not None:
+                self.queries.append((elapsed, sql))
+
+
+def _start_profiler():
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active profiler per process
+        return None
+    return profiler
+
+
+def format_sample(sample):
+    """
+    JSON-ready copy of a sample. The cProfile stats are formatted here, on read,
+    rather than on the request path.
+    """
+    sample = dict(sample)
+    profiler = sample.pop("profiler", None)
+    if profiler is not None:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        sample["profile"] = stream.getvalue()
+    return sample
+
+
+def dump_samples(min_ms=None):
+    """
+    Recent samples, newest first, optionally only those slower than min_ms.
+    """
+    return [
+        format_sample(sample) for sample in reversed(samples)
+        if min_ms is None or sample["duration_ms"] >= min_ms
+    ]
+
+
+class SamplingProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        reason = self.profile_reason(request)
+        recorder = QueryRecorder(keep_sql=reason is not None)
+        profiler = _start_profiler() if reason else None
+        started = time.perf_counter()
+
+        with connection.execute_wrapper(recorder):
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+
+        self.record(request, response, started, reason, recorder, profiler)
+        return response
+
+    async def __acall__(self, request):
+        # ORM queries run on other threads, out of reach of cProfile and
+        # execute_wrapper here, so async requests are only timed
+        reason = self.profile_reason(request)
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, started, reason, None, None)
+        return response
+
+    def profile_reason(self, request):
+        every = getattr(settings, "PROFILING_SAMPLE_EVERY", 0)
+        if every and next(_requests) % every == 0:
+            return "sampled"
+        if has_valid_header(request):
+            return "header"
+        return None
+
+    def record(self, request, response, started, reason, recorder, profiler):
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        slow_ms = getattr(settings, "PROFILING_SLOW_MS", 0)
+        if reason is None:
+            if not slow_ms or duration_ms < slow_ms:
+                return
+            reason = "slow"
+
+        sample = {
+            "timestamp": timezone.now().isoformat(),
+            "reason": reason,
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status_code": response.status_code,
+            "duration_ms": duration_ms,
+        }
+        if recorder is not None:
+            sample["queries"] = recorder.count
+            sample["db_ms"] = round(recorder.seconds * 1000, 2)
+            if recorder.queries is not None:
+                slowest = sorted(recorder.queries, key=lambda query: query[0], reverse=True)[:TOP_QUERIES]
+                sample["top_queries"] = [
+                    {"ms": round(elapsed * 1000, 2), "sql": sql[:MAX_SQL_LENGTH]} for elapsed, sql in slowest
+                ]
+        if profiler is not None:
+            sample["profiler"] = profiler
+        samples.append(sample)
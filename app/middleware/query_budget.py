@@ -0,0 +1,136 @@
+"""
+Per-view SQL query budgets and N+1 detection.
+
+Views declare budgets per action (or HTTP method for plain APIViews):
+
+    class RideViewSet(viewsets.ReadOnlyModelViewSet):
+        query_budgets = {'list': 15, 'retrieve': 3}
+
+Every request records the shape of its queries through connection.execute_wrapper.
+A violation is a request running more queries than its budget, or running the
+same query shape QUERY_REPEAT_THRESHOLD times or more, the signature of an N+1.
+
+QUERY_BUDGET_MODE decides what happens with violations:
+- "raise": raise QueryBudgetExceeded (tests)
+- "warn": log a warning (dev)
+- "count": only increment api_query_budget_violations_total (production)
+"""
+import re
+from collections import Counter
+
+import structlog
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+
+from app.metrics import QUERY_BUDGET_VIOLATIONS, view_name
+
+logger = structlog.get_logger("api")
+
+# Collapse IN lists and VALUES rows, whose length varies with the data
+_PLACEHOLDER_LIST = re.compile(r'\((?:%s, )*%s\)')
+_VALUES_ROWS = re.compile(r'(\((?:%s(?:, )?)+\))(?:, \1)*')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_shape(sql):
+    return _PLACEHOLDER_LIST.sub('(%s...)', _VALUES_ROWS.sub(r'\1', sql))
+
+
+class ShapeRecorder:
+    """
+    connection.execute_wrapper counting executed queries by shape.
+    """
+
+    def __init__(self):
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Silk (dev) runs an EXPLAIN after each query, which isn't the view's doing
+        if not sql.startswith('EXPLAIN'):
+            self.shapes[sql] += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return sum(self.shapes.values())
+
+    def repeated(self, threshold):
+        """
+        Returns [(shape, times)] of shapes run at least threshold times.
+        """
+        by_shape = Counter()
+        for sql, times in self.shapes.items():
+            by_shape[query_shape(sql)] += times
+        return [(shape, times) for shape, times in by_shape.most_common() if times >= threshold]
+
+
+def get_budget(request):
+    """
+    Query budget of the resolved view for this request, or None.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    cls = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    budgets = getattr(cls, 'query_budgets', None)
+    if not budgets:
+        return None
+
+    method = request.method.lower()
+    actions = getattr(match.func, 'actions', None) or {}
+    return budgets.get(actions.get(method, method))
+
+
+class QueryBudgetMiddleware:
+    """
+    Checks the queries of each request against its view's budget. Meant to be
+    the innermost middleware, so only the view's own queries count.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            # Async views query from other threads, out of reach of execute_wrapper
+            return self.get_response(request)
+
+        recorder = ShapeRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.check(request, recorder)
+        return response
+
+    def check(self, request, recorder):
+        view = view_name(request)
+        violations = []
+
+        budget = get_budget(request)
+        if budget is not None and recorder.count > budget:
+            violations.append(('budget', f'{recorder.count} queries, budget is {budget}'))
+
+        threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+        for shape, times in recorder.repeated(threshold):
+            violations.append(('n_plus_one', f'{times}x {shape}'))
+
+        if not violations:
+            return
+        for kind, _ in violations:
+            QUERY_BUDGET_VIOLATIONS.labels(view, kind).inc()
+
+        mode = getattr(settings, 'QUERY_BUDGET_MODE', 'count')
+        if mode == 'raise':
+            details = '; '.join(detail for _, detail in violations)
+            raise QueryBudgetExceeded(f'{view} ({request.method} {request.path}): {details}')
+        if mode == 'warn':
+            for kind, detail in violations:
+                logger.warning('query_budget_violation', view=view, path=request.path, kind=kind, detail=detail)
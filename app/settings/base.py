@@ -46,12 +46,16 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     # Refresh token lifetime
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    # Tokens carry role and token_version claims (base.tokens)
+    'TOKEN_OBTAIN_SERIALIZER': 'base.tokens.RoleTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'base.tokens.RoleTokenRefreshSerializer',
 }
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         # 'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT resolving the user from the token claims, no query per request
+        'base.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -59,6 +63,74 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Seconds list responses stay cached (0 disables the response cache)
+API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", 30))
+
+# API request logging: share of requests logged (5xx are always logged),
+# per path prefix overrides, and records buffered before new ones are dropped
+API_LOG_SAMPLE_RATE = float(os.getenv("API_LOG_SAMPLE_RATE", 1.0))
+API_LOG_SAMPLE_RATES = {
+    "/api/base/health-check": 0.0,
+}
+API_LOG_QUEUE_SIZE = int(os.getenv("API_LOG_QUEUE_SIZE", 10_000))
+
+# Sampling profiler: profile 1 in N requests (0 disables) or requests sending a
+# signed PROFILING_HEADER, and keep summaries of requests slower than PROFILING_SLOW_MS
+PROFILING_SAMPLE_EVERY = int(os.getenv("PROFILING_SAMPLE_EVERY", 0))
+PROFILING_SLOW_MS = float(os.getenv("PROFILING_SLOW_MS", 1000))
+PROFILING_BUFFER_SIZE = int(os.getenv("PROFILING_BUFFER_SIZE", 100))
+PROFILING_HEADER = "X-Profile"
+PROFILING_HEADER_MAX_AGE = 3600
+
+# PostgreSQL connections: a psycopg pool per worker process (DB_POOL), checked on checkout
+# and replaced after DB_POOL_MAX_LIFETIME seconds, or persistent connections when it is off
+DB_POOL = os.getenv("DB_POOL", "true") == "true"
+DB_POOL_OPTIONS = {
+    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", 1800)),
+    # Seconds a request waits for a free connection before failing
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+}
+POSTGRES_CONNECTION = (
+    {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": True, "OPTIONS": {"pool": DB_POOL_OPTIONS}}
+    if DB_POOL else
+    {"CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)), "CONN_HEALTH_CHECKS": True}
+)
+
+# Bearer token required by /metrics and the detailed health check (empty leaves it open, e.g. behind a private network)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Views over their `query_budgets`, or repeating a query shape QUERY_REPEAT_THRESHOLD
+# times (N+1), are counted in metrics; "warn" also logs them and "raise" fails the request
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "count")
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 5))
+
+# Paginated counts (see BasePagination.count_strategy): planner estimates below this many
+# rows are replaced by an exact COUNT(*), and cached counts live this many seconds
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", 10_000))
+COUNT_CACHE_TIMEOUT = int(os.getenv("COUNT_CACHE_TIMEOUT", 60))
+
+# Most events accepted by one POST /api/base/ride-events/bulk/
+RIDE_EVENTS_BULK_MAX = int(os.getenv("RIDE_EVENTS_BULK_MAX", 5000))
+
+# Rides read per chunk (and per events prefetch) by GET /api/base/rides/export/
+RIDE_EXPORT_CHUNK_SIZE = int(os.getenv("RIDE_EXPORT_CHUNK_SIZE", 2000))
+
+# Completed/cancelled rides picked up longer ago than this are moved to the archive by archive_rides
+RIDE_ARCHIVE_AFTER_DAYS = int(os.getenv("RIDE_ARCHIVE_AFTER_DAYS", 365))
+
+# RideEvent partitions (PostgreSQL): months created ahead by manage_event_partitions,
+# and months of events kept before old partitions are detached (0 keeps everything)
+EVENT_PARTITION_MONTHS_AHEAD = int(os.getenv("EVENT_PARTITION_MONTHS_AHEAD", 3))
+EVENT_RETENTION_MONTHS = int(os.getenv("EVENT_RETENTION_MONTHS", 0))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "App Name",
     "DESCRIPTION": "API Docs for App Name",
@@ -67,8 +139,11 @@ SPECTACULAR_SETTINGS = {
 }
 
 MIDDLEWARE = [
+    # Prometheus metrics, outermost so it times the whole stack
+    'app.middleware.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'silk.middleware.SilkyMiddleware',
+    # Sampled profiling (Silk is only enabled in dev, see settings/dev.py)
+    'app.middleware.profiling.SamplingProfilerMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     # django-structlog
     "django_structlog.middlewares.RequestMiddleware",
@@ -81,9 +156,16 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    # Query budgets / N+1 detection, innermost so only view queries count
+    'app.middleware.query_budget.QueryBudgetMiddleware',
 
 ]
 
+# WhiteNoise is sync-only: under ASGI Django would hand every request to a thread for it,
+# so static files are served by ServeStaticASGI around the application instead (app/asgi.py)
+if os.getenv("ASGI") == "true":
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -3,6 +3,13 @@ from .base import *
 
 DEBUG = True
 
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "warn")
+
+# Silk records every request and query to the database, so it is dev only
+if os.getenv("SILK_ENABLED", "true") == "true":
+    MIDDLEWARE = [*MIDDLEWARE]
+    MIDDLEWARE.insert(MIDDLEWARE.index('app.middleware.profiling.SamplingProfilerMiddleware') + 1, 'silk.middleware.SilkyMiddleware')
+
 DATABASES = {
     'default': {
         'ENGINE': os.getenv("DB_ENGINE", default="django.db.backends.sqlite3"),
@@ -13,3 +20,6 @@ DATABASES = {
         'PORT': os.getenv("DB_PORT", default="5432"),
     }
 }
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default'].update(POSTGRES_CONNECTION)
@@ -1,6 +1,7 @@
 import json
 import boto3
 from botocore.exceptions import ClientError
+from django.core.exceptions import ImproperlyConfigured
 from .base import *
 
 
@@ -34,5 +35,18 @@ DATABASES = {
                 "PASSWORD": db_secret["password"],
                 "HOST": general_secret["DB_HOST"],
                 "PORT": 5432,
+        **POSTGRES_CONNECTION,
+    }
+}
+
+# Shared cache so every worker sees the same responses, data version and token
+# versions. With the per-process default, one worker's writes would not invalidate
+# the others' cached lists, so it is required rather than optional.
+if not os.getenv("REDIS_URL"):
+    raise ImproperlyConfigured("REDIS_URL must point at the shared Redis cache in production")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
     }
 }
@@ -2,6 +2,7 @@ from django.urls import path, include
 from dj_rest_auth.views import LoginView, LogoutView
 from rest_framework_simplejwt.views import TokenRefreshView, TokenObtainPairView
 from django.contrib import admin
+from app.metrics import metrics_view
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
@@ -11,6 +12,9 @@ from drf_spectacular.views import (
 urlpatterns = [
     path('admin/', admin.site.urls),
 
+    # Prometheus
+    path('metrics', metrics_view, name='metrics'),
+
     #Silk
     path('silk/', include('silk.urls', namespace='silk')),
 
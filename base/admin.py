@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Ride, RideEvent
+from .models import ArchivedRide, DriverMonthlyReport, User, Ride, RideEvent
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -34,4 +34,24 @@ class RideEventAdmin(admin.ModelAdmin):
     list_display = ('id_ride_event', 'id_ride', 'description', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('description', 'id_ride__id_ride')
-    readonly_fields = ('created_at',)
\ No newline at end of file
+    readonly_fields = ('created_at',)
+
+@admin.register(DriverMonthlyReport)
+class DriverMonthlyReportAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the DriverMonthlyReport rollup.
+    """
+    list_display = ('month', 'id_driver', 'trips_count_over_1hr', 'updated_at')
+    list_filter = ('month',)
+    readonly_fields = ('month', 'id_driver', 'trips_count_over_1hr', 'updated_at')
+
+@admin.register(ArchivedRide)
+class ArchivedRideAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for archived rides (read only, the document is compressed).
+    """
+    list_display = ('id_ride', 'id_rider', 'id_driver', 'status', 'pickup_time', 'archived_at')
+    list_filter = ('status',)
+    search_fields = ('id_ride',)
+    exclude = ('document',)
+    readonly_fields = ('id_ride', 'id_rider', 'id_driver', 'status', 'pickup_time', 'archived_at')
@@ -0,0 +1,83 @@
+"""
+Cold archive of old completed and cancelled rides.
+
+archive_rides moves rides picked up before a cutoff, with all their events,
+into ArchivedRide: one zlib-compressed JSON document per ride, in the same
+shape as the rides API, with every event under `events`. Each batch is one
+transaction, so an interrupted run loses nothing and the next run carries on
+where it stopped. ArchivedRide.load() reads a document back, as
+/api/base/archived-rides/ does.
+
+Their trips over an hour are saved in ArchivedTrips first, so the driver
+trips report keeps counting them when it is rebuilt or refreshed.
+"""
+from django.db import connection, transaction
+from django.db.models import Prefetch
+
+from . import reports
+from .models import ArchivedRide, ArchivedTrips, Ride, RideEvent
+from .serializers import RideReadSerializer
+
+ARCHIVED_STATUSES = ('completed', 'cancelled')
+
+
+def archivable_rides(cutoff, statuses=ARCHIVED_STATUSES):
+    return Ride.objects.filter(status__in=statuses, pickup_time__lt=cutoff)
+
+
+def ride_document(ride):
+    """
+    The API representation of a ride whose `todays_events` holds all its events.
+    """
+    document = RideReadSerializer().to_representation(ride)
+    document['events'] = document.pop('todays_ride_events')
+    return document
+
+
+def _delete_where_in(model, column, ids):
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {connection.ops.quote_name(column)} IN ({placeholders})', ids)
+        return cursor.rowcount
+
+
+def archive_batch(queryset, batch_size):
+    """
+    Archives up to batch_size rides of queryset, oldest id first, and deletes
+    them with their events. Returns (rides, events) archived.
+    """
+    with transaction.atomic():
+        rides = list(
+            queryset.select_related('id_rider', 'id_driver')
+            .prefetch_related(Prefetch(
+                # Every event, under the attribute RideReadSerializer reads them from
+                'events', queryset=RideEvent.objects.order_by('created_at', 'pk'), to_attr='todays_events'
+            ))
+            .select_for_update(of=('self',))
+            .order_by('pk')[:batch_size]
+        )
+        if not rides:
+            return 0, 0
+
+        ArchivedRide.objects.bulk_create([
+            ArchivedRide(
+                id_ride=ride.id_ride,
+                id_rider=ride.id_rider_id,
+                id_driver=ride.id_driver_id,
+                status=ride.status,
+                pickup_time=ride.pickup_time,
+                document=ArchivedRide.compress(ride_document(ride)),
+            )
+            for ride in rides
+        ])
+        ArchivedTrips.objects.bulk_create([
+            ArchivedTrips(id_ride_id=ride_id, id_driver=driver_id, month=month, trips_count_over_1hr=trips)
+            for ride_id, driver_id, month, trips in reports.ride_trip_counts([ride.id_ride for ride in rides])
+        ])
+
+        # Raw deletes: everything signals would maintain for these rows is archived
+        ids = [ride.id_ride for ride in rides]
+        events = _delete_where_in(RideEvent, RideEvent._meta.get_field('id_ride').column, ids)
+        _delete_where_in(Ride, Ride._meta.pk.column, ids)
+    return len(rides), events
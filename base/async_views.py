@@ -0,0 +1,109 @@
+"""
+Async ride list and detail endpoints, for ASGI deployments.
+
+They reuse RideViewSet's queryset, filters, pagination and serializers, but
+authenticate, check permissions and read rides through async code paths, so a
+request waiting on the database doesn't hold a worker thread for its whole
+duration.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .authentication import AsyncJWTAuthentication
+from .filters import RideFilter
+from .views import RideViewSet
+
+
+class AsyncRideView(View):
+    """
+    GET rides (list) or a single ride (retrieve), same responses as RideViewSet.
+
+    Not covered: the response cache and browsable API of the sync endpoints.
+    """
+    viewset_class = RideViewSet
+    authentication_classes = [AsyncJWTAuthentication]
+    http_method_names = ['get', 'options']
+
+    async def get(self, request, id_ride=None):
+        drf_request = Request(request)
+        viewset = self.viewset_class(
+            request=drf_request,
+            action='list' if id_ride is None else 'retrieve',
+            format_kwarg=None,
+            args=(),
+            kwargs={'id_ride': id_ride} if id_ride is not None else {},
+        )
+        try:
+            await self.initial(drf_request, viewset)
+            if id_ride is None:
+                data = await self.list(drf_request, viewset)
+            else:
+                data = await self.retrieve(drf_request, viewset, id_ride)
+        except exceptions.APIException as exc:
+            return self.handle_exception(drf_request, exc)
+
+        return self.render(data)
+
+    async def initial(self, request, viewset):
+        """
+        Async counterpart of APIView.initial: authentication, then permissions.
+        """
+        user, auth = AnonymousUser(), None
+        for authenticator in (auth_class() for auth_class in self.authentication_classes):
+            result = await authenticator.aauthenticate(request)
+            if result is not None:
+                user, auth = result
+                break
+        request.user, request.auth = user, auth
+
+        for permission in viewset.get_permissions():
+            if not await permission.ahas_permission(request, viewset):
+                if not user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    async def filter_queryset(self, request, viewset):
+        queryset = viewset.get_queryset()
+        if RideFilter.orders_by_nearest(request.query_params):
+            # The nearest-ride search runs queries while building the queryset
+            return await sync_to_async(viewset.filter_queryset)(queryset)
+        return viewset.filter_queryset(queryset)
+
+    async def list(self, request, viewset):
+        queryset = await self.filter_queryset(request, viewset)
+        page = await viewset.paginator.apaginate_queryset(queryset, request, view=viewset)
+        serializer = viewset.get_serializer(page, many=True)
+        return viewset.paginator.get_paginated_response(serializer.data).data
+
+    async def retrieve(self, request, viewset, id_ride):
+        queryset = await self.filter_queryset(request, viewset)
+        ride = await queryset.filter(id_ride=id_ride).afirst()
+        if ride is None:
+            raise exceptions.NotFound()
+        return viewset.get_serializer(ride).data
+
+    def handle_exception(self, request, exc):
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            header = AsyncJWTAuthentication().authenticate_header(request)
+            headers['WWW-Authenticate'] = header
+            exc.status_code = 401
+
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {'detail': exc.detail}
+        return self.render(data, status=exc.status_code, headers=headers)
+
+    def render(self, data, status=200, headers=None):
+        return HttpResponse(
+            JSONRenderer().render(data),
+            status=status,
+            content_type='application/json',
+            headers=headers,
+        )
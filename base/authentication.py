@@ -0,0 +1,194 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .tokens import ROLE_CLAIM, VERSION_CLAIM, publish_token_state, token_state_key, token_state_timeout
+
+
+def _state_from_db(state):
+    if state is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    return state
+
+
+def load_token_state(user_id):
+    """
+    The user's current (token_version, is_active): from the cache, or from the
+    database on a miss (eviction, cache restart), written back for the next requests.
+    """
+    state = cache.get(token_state_key(user_id))
+    if state is None:
+        state = _state_from_db(
+            get_user_model().objects.filter(pk=user_id).values_list('token_version', 'is_active').first()
+        )
+        publish_token_state(user_id, *state)
+    return state
+
+
+async def aload_token_state(user_id):
+    """
+    Async counterpart of load_token_state.
+    """
+    state = await cache.aget(token_state_key(user_id))
+    if state is None:
+        state = _state_from_db(
+            await get_user_model().objects.filter(pk=user_id).values_list('token_version', 'is_active').afirst()
+        )
+        await cache.aset(token_state_key(user_id), state, token_state_timeout())
+    return state
+
+
+def check_token_state(validated_token, state):
+    current_version, is_active = state
+    if not is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if validated_token[VERSION_CLAIM] < current_version:
+        raise AuthenticationFailed(_("Token is stale, the user's role has changed"), code="token_stale")
+
+
+class UserLRU:
+    """
+    Small per-process LRU of full User objects keyed on (id, token_version),
+    for views that need more than the token claims. Entries expire after ttl
+    seconds so other profile changes show up too.
+    """
+
+    def __init__(self, maxsize=256, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_model, user_id, version):
+        key = (user_id, version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._users.move_to_end(key)
+                # A copy, so a view changing it doesn't leak into other requests
+                return copy.copy(entry[0])
+
+        user = user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        with self._lock:
+            self._users[key] = (user, now)
+            self._users.move_to_end(key)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+        return copy.copy(user)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserLRU()
+
+
+class ClaimsUser(TokenUser):
+    """
+    Authenticated user built from access token claims, without a query.
+
+    id, role and is_authenticated come from the token. Any other attribute
+    (email, first_name, ...) loads the full User through user_cache.
+    """
+    # Tokens of inactive users are rejected by StatelessJWTAuthentication
+    is_active = True
+
+    @cached_property
+    def role(self):
+        return self.token[ROLE_CLAIM]
+
+    def get_user(self):
+        return user_cache.get(get_user_model(), self.id, self.token[VERSION_CLAIM])
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if attr in self.token:
+            return self.token[attr]
+        return getattr(self.get_user(), attr)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts the role claims of tokens issued at login
+    (see base.tokens), so IsAdmin needs no database hit.
+
+    Tokens older than the user's token_version, or of an inactive user, are
+    rejected. Both are read from the cache, where token issuance and user saves
+    publish them, and from the database on a miss. Tokens without the claims
+    load the user as before.
+    """
+
+    def has_claims(self, validated_token):
+        return ROLE_CLAIM in validated_token and VERSION_CLAIM in validated_token
+
+    def get_user(self, validated_token):
+        if not self.has_claims(validated_token):
+            return super().get_user(validated_token)
+
+        user = ClaimsUser(validated_token)
+        check_token_state(validated_token, load_token_state(user.id))
+        return user
+
+
+class AsyncJWTAuthentication(StatelessJWTAuthentication):
+    """
+    JWTAuthentication with an async entry point for async views.
+
+    Token parsing and validation are CPU only; the user lookup goes through the
+    async ORM, so authenticating never blocks the event loop.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """
+        Async counterpart of get_user, with the same checks.
+        """
+        if self.has_claims(validated_token):
+            user = ClaimsUser(validated_token)
+            check_token_state(validated_token, await aload_token_state(user.id))
+            return user
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,76 @@
+"""
+Bulk inserts: PostgreSQL COPY with preallocated primary keys, bulk_create
+elsewhere. Used by seed_data and the bulk RideEvent endpoint.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import reports, trips
+from .cache import bump_data_version
+from .models import RideEvent
+
+
+def copy_objects(model, objs, include_pk):
+    """
+    Inserts unsaved model instances with PostgreSQL COPY. psycopg adapts and
+    escapes every value (tabs, newlines, carriage returns, backslashes, NULL).
+    """
+    fields = [f for f in model._meta.concrete_fields if include_pk or not f.primary_key]
+    columns = ', '.join(connection.ops.quote_name(f.column) for f in fields)
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(f'COPY {model._meta.db_table} ({columns}) FROM STDIN') as copy:
+            for obj in objs:
+                copy.write_row([getattr(obj, f.attname) for f in fields])
+
+
+def allocate_ids(model, count):
+    """
+    Reserves count primary keys from the model's PostgreSQL sequence.
+    """
+    pk = model._meta.pk.column
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+            [model._meta.db_table, pk, count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def insert_objects(model, objs):
+    """
+    Inserts unsaved instances in one statement and sets their primary keys.
+    """
+    if connection.vendor == 'postgresql':
+        for obj, pk in zip(objs, allocate_ids(model, len(objs))):
+            obj.pk = pk
+        copy_objects(model, objs, include_pk=True)
+    else:
+        model.objects.bulk_create(objs)
+    return objs
+
+
+def create_events(rows):
+    """
+    Inserts RideEvents from validated {'id_ride', 'description'} rows in one
+    transaction, then brings the trip times and the report rollup of the
+    affected rides up to date, which bulk inserts otherwise skip.
+    """
+    now = timezone.now()
+    events = [
+        RideEvent(
+            id_ride_id=row['id_ride'],
+            description=row['description'],
+            kind=RideEvent.classify(row['description']),
+            created_at=now,
+        )
+        for row in rows
+    ]
+    trip_rides = {event.id_ride_id for event in events if reports.is_trip_event(event)}
+
+    with transaction.atomic():
+        insert_objects(RideEvent, events)
+        if trip_rides:
+            trips.rebuild_trip_times(trip_rides)
+            reports.refresh_rides_reports(trip_rides)
+        bump_data_version()
+    return events
@@ -0,0 +1,117 @@
+"""
+Versioned response cache for list endpoints.
+
+Cache keys embed a global data version. post_save/post_delete on Ride, RideEvent
+and User bump it (see base/signals.py), which orphans every cached response at
+once: invalidation is a single incr, no key scanning. Orphaned entries simply
+expire with API_CACHE_TIMEOUT, which also bounds staleness of time-relative data
+such as the recent events window and of writes that bypass signals
+(bulk_create, update()).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+KEY_PREFIX = 'api_cache'
+VERSION_KEY = f'{KEY_PREFIX}:version'
+
+# Names of the views using CachedListMixin, for the stats endpoint
+cached_views = set()
+
+
+def get_data_version():
+    # Seeded from the clock so an evicted counter never reuses an old version
+    return cache.get_or_set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+async def aget_data_version():
+    return await cache.aget_or_set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_data_version()
+
+
+def bump_data_version():
+    """
+    Invalidates every cached response, once the current transaction commits.
+    Bulk deletes send one signal per row, so a transaction bumps only once.
+    """
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and any(entry[1] is _bump for entry in connection.run_on_commit):
+        return
+    transaction.on_commit(_bump)
+
+
+def _increment(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def record(view_name, hit):
+    _increment(f"{KEY_PREFIX}:stats:{view_name}:{'hits' if hit else 'misses'}")
+
+
+def cache_stats():
+    stats = {}
+    for name in sorted(cached_views):
+        counters = cache.get_many([f'{KEY_PREFIX}:stats:{name}:hits', f'{KEY_PREFIX}:stats:{name}:misses'])
+        stats[name] = {
+            'hits': counters.get(f'{KEY_PREFIX}:stats:{name}:hits', 0),
+            'misses': counters.get(f'{KEY_PREFIX}:stats:{name}:misses', 0),
+        }
+    return {'version': get_data_version(), 'views': stats}
+
+
+def response_cache_key(request, view_name):
+    """
+    Key on (view, data version, user role, host, normalized query params).
+    """
+    params = '&'.join(
+        f'{key}={value}'
+        for key, values in sorted(request.query_params.lists())
+        for value in values
+    )
+    role = getattr(request.user, 'role', None) or 'anonymous'
+    digest = hashlib.sha256(f'{request.get_host()}?{params}'.encode('utf-8')).hexdigest()[:32]
+    return f'{KEY_PREFIX}:{get_data_version()}:{view_name}:{role}:{digest}'
+
+
+class CachedListMixin:
+    """
+    ViewSet mixin caching successful list responses in Django's cache.
+    Responses carry an X-Cache: HIT/MISS header.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cached_views.add(cls.__name__)
+
+    def list(self, request, *args, **kwargs):
+        timeout = getattr(settings, 'API_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return super().list(request, *args, **kwargs)
+
+        view_name = self.__class__.__name__
+        key = response_cache_key(request, view_name)
+        data = cache.get(key)
+        if data is not None:
+            record(view_name, hit=True)
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        record(view_name, hit=False)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,79 @@
+"""
+Streaming ride exports (NDJSON and CSV), see RideViewSet.export.
+
+Rows are read with QuerySet.iterator(chunk_size), a server-side cursor on
+PostgreSQL, and each chunk's events are prefetched in one query, so memory
+depends on the chunk size and not on the size of the export.
+"""
+import csv
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Flat CSV columns, nested values by dotted path
+CSV_COLUMNS = [
+    'id_ride',
+    'status',
+    'rider.id',
+    'rider.email',
+    'driver.id',
+    'driver.email',
+    'pickup_latitude',
+    'pickup_longitude',
+    'dropoff_latitude',
+    'dropoff_longitude',
+    'pickup_time',
+    'picked_up_at',
+    'dropped_off_at',
+    'duration_seconds',
+    'created_at',
+    'updated_at',
+    'todays_ride_events',
+]
+
+
+def ride_rows(queryset, serializer, chunk_size):
+    """
+    Yields the serialized rides of queryset, chunk_size rows at a time.
+    """
+    for ride in queryset.iterator(chunk_size=chunk_size):
+        yield serializer.to_representation(ride)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """
+    File-like object handing csv.writer's output straight back.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(row, column):
+    value = row
+    for key in column.split('.'):
+        value = value.get(key) if value is not None else None
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+    return '' if value is None else value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        yield writer.writerow([_csv_value(row, column) for column in CSV_COLUMNS])
+
+
+def export_lines(export_format, rows):
+    return ndjson_lines(rows) if export_format == 'ndjson' else csv_lines(rows)
@@ -1,7 +1,13 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django_filters import rest_framework as filters
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from utils.annote import annotate_distance
-from .models import Ride
+from utils.geo import GRID_CELL_DEGREES, KM_PER_DEGREE, bounding_box_q, grid_cells_q
+from .models import Ride, RideEvent, duration_sort_key
+from .pagination import RidePagination, is_number, keyset_q
 
 
 class RideFilter(filters.FilterSet):
@@ -12,12 +18,49 @@ class RideFilter(filters.FilterSet):
         choices=Ride.STATUS_CHOICES,
         help_text="Filter by ride status"
     )
-    rider_email = filters.CharFilter(field_name="id_rider__email", lookup_expr='icontains')
+    rider_email = filters.CharFilter(
+        method='filter_rider_email',
+        help_text="Full email for an exact match, `prefix*` for a prefix, anything else for a substring"
+    )
+    min_duration = filters.NumberFilter(
+        field_name='duration_seconds',
+        lookup_expr='gte',
+        help_text="Minimum trip duration in seconds"
+    )
+    max_duration = filters.NumberFilter(
+        field_name='duration_seconds',
+        lookup_expr='lte',
+        help_text="Maximum trip duration in seconds"
+    )
+
+    # Sorting by distance only reads the rides the requested page needs
+    narrow_to_page = True
 
     class Meta:
         model = Ride
         fields = []
 
+    def filter_rider_email(self, queryset, name, value):
+        """
+        Case-insensitive search on LOWER(email), which is indexed (migration 0009),
+        picking the cheapest lookup the input allows:
+        - a full email matches exactly
+        - a trailing * matches a prefix, e.g. `alice*`
+        - anything else matches a substring, trigram-indexed on PostgreSQL
+        """
+        value = value.strip().lower()
+        if not value.rstrip('*'):
+            return queryset
+
+        queryset = queryset.alias(rider_email_lower=Lower('id_rider__email'))
+        if value.endswith('*'):
+            return queryset.filter(rider_email_lower__startswith=value.rstrip('*'))
+        try:
+            validate_email(value)
+        except DjangoValidationError:
+            return queryset.filter(rider_email_lower__contains=value)
+        return queryset.filter(rider_email_lower=value)
+
     def filter_queryset(self, queryset):
         """
         Override the queryset property to inject distance logic 
@@ -25,13 +68,23 @@ class RideFilter(filters.FilterSet):
         """
         qs = super().filter_queryset(queryset)
 
+        descending = self.duration_ordering(self.request.query_params)
+        if descending is not None:
+            # Rides without a finished trip are kept and sorted last in both directions: a
+            # bound past every duration stands in for NULL, so cursors compare plain numbers
+            qs = qs.annotate(duration=duration_sort_key(descending))
+
         lat = self.request.query_params.get('lat')
         lng = self.request.query_params.get('lng')
+        radius_km = self.request.query_params.get('radius_km')
 
         # Both or neither - prevent partial coordinates
         if bool(lat) != bool(lng):
             raise ValidationError({'coordinates': 'Both lat and lng are required together'})
 
+        if radius_km and not lat:
+            raise ValidationError({'radius_km': 'radius_km requires lat and lng'})
+
         if lat and lng:
             # Validate ranges
             try:
@@ -41,6 +94,142 @@ class RideFilter(filters.FilterSet):
             except (ValueError, TypeError):
                 raise ValidationError({'coordinates': 'Invalid coordinates. Lat: -90 to 90, Lng: -180 to 180'})
             
-            qs = annotate_distance(qs, lat_f, lng_f)
+            radius_f = None
+            if radius_km:
+                try:
+                    radius_f = float(radius_km)
+                    if not radius_f > 0:
+                        raise ValueError
+                except (ValueError, TypeError):
+                    raise ValidationError({'radius_km': 'radius_km must be a positive number'})
+
+                # Cheap bounding box first so the coordinate index narrows the scan
+                qs = qs.filter(bounding_box_q(lat_f, lng_f, radius_f))
+
+            if self.narrow_to_page and self.orders_by_nearest(self.request.query_params):
+                # The page comes from the nearest candidates, but count covers every match
+                self.request.count_queryset = self._within_radius(qs, lat_f, lng_f, radius_f)
+                qs = self._nearest_candidates(qs, lat_f, lng_f)
 
+            qs = self._within_radius(qs, lat_f, lng_f, radius_f)
+
+        return qs
+
+    @staticmethod
+    def _within_radius(qs, lat, lng, radius_km):
+        qs = annotate_distance(qs, lat, lng)
+        if radius_km is not None:
+            # Exact check on the rows left inside the box
+            qs = qs.filter(distance__lte=radius_km)
         return qs
+
+    @staticmethod
+    def orders_by_nearest(query_params):
+        """
+        True when the request sorts by distance from lat/lng. Filtering then runs
+        the nearest-ride search, which queries the database.
+        """
+        ordering = query_params.get('ordering', '')
+        return bool(query_params.get('lat')) and ordering.split(',')[0].strip() == 'distance'
+
+    @staticmethod
+    def duration_ordering(query_params):
+        """
+        None when the request doesn't sort by duration, else whether it sorts descending.
+        """
+        for term in query_params.get('ordering', '').split(','):
+            term = term.strip()
+            if term.lstrip('-') == 'duration':
+                return term.startswith('-')
+        return None
+
+    def _candidates_needed(self, paginator):
+        """
+        Number of nearest rides needed to serve the requested page, plus one
+        so the paginator can still tell whether a next page exists.
+        """
+        page_size = paginator.get_page_size(self.request)
+        if paginator.cursor_query_param in self.request.query_params:
+            return page_size + 1
+        try:
+            page = max(int(self.request.query_params.get(paginator.page_query_param, 1)), 1)
+        except (TypeError, ValueError):
+            page = 1
+        return page * page_size + 1
+
+    def _nearest_candidates(self, qs, lat, lng):
+        """
+        Narrow qs to the rides that can appear in the requested page when sorted
+        by distance, using the pickup grid cell index instead of a full scan.
+
+        Rings of cells around the point are expanded until they hold enough rides,
+        then the distance of the last needed ride bounds the final set of cells, so
+        the exact Haversine ordering on the candidates matches a full scan.
+        Falls back to the unrestricted queryset if the search grows too wide.
+        """
+        # Rides saved before the grid existed are invisible to it until backfilled
+        if Ride.objects.filter(pickup_cell__isnull=True).exists():
+            return qs
+
+        paginator = RidePagination()
+        cursor = paginator.decode_cursor(self.request)
+        radius_km = GRID_CELL_DEGREES * KM_PER_DEGREE
+        after = Q()
+
+        if cursor is not None:
+            if not is_number(cursor.value):
+                raise NotFound(paginator.invalid_cursor_message)
+            distance = cursor.value
+            if cursor.reverse:
+                # Everything before a backwards cursor is closer than it
+                cells = grid_cells_q(lat, lng, distance * 1.001 + 0.001)
+                return qs if cells is None else qs.filter(cells)
+            after = keyset_q('distance', False, distance, cursor.pk)
+            radius_km = max(radius_km, distance)
+
+        needed = self._candidates_needed(paginator)
+
+        def candidates(cells):
+            return annotate_distance(qs.filter(cells), lat, lng).filter(after)
+
+        while True:
+            cells = grid_cells_q(lat, lng, radius_km)
+            if cells is None:
+                return qs
+            if candidates(cells).order_by()[:needed].count() >= needed:
+                break
+            radius_km *= 2
+
+        # Every ride closer than the needed-th candidate lies inside this radius
+        bound_km = candidates(cells).order_by('distance', 'pk').values_list('distance', flat=True)[needed - 1]
+        cells = grid_cells_q(lat, lng, bound_km * 1.001 + 0.001)
+        if cells is None:
+            return qs
+
+        return qs.filter(cells)
+
+
+class RideExportFilter(RideFilter):
+    """
+    RideFilter for unpaginated reads: distance ordering sorts every matching ride.
+    """
+    narrow_to_page = False
+
+
+
+class RideEventFilter(filters.FilterSet):
+    kind = filters.MultipleChoiceFilter(
+        method='filter_kind',
+        choices=[(label, label) for label in RideEvent.Kind.labels],
+        help_text="Filter by event kind, e.g. `kind=pickup&kind=dropoff`"
+    )
+    id_ride = filters.NumberFilter(field_name='id_ride', help_text="Filter by ride")
+
+    class Meta:
+        model = RideEvent
+        fields = []
+
+    def filter_kind(self, queryset, name, value):
+        # Labels in the API, integers in the (kind, id_ride, created_at) index
+        kinds = [kind for kind in RideEvent.Kind if kind.label in value]
+        return queryset.filter(kind__in=kinds) if kinds else queryset
@@ -0,0 +1,62 @@
+"""
+Database checks of the detailed health check (/api/base/health-check/detailed).
+
+With DB_POOL on, every worker process has its own psycopg connection pool, so
+the pool statistics describe the worker that served the request.
+"""
+import time
+
+from django.db import DatabaseError, connections
+
+
+def database_latency(alias='default'):
+    """
+    Milliseconds of a `SELECT 1` round trip, including the connection checkout.
+    """
+    started = time.perf_counter()
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+def pool_stats(alias='default'):
+    """
+    Statistics of the alias's connection pool since the worker started, or None
+    when it is not pooled. psycopg_pool leaves counters that are still zero out.
+    """
+    pool = getattr(connections[alias], 'pool', None)
+    if pool is None:
+        return None
+
+    stats = pool.get_stats()
+    size = stats.get('pool_size', 0)
+    idle = stats.get('pool_available', 0)
+    return {
+        'min_size': stats.get('pool_min', pool.min_size),
+        'max_size': stats.get('pool_max', pool.max_size),
+        'size': size,
+        'in_use': size - idle,
+        'idle': idle,
+        'waiting': stats.get('requests_waiting', 0),
+        'checkouts': stats.get('requests_num', 0),
+        'checkouts_queued': stats.get('requests_queued', 0),
+        'wait_ms': stats.get('requests_wait_ms', 0),
+        'checkout_failures': stats.get('requests_errors', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+        'bad_returns': stats.get('returns_bad', 0),
+    }
+
+
+def database_health(alias='default'):
+    """
+    Latency probe and pool statistics of a database, with `status` 'error' when
+    the probe fails.
+    """
+    health = {'vendor': connections[alias].vendor, 'status': 'ok', 'latency_ms': None}
+    try:
+        health['latency_ms'] = database_latency(alias)
+    except DatabaseError as exc:
+        health.update(status='error', error=str(exc))
+    health['pool'] = pool_stats(alias)
+    return health
@@ -0,0 +1,56 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from base.archive import ARCHIVED_STATUSES, archivable_rides, archive_batch
+from base.cache import bump_data_version
+
+
+class Command(BaseCommand):
+    help = 'Moves old completed/cancelled rides and their events into the compressed ride archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=getattr(settings, 'RIDE_ARCHIVE_AFTER_DAYS', 365),
+            help='Archive rides picked up more than this many days ago'
+        )
+        parser.add_argument(
+            '--status', action='append', choices=ARCHIVED_STATUSES,
+            help='Ride status to archive, repeatable (default: completed and cancelled)'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Rides archived per transaction')
+        parser.add_argument('--max-batches', type=int, default=0, help='Stop after this many batches (0: no limit)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rides that would be archived')
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 1:
+            raise CommandError('--older-than-days must be at least 1')
+
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        queryset = archivable_rides(cutoff, options['status'] or ARCHIVED_STATUSES)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Dry run: {queryset.count()} rides picked up before {cutoff:%Y-%m-%d} would be archived"
+            ))
+            return
+
+        self.stdout.write(f"Archiving rides picked up before {cutoff:%Y-%m-%d}...")
+
+        # Every batch commits on its own, rerunning resumes after the last one
+        started = time.monotonic()
+        rides = events = batches = 0
+        while not options['max_batches'] or batches < options['max_batches']:
+            archived, archived_events = archive_batch(queryset, max(options['batch_size'], 1))
+            if not archived:
+                break
+            rides += archived
+            events += archived_events
+            batches += 1
+            rate = rides / (time.monotonic() - started or 1)
+            self.stdout.write(f"- {rides} rides, {events} events archived ({rate:,.0f} rides/s)")
+
+        if rides:
+            bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"Archive Complete: {rides} rides, {events} events archived"))
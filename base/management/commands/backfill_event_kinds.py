@@ -0,0 +1,41 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Case, Max, Value, When
+from base.cache import bump_data_version
+from base.models import RideEvent
+
+
+class Command(BaseCommand):
+    help = 'Backfills the RideEvent kind classified from descriptions, then rebuilds trip times and reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Primary key range updated per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        kind = Case(
+            *(
+                When(description=RideEvent.description_for(kind), then=Value(kind.value))
+                for kind in RideEvent.Kind if kind != RideEvent.Kind.OTHER
+            ),
+            default=Value(RideEvent.Kind.OTHER.value),
+        )
+        last_id = RideEvent.objects.aggregate(last=Max('id_ride_event'))['last'] or 0
+
+        self.stdout.write("Backfilling ride event kinds...")
+
+        # One UPDATE per primary key range, each a short index range scan
+        updated = 0
+        for start in range(0, last_id, batch_size):
+            updated += RideEvent.objects.filter(
+                id_ride_event__gt=start, id_ride_event__lte=start + batch_size
+            ).update(kind=kind)
+            self.stdout.write(f"- {updated} events classified")
+
+        if updated:
+            bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"Backfill Complete: {updated} events classified"))
+
+        # Both are computed from the pickup and dropoff kinds just classified
+        call_command('rebuild_trip_times', stdout=self.stdout, stderr=self.stderr)
+        call_command('rebuild_reports', stdout=self.stdout, stderr=self.stderr)
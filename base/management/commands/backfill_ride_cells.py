@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from base.models import Ride
+from utils.geo import grid_cell
+
+
+class Command(BaseCommand):
+    help = 'Backfills the pickup grid cell used for distance ordering'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rides updated per batch')
+        parser.add_argument('--all', action='store_true', help='Recompute every ride, not only missing cells')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Ride.objects.all() if options['all'] else Ride.objects.filter(pickup_cell__isnull=True)
+
+        self.stdout.write("Backfilling ride grid cells...")
+
+        # Walk the primary key so each batch is an index range scan
+        last_id = 0
+        updated = 0
+        while True:
+            batch = list(
+                queryset.filter(id_ride__gt=last_id)
+                .order_by('id_ride')
+                .only('id_ride', 'pickup_latitude', 'pickup_longitude')[:batch_size]
+            )
+            if not batch:
+                break
+
+            for ride in batch:
+                ride.pickup_cell = grid_cell(ride.pickup_latitude, ride.pickup_longitude)
+            Ride.objects.bulk_update(batch, ['pickup_cell'])
+
+            last_id = batch[-1].id_ride
+            updated += len(batch)
+            self.stdout.write(f"- {updated} rides updated")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfill Complete: {updated} rides updated"))
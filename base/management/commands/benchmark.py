@@ -0,0 +1,216 @@
+import json
+import math
+import platform
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from base.models import Ride
+from base.pagination import RidePagination
+
+User = get_user_model()
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    rank = max(math.ceil(pct / 100 * len(samples)), 1)
+    return samples[rank - 1]
+
+
+def build_scenarios():
+    """
+    Returns [(name, url)] for the API hot paths, parameterized from current data.
+    """
+    ride_count = Ride.objects.count()
+    sample = Ride.objects.select_related('id_rider').order_by('pk').first()
+    lat, lng = (sample.pickup_latitude, sample.pickup_longitude) if sample else (37.7749, -122.4194)
+    email = sample.id_rider.email if sample else 'rider@example.com'
+
+    page_size = RidePagination.page_size
+    deep_page = max(math.ceil(ride_count * 0.9 / page_size), 1)
+
+    # Cursor pointing at the same depth as deep_page, ordered by -created_at
+    deep_cursor = ''
+    deep_ride = Ride.objects.order_by('-created_at', '-pk')[deep_page * page_size - 1:deep_page * page_size].first()
+    if deep_ride:
+        paginator = RidePagination()
+        paginator.base_url = '/api/base/rides/'
+        paginator.keyset_field = 'created_at'
+        deep_cursor = paginator.encode_cursor(deep_ride, False).split('cursor=')[1]
+
+    return [
+        ('ride_list', '/api/base/rides/'),
+        ('ride_list_filtered', f'/api/base/rides/?status=completed&rider_email={email}'),
+        ('ride_distance', f'/api/base/rides/?lat={lat}&lng={lng}&ordering=distance'),
+        ('ride_radius', f'/api/base/rides/?lat={lat}&lng={lng}&radius_km=50'),
+        ('ride_deep_page', f'/api/base/rides/?page={deep_page}'),
+        ('ride_deep_cursor', f'/api/base/rides/?cursor={deep_cursor}'),
+        ('ride_events_list', '/api/base/ride-events/'),
+        ('user_list', '/api/base/users/'),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the API hot paths and writes the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default='',
+            help='Comma separated ride counts to reseed and benchmark, e.g. 1000,100000,1000000. '
+                 'Without it, the current data is benchmarked as is.'
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per scenario')
+        parser.add_argument('--output', default='benchmark.json', help='Where to write the JSON results')
+        parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+        parser.add_argument(
+            '--max-regression', type=float, default=0.2,
+            help='Allowed p95 slowdown against the baseline, as a fraction'
+        )
+        parser.add_argument('--batch-size', type=int, default=20000, help='Seed batch size')
+        parser.add_argument('--workers', type=int, default=1, help='Seed worker processes')
+        parser.add_argument('--noinput', action='store_true', help='Reseed without asking for confirmation')
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options['scales'].split(',') if scale.strip()]
+        if scales and not options['noinput']:
+            answer = input("Reseeding deletes all rides, events and non-admin users. Type 'yes' to continue: ")
+            if answer != 'yes':
+                raise CommandError("Benchmark cancelled")
+
+        admin, _ = User.objects.get_or_create(
+            email='benchmark@example.com',
+            defaults={'username': 'benchmark', 'role': 'admin', 'is_staff': True}
+        )
+        client = APIClient()
+        client.force_authenticate(user=admin)
+
+        results = []
+        for scale in scales or [None]:
+            if scale is not None:
+                self.reseed(scale, options)
+            scale = Ride.objects.count()
+            self.stdout.write(self.style.NOTICE(f"\nBenchmarking {scale} rides"))
+
+            for name, url in build_scenarios():
+                result = self.run_scenario(client, name, url, options['iterations'], options['warmup'])
+                result['scale'] = scale
+                results.append(result)
+                latency = result['latency_ms']
+                self.stdout.write(
+                    f"- {name:<20} p50 {latency['p50']:>8.2f}ms  p95 {latency['p95']:>8.2f}ms  "
+                    f"{result['queries']:>3} queries  {result['peak_memory_kb']:>8.0f} KB"
+                )
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'iterations': options['iterations'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"\nResults written to {options['output']}"))
+
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['max_regression'])
+
+    def reseed(self, scale, options):
+        self.stdout.write(f"\nReseeding {scale} rides...")
+        call_command('clear_data', truncate=True, stdout=self.stdout)
+        call_command(
+            'seed_data',
+            rides=scale,
+            riders=max(scale // 10, 10),
+            drivers=max(scale // 50, 5),
+            events_per_ride=5,
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            stdout=self.stdout,
+        )
+
+    def run_scenario(self, client, name, url, iterations, warmup):
+        # The test client talks to "testserver", which must pass host validation.
+        # The response and count caches are off, so every timed request runs the queries
+        # rather than returning what the warmup cached.
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], API_CACHE_TIMEOUT=0, COUNT_CACHE_TIMEOUT=0
+        ):
+            for _ in range(warmup):
+                client.get(url)
+
+            timings = []
+            for _ in range(max(iterations, 1)):
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            # Separate passes so query capture and tracemalloc don't skew the timings
+            with CaptureQueriesContext(connection) as captured:
+                client.get(url)
+            queries = [q for q in captured.captured_queries if 'silk_' not in q['sql']]
+
+            tracemalloc.start()
+            try:
+                client.get(url)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        timings.sort()
+        latency = {f'p{pct}': round(percentile(timings, pct), 3) for pct in PERCENTILES}
+        latency.update(
+            mean=round(sum(timings) / len(timings), 3),
+            min=round(timings[0], 3),
+            max=round(timings[-1], 3),
+        )
+        return {
+            'scenario': name,
+            'url': url,
+            'status_code': response.status_code,
+            'latency_ms': latency,
+            'queries': len(queries),
+            'db_time_ms': round(sum(float(q['time']) for q in queries) * 1000, 3),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def compare(self, results, baseline_path, max_regression):
+        with open(baseline_path) as baseline_file:
+            baseline = {
+                (row['scale'], row['scenario']): row for row in json.load(baseline_file)['results']
+            }
+
+        self.stdout.write(self.style.NOTICE(f"\nCompared to {baseline_path}"))
+        regressions = []
+        for result in results:
+            before = baseline.get((result['scale'], result['scenario']))
+            if before is None:
+                continue
+
+            ratio = result['latency_ms']['p95'] / max(before['latency_ms']['p95'], 1e-9)
+            query_delta = result['queries'] - before['queries']
+            self.stdout.write(
+                f"- {result['scenario']:<20} @ {result['scale']}: p95 x{ratio:.2f}, queries {query_delta:+d}"
+            )
+            if ratio > 1 + max_regression or query_delta > 0:
+                regressions.append(f"{result['scenario']} @ {result['scale']}")
+
+        if regressions:
+            raise CommandError(f"Regressions against baseline: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
@@ -1,38 +1,122 @@
+import time
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from django.db.models import Q
-from base.models import Ride, RideEvent
+from django.db import connection
+from django.db.models import Max, Q
+from base.cache import bump_data_version
+from base.models import ArchivedRide, ArchivedTrips, DriverMonthlyReport, Ride, RideEvent
 
 User = get_user_model()
 
+# Children before parents, so no row is ever left pointing at a deleted one
+WIPED_MODELS = [DriverMonthlyReport, RideEvent, Ride, ArchivedTrips, ArchivedRide]
+
+
 class Command(BaseCommand):
-    help = 'Clears all Rides, RideEvents, and non-admin Users'
+    help = 'Clears all Rides (hot and archived), RideEvents, and non-admin Users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows deleted per batch')
+        parser.add_argument(
+            '--truncate', action='store_true',
+            help='TRUNCATE ... CASCADE rides, events and reports instead of deleting them in batches'
+        )
 
-    def handle(self, *args, **kwargs):
+    def handle(self, *args, **options):
         self.stdout.write("Clearing data...")
-        
-        # 1. Delete RideEvents first (Child)
-        events_count = RideEvent.objects.all().delete()[0]
-        
-        # 2. Delete Rides (Parent)
-        rides_count = Ride.objects.all().delete()[0]
-        
-        # 3. Delete Users with safety filters
+        batch_size = max(options['batch_size'], 1)
+
+        # Raw SQL, no rows are loaded into Python and no per-row signals run.
+        # Everything these signals maintain is wiped too.
+        counts = {}
+        if options['truncate']:
+            counts.update(self.truncate(WIPED_MODELS))
+        else:
+            for model in WIPED_MODELS:
+                counts[model] = self.delete_in_batches(model, batch_size)
+
+        # Delete Users with safety filters
         # We exclude:
         # - Superusers (is_superuser=True)
         # - Users with role 'admin'
         # - Users with role 'administrator'
         users_to_delete = User.objects.exclude(
-            Q(is_superuser=True) | 
-            Q(role__iexact='admin') | 
+            Q(is_superuser=True) |
+            Q(role__iexact='admin') |
             Q(role__iexact='administrator')
         )
-        
-        users_count = users_to_delete.delete()[0]
-        
+        users_count = self.delete_users_in_batches(users_to_delete, batch_size)
+
+        bump_data_version()
+
         self.stdout.write(self.style.SUCCESS(
             f"Cleanup Complete:\n"
-            f"- {events_count} RideEvents deleted\n"
-            f"- {rides_count} Rides deleted\n"
+            f"- {counts[RideEvent]} RideEvents deleted\n"
+            f"- {counts[Ride]} Rides deleted\n"
             f"- {users_count} Users deleted (Admins and Superusers preserved)"
         ))
+
+    def progress(self, label, deleted, started):
+        elapsed = time.monotonic() - started
+        rate = deleted / elapsed if elapsed else 0
+        self.stdout.write(f"- {label}: {deleted} rows deleted ({rate:,.0f} rows/s)")
+
+    def truncate(self, models):
+        """
+        Empties the tables, with a single TRUNCATE on PostgreSQL. Returns the row counts they had.
+        """
+        counts = {model: model.objects.count() for model in models}
+        tables = ', '.join(connection.ops.quote_name(model._meta.db_table) for model in models)
+        started = time.monotonic()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'TRUNCATE {tables} CASCADE')
+            else:
+                # SQLite has no TRUNCATE, an unfiltered DELETE is its equivalent
+                for model in models:
+                    cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+        self.progress('truncate', sum(counts.values()), started)
+        return counts
+
+    def delete_in_batches(self, model, batch_size):
+        """
+        Deletes every row of model with one DELETE per primary key range, each in its
+        own short transaction. Each range ends at the batch_size-th id left, so gaps
+        in the ids (archives, COPY allocation) never cost empty round trips.
+        """
+        table = connection.ops.quote_name(model._meta.db_table)
+        pk = connection.ops.quote_name(model._meta.pk.column)
+        started = time.monotonic()
+        deleted = 0
+        last = None
+        with connection.cursor() as cursor:
+            while True:
+                # Starting after the last range skips the index entries just deleted
+                remaining = model.objects.order_by('pk')
+                if last is not None:
+                    remaining = remaining.filter(pk__gt=last)
+                bound = next(iter(remaining.values_list('pk', flat=True)[batch_size - 1:batch_size]), None)
+                if bound is None:
+                    bound = remaining.aggregate(high=Max('pk'))['high']
+                    if bound is None:
+                        break
+                cursor.execute(f'DELETE FROM {table} WHERE {pk} <= %s', [bound])
+                deleted += cursor.rowcount
+                last = bound
+                self.progress(model.__name__, deleted, started)
+        return deleted
+
+    def delete_users_in_batches(self, queryset, batch_size):
+        """
+        Deletes users through the ORM, so their allauth, token and admin log rows
+        cascade, one batch of primary keys at a time to bound memory.
+        """
+        started = time.monotonic()
+        deleted = 0
+        while True:
+            batch = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            deleted += queryset.filter(pk__in=batch).delete()[1].get(User._meta.label, 0)
+            self.progress('User', deleted, started)
+        return deleted
@@ -0,0 +1,173 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+from base import partitions, reports
+from base.cache import bump_data_version
+from base.models import ArchivedTrips, RideEvent
+
+
+class Command(BaseCommand):
+    help = 'Creates upcoming RideEvent partitions and detaches or drops expired ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int, default=getattr(settings, 'EVENT_PARTITION_MONTHS_AHEAD', 3),
+            help='Months of partitions to create after the current one'
+        )
+        parser.add_argument(
+            '--retention-months', type=int, default=getattr(settings, 'EVENT_RETENTION_MONTHS', 0),
+            help='Months of events to keep, including the current one (0 keeps everything)'
+        )
+        parser.add_argument('--drop', action='store_true', help='Drop expired partitions instead of detaching them')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Events deleted per batch without partitions')
+        parser.add_argument(
+            '--lock-timeout', type=float, default=5,
+            help='Seconds a partition change waits for its locks before it is skipped'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only print what would be done')
+
+    def handle(self, *args, **options):
+        if options['ahead'] < 0 or options['retention_months'] < 0:
+            raise CommandError('--ahead and --retention-months must not be negative')
+        if not options['lock_timeout'] > 0:
+            raise CommandError('--lock-timeout must be positive')
+
+        current = partitions.month_start(timezone.now())
+        cutoff = None
+        if options['retention_months']:
+            cutoff = partitions.add_months(current, 1 - options['retention_months'])
+
+        if partitions.is_partitioned():
+            self.manage_partitions(current, cutoff, options)
+        elif cutoff is not None:
+            self.stdout.write("base_rideevent is not partitioned, deleting expired events in batches")
+            self.delete_expired(cutoff, options)
+        else:
+            self.stdout.write(self.style.SUCCESS("base_rideevent is not partitioned and events are kept forever"))
+
+    def manage_partitions(self, current, cutoff, options):
+        dry_run = options['dry_run']
+        with connection.cursor() as cursor:
+            existing = partitions.list_partitions(cursor)
+
+        upcoming = [partitions.add_months(current, offset) for offset in range(options['ahead'] + 1)]
+        missing = [month for month in upcoming if partitions.partition_name(month) not in existing]
+        # The default partition has no month and is never expired
+        expired = []
+        if cutoff is not None:
+            expired = [
+                name for name in existing
+                if partitions.partition_month(name) and partitions.partition_month(name) < cutoff
+            ]
+
+        action = 'dropped' if options['drop'] else 'detached'
+        prefix = "Dry run: " if dry_run else ""
+        if dry_run:
+            created, removed, failed = missing, expired, []
+        else:
+            created, removed, failed = self.apply(missing, expired, existing, options)
+
+        stray = 0
+        if partitions.DEFAULT_PARTITION in existing:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {partitions.DEFAULT_PARTITION}')
+                stray = cursor.fetchone()[0]
+
+        for month in created:
+            self.stdout.write(f"- created {partitions.partition_name(month)}")
+        for name in removed:
+            self.stdout.write(f"- {action} {name}")
+        for name, error in failed:
+            self.stdout.write(self.style.WARNING(f"- skipped {name}: {error}"))
+        if stray:
+            self.stdout.write(self.style.WARNING(
+                f"{stray} events are in {partitions.DEFAULT_PARTITION}, outside every monthly partition"
+            ))
+
+        message = f"{prefix}{len(created)} partitions created, {len(removed)} {action}"
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{message}, {len(failed)} skipped"))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
+
+    def apply(self, missing, expired, existing, options):
+        """
+        Commits every partition change on its own, so the locks one takes are
+        released before the next starts and a timeout only skips that change.
+        """
+        lock_timeout = options['lock_timeout']
+        created, removed, failed = [], [], []
+
+        for month in missing:
+            name = partitions.partition_name(month)
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    partitions.set_lock_timeout(cursor, lock_timeout)
+                    partitions.create_partition(cursor, month)
+            except OperationalError as exc:
+                failed.append((name, exc))
+            else:
+                created.append(month)
+
+        # CONCURRENTLY runs outside a transaction and never blocks readers or
+        # writers, but PostgreSQL refuses it while a default partition exists
+        concurrently = partitions.can_detach_concurrently(existing)
+        for name in expired:
+            # The report keeps counting the trips of the detached events
+            month = partitions.partition_month(name)
+            events = {
+                'created_at__gte': partitions.month_bound(month),
+                'created_at__lt': partitions.month_bound(partitions.add_months(month, 1)),
+            }
+            try:
+                if concurrently:
+                    saved = reports.save_expiring_trips(**events)
+                    try:
+                        with connection.cursor() as cursor:
+                            partitions.detach_partition(cursor, name, concurrently=True)
+                    except OperationalError:
+                        ArchivedTrips.objects.filter(pk__in=[trips.pk for trips in saved]).delete()
+                        raise
+                else:
+                    with transaction.atomic(), connection.cursor() as cursor:
+                        partitions.set_lock_timeout(cursor, lock_timeout)
+                        reports.save_expiring_trips(**events)
+                        partitions.detach_partition(cursor, name)
+            except OperationalError as exc:
+                failed.append((name, exc))
+                continue
+            # The table is detached, so dropping it no longer locks base_rideevent
+            if options['drop']:
+                with connection.cursor() as cursor:
+                    partitions.drop_partition(cursor, name)
+            removed.append(name)
+
+        if removed:
+            bump_data_version()
+        return created, removed, failed
+
+    def delete_expired(self, cutoff, options):
+        queryset = RideEvent.objects.filter(created_at__lt=partitions.month_bound(cutoff))
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {queryset.count()} events would be deleted"))
+            return
+
+        # Short primary key batches keep each transaction and its locks small.
+        # Each batch saves the trips it expires, so the report keeps counting them.
+        deleted = 0
+        with reports.suspended():
+            while True:
+                batch = list(
+                    queryset.order_by('id_ride_event').values_list('id_ride_event', flat=True)[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                with transaction.atomic():
+                    reports.save_expiring_trips(id_ride_event__in=batch)
+                    deleted += RideEvent.objects.filter(id_ride_event__in=batch).delete()[0]
+                self.stdout.write(f"- {deleted} events deleted")
+
+        if deleted:
+            bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"Retention Complete: {deleted} events deleted"))
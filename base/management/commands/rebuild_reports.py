@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from base.reports import rebuild_reports
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the driver "trips over 1 hour" monthly report from RideEvents'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write("Rebuilding reports...")
+        rows = rebuild_reports()
+        self.stdout.write(self.style.SUCCESS(f"Rebuild Complete: {rows} driver/month rows written"))
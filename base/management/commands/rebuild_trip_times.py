@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from base.cache import bump_data_version
+from base.models import Ride
+from base.trips import rebuild_trip_times
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds ride pickup/dropoff times and durations from RideEvents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rides updated per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        self.stdout.write("Rebuilding ride trip times...")
+
+        # Walk the primary key so each batch is an index range scan
+        last_id = 0
+        updated = 0
+        while True:
+            ride_ids = list(
+                Ride.objects.filter(id_ride__gt=last_id).order_by('id_ride').values_list('id_ride', flat=True)[:batch_size]
+            )
+            if not ride_ids:
+                break
+
+            with transaction.atomic():
+                updated += rebuild_trip_times(ride_ids)
+
+            last_id = ride_ids[-1]
+            self.stdout.write(f"- {updated} rides updated")
+
+        if updated:
+            bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"Rebuild Complete: {updated} rides updated"))
@@ -1,18 +1,186 @@
+import multiprocessing
 import random
+import time
+from contextlib import contextmanager
 from datetime import timedelta
 from django.utils import timezone
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
 from faker import Faker
+from base.bulk import allocate_ids, copy_objects
+from base.cache import bump_data_version
 from base.models import Ride, RideEvent
+from utils.geo import grid_cell
 
 User = get_user_model()
 fake = Faker()
 
+# Share of rides whose trip lasts more than an hour (qualifying for the report)
+QUALIFYING_RATIO = 0.2
+
+EXTRA_EVENT_DESCRIPTIONS = [
+    'Driver assigned',
+    'Driver arrived',
+    'Rider contacted driver',
+    'Route updated',
+    'Payment authorized',
+    'Rating submitted',
+]
+
+# Rider/driver ids, set before forking so workers inherit them without pickling
+_user_ids = {}
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Let bulk inserts write created_at/updated_at as given instead of "now".
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def build_ride(rng, pickup_time):
+    """
+    A ride with its trip times; build_events writes the matching events.
+    """
+    lat, lng = rng.uniform(-90, 90), rng.uniform(-180, 180)
+    created_at = pickup_time - timedelta(minutes=rng.randint(1, 30))
+
+    if rng.random() < QUALIFYING_RATIO:
+        # Trip duration between 1.5 to 4 hours (QUALIFIES)
+        trip_duration_minutes = rng.randint(90, 240)
+    else:
+        # Trip duration less than 1 hour (does NOT qualify)
+        trip_duration_minutes = rng.randint(5, 58)
+
+    return Ride(
+        status=rng.choice(['completed', 'en-route']),
+        id_rider_id=rng.choice(_user_ids['rider']),
+        id_driver_id=rng.choice(_user_ids['driver']),
+        pickup_latitude=lat,
+        pickup_longitude=lng,
+        pickup_cell=grid_cell(lat, lng),
+        dropoff_latitude=rng.uniform(-90, 90),
+        dropoff_longitude=rng.uniform(-180, 180),
+        pickup_time=pickup_time,
+        picked_up_at=pickup_time,
+        dropped_off_at=pickup_time + timedelta(minutes=trip_duration_minutes),
+        duration_seconds=trip_duration_minutes * 60,
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+
+def build_events(rng, now, ride, events_per_ride):
+    """
+    Pickup and dropoff events for a ride plus random extra events.
+    Returns (events, qualifies).
+    """
+    qualifies = ride.duration_seconds > 3600
+
+    events = [
+        RideEvent(
+            id_ride_id=ride.id_ride,
+            description=RideEvent.PICKUP_DESCRIPTION,
+            kind=RideEvent.Kind.PICKUP,
+            created_at=ride.picked_up_at
+        ),
+        RideEvent(
+            id_ride_id=ride.id_ride,
+            description=RideEvent.DROPOFF_DESCRIPTION,
+            kind=RideEvent.Kind.DROPOFF,
+            created_at=ride.dropped_off_at
+        ),
+    ]
+    for _ in range(events_per_ride - 2):
+        # Random time in the past (up to 60 days)
+        events.append(RideEvent(
+            id_ride_id=ride.id_ride,
+            description=rng.choice(EXTRA_EVENT_DESCRIPTIONS),
+            created_at=now - timedelta(minutes=rng.randint(60, 86400))
+        ))
+    return events, qualifies
+
+
+def seed_rides(count, events_per_ride, batch_size, use_copy, progress=None):
+    """
+    Generates and inserts count rides with their events, batch by batch.
+    Returns (rides, events, qualifying) counts. Runs in worker processes too.
+    """
+    rng = random.Random()
+    now = timezone.now()
+    totals = [0, 0, 0]
+
+    with explicit_timestamps(Ride, RideEvent):
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            # Pickup time spread across last 60 days (1 hour to 60 days in minutes)
+            rides = [build_ride(rng, now - timedelta(minutes=rng.randint(60, 86400))) for _ in range(size)]
+
+            with transaction.atomic():
+                if use_copy:
+                    for ride, pk in zip(rides, allocate_ids(Ride, size)):
+                        ride.id_ride = pk
+                    copy_objects(Ride, rides, include_pk=True)
+                else:
+                    Ride.objects.bulk_create(rides, batch_size=batch_size)
+
+                events = []
+                for ride in rides:
+                    ride_events, qualifies = build_events(rng, now, ride, events_per_ride)
+                    events += ride_events
+                    totals[2] += qualifies
+
+                if use_copy:
+                    copy_objects(RideEvent, events, include_pk=False)
+                else:
+                    RideEvent.objects.bulk_create(events, batch_size=batch_size)
+
+            totals[0] += size
+            totals[1] += len(events)
+            if progress:
+                progress(totals[0])
+
+    return tuple(totals)
+
+
+def _seed_rides_worker(args):
+    return seed_rides(*args)
+
+
 class Command(BaseCommand):
     help = 'Seeds high-volume data for performance testing'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--riders', type=int, default=10, help='Number of riders to create')
+        parser.add_argument('--drivers', type=int, default=5, help='Number of drivers to create')
+        parser.add_argument('--rides', type=int, default=20, help='Number of rides to create')
+        parser.add_argument(
+            '--events-per-ride', type=int, default=5,
+            help='Events per ride, including the pickup and dropoff events (min 2)'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per batch')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes generating rides in parallel (PostgreSQL only)'
+        )
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create instead of COPY on PostgreSQL')
+
+    def handle(self, *args, **options):
         now = timezone.now()
         self.stdout.write(f"Starting performance seed at {now}")
 
@@ -49,97 +217,88 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.WARNING("Admin superuser already exists"))
 
+        batch_size = max(options['batch_size'], 1)
+        events_per_ride = max(options['events_per_ride'], 2)
+        ride_count = options['rides']
+        workers = max(options['workers'], 1)
+        use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING("SQLite allows a single writer, using 1 worker"))
+            workers = 1
 
         # 1. Create both Riders and Drivers
-        riders = [User.objects.create_user(
-            username=fake.unique.user_name(), email=fake.unique.email(),
-            role='rider', phone_number=fake.numerify('##########'),
-            first_name=fake.first_name(), last_name=fake.last_name()
-        ) for _ in range(10)]
-        
-        drivers = [User.objects.create_user(
-            username=fake.unique.user_name(), email=fake.unique.email(),
-            role='driver', phone_number=fake.numerify('##########'),
-            first_name=fake.first_name(), last_name=fake.last_name()
-        ) for _ in range(5)]
-
-        # 2. Create 20 Rides with pickup/dropoff events
-        rides = []
-        
-        # Only 3-5 rides will qualify (>1 hour)
-        qualifying_ride_indices = random.sample(range(20), k=random.randint(3, 5))
-        
-        for i in range(20):
-            # Determine pickup time - spread across last 60 days with varied times
-            total_minutes_ago = random.randint(60, 86400)  # 1 hour to 60 days in minutes
-            pickup_time = now - timedelta(minutes=total_minutes_ago)
-            
-            ride = Ride.objects.create(
-                status=random.choice(['completed', 'en-route']),
-                id_rider=random.choice(riders),
-                id_driver=random.choice(drivers),
-                pickup_latitude=float(fake.latitude()),
-                pickup_longitude=float(fake.longitude()),
-                dropoff_latitude=float(fake.latitude()),
-                dropoff_longitude=float(fake.longitude()),
-                pickup_time=pickup_time
-            )
-            rides.append(ride)
-            
-            # Create pickup event
-            pickup_event = RideEvent.objects.create(
-                id_ride=ride,
-                description='Status changed to pickup'
-            )
-            # Update the timestamp
-            RideEvent.objects.filter(id_ride_event=pickup_event.id_ride_event).update(
-                created_at=pickup_time
-            )
-            
-            # Create dropoff event
-            # Only qualifying rides get >1 hour duration
-            if i in qualifying_ride_indices:
-                # Trip duration between 1.5 to 4 hours (QUALIFIES)
-                trip_duration_minutes = random.randint(90, 240)  # 1.5-4 hours
-            else:
-                # Trip duration less than 1 hour (does NOT qualify)
-                trip_duration_minutes = random.randint(5, 58)  # 5-58 minutes
-            
-            dropoff_time = pickup_time + timedelta(minutes=trip_duration_minutes)
-            
-            dropoff_event = RideEvent.objects.create(
-                id_ride=ride,
-                description='Status changed to dropoff'
-            )
-            # Update the timestamp
-            RideEvent.objects.filter(id_ride_event=dropoff_event.id_ride_event).update(
-                created_at=dropoff_time
-            )
+        _user_ids['rider'] = self.create_users('rider', options['riders'], batch_size)
+        _user_ids['driver'] = self.create_users('driver', options['drivers'], batch_size)
+        if ride_count and not (_user_ids['rider'] and _user_ids['driver']):
+            self.stderr.write(self.style.ERROR("Rides need at least one rider and one driver"))
+            return
 
-        # 3. Create additional random events (60 more to reach ~100 total)
-        self.stdout.write("Generating additional events...")
-        
-        for i in range(60):
-            # Random time in the past (up to 60 days)
-            minutes_ago = random.randint(60, 86400)  # 1 hour to 60 days
-            event_time = now - timedelta(minutes=minutes_ago)
-            
-            event = RideEvent.objects.create(
-                id_ride=random.choice(rides),
-                description=f"Additional Event {i}: {fake.sentence()}"
-            )
-            # Update the timestamp
-            RideEvent.objects.filter(id_ride_event=event.id_ride_event).update(
-                created_at=event_time
+        # 2. Create Rides with pickup/dropoff events and additional events
+        self.stdout.write(f"Generating {ride_count} rides with {workers} worker(s)...")
+        started = time.monotonic()
+
+        if workers == 1:
+            totals = seed_rides(
+                ride_count, events_per_ride, batch_size, use_copy,
+                progress=lambda done: self.stdout.write(f"- {done}/{ride_count} rides")
             )
+        else:
+            # Workers open their own connections, never share the parent's. close_all()
+            # only returns pooled connections (DB_POOL), so the pools are closed too:
+            # a forked copy would share their sockets, without their worker threads
+            connections.close_all()
+            for conn in connections.all(initialized_only=True):
+                if getattr(conn, 'pool', None) is not None:
+                    conn.close_pool()
+            shares = [ride_count // workers + (i < ride_count % workers) for i in range(workers)]
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                results = pool.map(
+                    _seed_rides_worker,
+                    [(share, events_per_ride, batch_size, use_copy) for share in shares if share]
+                )
+            totals = tuple(map(sum, zip(*results))) if results else (0, 0, 0)
+
+        elapsed = time.monotonic() - started
+        rides_created, events_created, qualifying = totals
+
+        # 3. Bulk inserts bypass the report and cache signals
+        call_command('rebuild_reports', stdout=self.stdout)
+        bump_data_version()
 
-        total_events = 20 * 2 + 60  # pickup + dropoff for each ride + additional events
-        
         self.stdout.write(self.style.SUCCESS(
             f"Successfully seeded data!\n"
-            f"- {len(riders)} riders\n"
-            f"- {len(drivers)} drivers\n"
-            f"- {len(rides)} rides\n"
-            f"- {total_events} events\n"
-            f"- {len(qualifying_ride_indices)} rides with trips > 1 hour (qualifying results)"
-        ))
\ No newline at end of file
+            f"- {len(_user_ids['rider'])} riders\n"
+            f"- {len(_user_ids['driver'])} drivers\n"
+            f"- {rides_created} rides\n"
+            f"- {events_created} events\n"
+            f"- {qualifying} rides with trips > 1 hour (qualifying results)\n"
+            f"- {elapsed:.1f}s ({rides_created / max(elapsed, 1e-9):.0f} rides/sec)"
+        ))
+
+    def create_users(self, role, count, batch_size):
+        """
+        Bulk creates users of a role with unusable passwords. Returns their ids.
+        """
+        token = format(time.time_ns(), 'x')
+        password = make_password(None)
+        # A small pool of generated names is plenty and keeps Faker off the hot path
+        first_names = [fake.first_name() for _ in range(min(count, 500))]
+        last_names = [fake.last_name() for _ in range(min(count, 500))]
+
+        ids = []
+        for start in range(0, count, batch_size):
+            users = User.objects.bulk_create([
+                User(
+                    username=f"{role}_{token}_{i}",
+                    email=f"{role}.{token}.{i}@example.com",
+                    password=password,
+                    role=role,
+                    phone_number=fake.numerify('##########'),
+                    first_name=random.choice(first_names),
+                    last_name=random.choice(last_names),
+                )
+                for i in range(start, min(start + batch_size, count))
+            ])
+            ids += [user.pk for user in users]
+        return ids
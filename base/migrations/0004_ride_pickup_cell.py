@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_alter_user_phone_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ride',
+            name='pickup_cell',
+            field=models.IntegerField(blank=True, editable=False, help_text='Grid cell key of the pickup location', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['pickup_cell'], name='ride_pickup__13df77_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_ride_pickup_coordinates_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rideevent',
+            index=models.Index(fields=['id_ride', 'created_at'], name='base_rideev_id_ride_0cf541_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0006_rideevent_ride_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverMonthlyReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month the trips were picked up in')),
+                ('trips_count_over_1hr', models.PositiveIntegerField(default=0, help_text='Number of pickup/dropoff pairs more than an hour apart')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id_driver', models.ForeignKey(help_text='Driver the trips belong to', on_delete=django.db.models.deletion.CASCADE, related_name='monthly_reports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month', '-trips_count_over_1hr'],
+                'constraints': [models.UniqueConstraint(fields=('month', 'id_driver'), name='unique_driver_monthly_report')],
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+import warnings
+
+from django.db import DatabaseError, migrations
+
+# LOWER(email) indexes backing RideFilter.rider_email. text_pattern_ops serves both
+# exact and prefix (LIKE 'abc%') lookups whatever the collation; the trigram index
+# serves substring (LIKE '%abc%') lookups.
+POSTGRESQL_FORWARD = [
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS user_email_lower_idx ON base_user (LOWER(email) text_pattern_ops)',
+]
+POSTGRESQL_TRIGRAM_INDEX = (
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS user_email_lower_trgm_idx ON base_user USING gin (LOWER(email) gin_trgm_ops)'
+)
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX CONCURRENTLY IF EXISTS user_email_lower_trgm_idx',
+    'DROP INDEX CONCURRENTLY IF EXISTS user_email_lower_idx',
+]
+
+OTHER_FORWARD = ['CREATE INDEX IF NOT EXISTS user_email_lower_idx ON base_user (LOWER(email))']
+OTHER_BACKWARD = ['DROP INDEX IF EXISTS user_email_lower_idx']
+
+
+def has_trigram_extension(schema_editor):
+    """
+    Whether pg_trgm is installed, creating it if this role is allowed to.
+    Managed PostgreSQL roles often can't create extensions: the substring search
+    then goes unindexed rather than stopping the migration.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is not None:
+            return True
+    try:
+        # Outside a transaction (atomic = False), a failure leaves the connection usable
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError as exc:
+        warnings.warn(
+            f'pg_trgm is not installed and could not be created ({exc}). user_email_lower_trgm_idx '
+            f'was skipped, see "Database Extensions" in the README.'
+        )
+        return False
+    return True
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        postgresql = schema_editor.connection.vendor == 'postgresql'
+        for sql in statements[postgresql]:
+            schema_editor.execute(sql)
+    return operation
+
+
+def forward(apps, schema_editor):
+    run({True: POSTGRESQL_FORWARD, False: OTHER_FORWARD})(apps, schema_editor)
+    if schema_editor.connection.vendor == 'postgresql' and has_trigram_extension(schema_editor):
+        schema_editor.execute(POSTGRESQL_TRIGRAM_INDEX)
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY can't run in a transaction, and keeps the users table writable
+    atomic = False
+
+    dependencies = [
+        ('base', '0008_user_token_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            forward,
+            run({True: POSTGRESQL_BACKWARD, False: OTHER_BACKWARD}),
+        ),
+    ]
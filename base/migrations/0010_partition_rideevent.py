@@ -0,0 +1,101 @@
+"""
+Partitions base_rideevent by month on created_at, on PostgreSQL only.
+
+The table is rebuilt: the existing rows are copied into the new partitioned
+table in one statement, so on a large table run this in a maintenance window.
+PostgreSQL requires the partition key in the primary key, which becomes
+(id_ride_event, created_at) in the database. Django keeps using id_ride_event,
+which stays unique through its sequence. Other databases are left untouched.
+"""
+import re
+from datetime import date
+
+from django.db import migrations
+
+from base.partitions import (
+    TABLE,
+    add_months,
+    create_default_partition,
+    create_partition,
+    month_start,
+)
+
+OLD = f'{TABLE}_old'
+SEQUENCE = f'{TABLE}_id_ride_event_seq'
+MONTHS_AHEAD = 3
+
+
+def _definitions(cursor, table):
+    """
+    Index and foreign key definitions of a table, except its primary key.
+    """
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT LIKE %s",
+        [table, '%pkey']
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table]
+    )
+    return indexes, cursor.fetchall()
+
+
+def _rebuild(schema_editor, partitioned):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {OLD}')
+        indexes, foreign_keys = _definitions(cursor, OLD)
+
+        partition_by = ' PARTITION BY RANGE (created_at)' if partitioned else ''
+        cursor.execute(f'CREATE TABLE {TABLE} (LIKE {OLD} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_by}')
+        cursor.execute(f'CREATE SEQUENCE {SEQUENCE}_new OWNED BY {TABLE}.id_ride_event')
+        cursor.execute(f"SELECT setval('{SEQUENCE}_new', COALESCE(MAX(id_ride_event), 0) + 1, false) FROM {OLD}")
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id_ride_event SET DEFAULT nextval('{SEQUENCE}_new')")
+        primary_key = '(id_ride_event, created_at)' if partitioned else '(id_ride_event)'
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey_new PRIMARY KEY {primary_key}')
+
+        if partitioned:
+            cursor.execute(f'SELECT MIN(created_at) FROM {OLD}')
+            oldest = cursor.fetchone()[0]
+            month = month_start(oldest) if oldest else month_start(date.today())
+            last = add_months(month_start(date.today()), MONTHS_AHEAD)
+            create_default_partition(cursor)
+            while month <= last:
+                create_partition(cursor, month)
+                month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {OLD}')
+        cursor.execute(f'DROP TABLE {OLD}')
+
+        # Same names as before, so Django's migration state still matches
+        # Indexes of a partitioned table are listed as ON ONLY, which would leave
+        # the partitions unindexed
+        for definition in indexes:
+            cursor.execute(re.sub(rf' ON (ONLY )?(public\.)?{OLD} ', f' ON {TABLE} ', definition))
+        # Django's foreign keys are deferred: added before the copy, their pending
+        # checks would make PostgreSQL refuse the CREATE INDEX statements above
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+        cursor.execute(f'ALTER SEQUENCE {SEQUENCE}_new RENAME TO {SEQUENCE}')
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME CONSTRAINT {TABLE}_pkey_new TO {TABLE}_pkey')
+
+
+def partition(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        _rebuild(schema_editor, partitioned=True)
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        _rebuild(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0009_user_email_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:59
+
+from django.db import migrations, models, transaction
+from django.db.models import Case, Value, When
+
+# Frozen copy of RideEvent.Kind and its descriptions, as of this migration
+STATUS_DESCRIPTION_PREFIX = 'Status changed to '
+KINDS = {'en-route': 1, 'pickup': 2, 'dropoff': 3, 'completed': 4, 'cancelled': 5}
+BATCH_SIZE = 5000
+
+
+def classify_events(apps, schema_editor):
+    """
+    Classifies the existing events, which the new column defaults to OTHER, in
+    primary key batches of one short transaction each. Only status descriptions
+    are rewritten, everything else is already OTHER.
+    """
+    RideEvent = apps.get_model('base', 'RideEvent')
+    descriptions = {f'{STATUS_DESCRIPTION_PREFIX}{label}': kind for label, kind in KINDS.items()}
+    kind = Case(
+        *(When(description=description, then=Value(kind)) for description, kind in descriptions.items()),
+        default=Value(0),
+    )
+    events = RideEvent.objects.using(schema_editor.connection.alias).order_by('pk')
+
+    last_id = 0
+    while True:
+        # Bounds from the ids that exist, so gaps in the sequence cost nothing
+        bounds = list(events.filter(pk__gt=last_id).values_list('pk', flat=True)[BATCH_SIZE - 1:BATCH_SIZE])
+        batch = events.filter(pk__gt=last_id)
+        if bounds:
+            batch = batch.filter(pk__lte=bounds[0])
+        with transaction.atomic(using=schema_editor.connection.alias):
+            batch.filter(description__in=descriptions).update(kind=kind)
+        if not bounds:
+            break
+        last_id = bounds[0]
+
+
+class Migration(migrations.Migration):
+    # Each batch of classify_events commits on its own
+    atomic = False
+
+    dependencies = [
+        ('base', '0010_partition_rideevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rideevent',
+            name='kind',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'other'), (1, 'en-route'), (2, 'pickup'), (3, 'dropoff'), (4, 'completed'), (5, 'cancelled')], default=0, editable=False, help_text='Kind of event, e.g. pickup or dropoff'),
+        ),
+        migrations.RunPython(classify_events, migrations.RunPython.noop),
+        # Built after the backfill, so the updates don't maintain it row by row
+        migrations.AddIndex(
+            model_name='rideevent',
+            index=models.Index(fields=['kind', 'id_ride', 'created_at'], name='base_rideev_kind_d40d27_idx'),
+        ),
+    ]
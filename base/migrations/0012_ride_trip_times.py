@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0011_rideevent_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ride',
+            name='dropped_off_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Time of the last dropoff event', null=True),
+        ),
+        migrations.AddField(
+            model_name='ride',
+            name='duration_seconds',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Seconds from pickup to dropoff', null=True),
+        ),
+        migrations.AddField(
+            model_name='ride',
+            name='picked_up_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Time of the first pickup event', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['picked_up_at'], name='ride_picked__312c71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['duration_seconds'], name='ride_duratio_19ac54_idx'),
+        ),
+    ]
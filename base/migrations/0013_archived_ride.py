@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0012_ride_trip_times'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRide',
+            fields=[
+                ('id_ride', models.IntegerField(primary_key=True, serialize=False)),
+                ('id_rider', models.IntegerField(db_index=True, help_text='Id of the user who requested the ride')),
+                ('id_driver', models.IntegerField(blank=True, db_index=True, help_text='Id of the driver assigned to the ride', null=True)),
+                ('status', models.CharField(max_length=50)),
+                ('pickup_time', models.DateTimeField(db_index=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('document', models.BinaryField()),
+            ],
+            options={
+                'ordering': ['-pickup_time'],
+            },
+        ),
+    ]
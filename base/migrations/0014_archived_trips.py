@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0013_archived_ride'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTrips',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('id_driver', models.IntegerField(help_text='Id of the driver of the trips')),
+                ('month', models.DateField(help_text='First day of the month the trips were picked up in')),
+                ('trips_count_over_1hr', models.PositiveIntegerField(help_text='Number of pickup/dropoff pairs more than an hour apart')),
+                ('id_ride', models.ForeignKey(help_text='Archived ride the trips belong to', on_delete=django.db.models.deletion.CASCADE, related_name='trips', to='base.archivedride')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['id_driver', 'month'], name='archived_trips_driver_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:41
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0014_archived_trips'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(django.db.models.functions.comparison.Coalesce('duration_seconds', models.Value(2147483647, output_field=models.IntegerField())), models.F('id_ride'), name='ride_duration_asc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(django.db.models.functions.comparison.Coalesce('duration_seconds', models.Value(-1, output_field=models.IntegerField())), models.F('id_ride'), name='ride_duration_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0015_ride_duration_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedtrips',
+            name='id_ride',
+            field=models.ForeignKey(blank=True, help_text='Archived ride the trips belong to, empty for trips of expired events', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='trips', to='base.archivedride'),
+        ),
+    ]
@@ -1,6 +1,11 @@
-from django.db import models
+import json
+import zlib
+
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from utils.geo import grid_cell
 
 
 class User(AbstractUser):
@@ -40,6 +45,13 @@ class User(AbstractUser):
         help_text="User's phone number"
     )
 
+    # Embedded in access tokens, bumped to reject tokens issued before a role change
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Version of the role claims in issued tokens"
+    )
+
     class Meta:
         # Adding explicit indexes for the Meta class as well
         indexes = [
@@ -47,6 +59,47 @@ class User(AbstractUser):
             models.Index(fields=['role']),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._token_claims = instance._current_token_claims()
+        return instance
+
+    def _current_token_claims(self):
+        # None while role/is_active are deferred, nothing to compare against then
+        if 'role' not in self.__dict__ or 'is_active' not in self.__dict__:
+            return None
+        return self.role, self.is_active
+
+    def save(self, *args, **kwargs):
+        """
+        Bump token_version when the role or active flag changes.
+        Note: queryset update() bypasses this, bump token_version explicitly there.
+        """
+        loaded = getattr(self, '_token_claims', None)
+        if loaded is not None and loaded != self._current_token_claims():
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'token_version'}
+
+        super().save(*args, **kwargs)
+        self._token_claims = self._current_token_claims()
+
+# Largest PositiveIntegerField value, sorts rides without a duration after every trip
+NO_DURATION_LAST = 2 ** 31 - 1
+
+
+def duration_sort_key(descending):
+    """
+    Ride duration with NULL replaced by a bound past every duration in the
+    given direction, so rides without a finished trip sort last either way.
+    Indexed as is for each direction (Ride.Meta.indexes).
+    """
+    missing = -1 if descending else NO_DURATION_LAST
+    return Coalesce('duration_seconds', models.Value(missing, output_field=models.IntegerField()))
+
+
 class Ride(models.Model):
     """
     Ride model for the Wingz ride-sharing application.
@@ -108,10 +161,40 @@ class Ride(models.Model):
         help_text="Longitude coordinate of dropoff location"
     )
     
+    # Spatial grid cell of the pickup location (see utils.geo), kept in sync on save
+    pickup_cell = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Grid cell key of the pickup location"
+    )
+
     # Pickup time
     pickup_time = models.DateTimeField(
         help_text="Scheduled or actual pickup time"
     )
+
+    # Trip times from the pickup/dropoff events, kept in sync by base/trips.py
+    picked_up_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Time of the first pickup event"
+    )
+
+    dropped_off_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Time of the last dropoff event"
+    )
+
+    duration_seconds = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Seconds from pickup to dropoff"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -124,8 +207,28 @@ class Ride(models.Model):
             models.Index(fields=['pickup_time']),
             models.Index(fields=['id_rider']),
             models.Index(fields=['id_driver']),
+            models.Index(fields=['pickup_cell']),
+            models.Index(fields=['pickup_latitude', 'pickup_longitude']),
+            models.Index(fields=['picked_up_at']),
+            models.Index(fields=['duration_seconds']),
+            # ordering=duration and -duration, the cursor tie-break on id_ride included
+            models.Index(duration_sort_key(descending=False), models.F('id_ride'), name='ride_duration_asc_idx'),
+            models.Index(duration_sort_key(descending=True), models.F('id_ride'), name='ride_duration_desc_idx'),
         ]
 
+    def save(self, *args, **kwargs):
+        """
+        Keep pickup_cell in sync with the pickup coordinates.
+        Note: bulk_create/update bypass this, use backfill_ride_cells afterwards.
+        """
+        self.pickup_cell = grid_cell(self.pickup_latitude, self.pickup_longitude)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'pickup_latitude', 'pickup_longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'pickup_cell'}
+
+        super().save(*args, **kwargs)
+
 
 class RideEvent(models.Model):
     """
@@ -133,6 +236,23 @@ class RideEvent(models.Model):
     Examples: ride requested, driver assigned, driver arrived, 
     ride started, ride completed, etc.
     """
+
+    # Descriptions that mark the start and end of a trip
+    STATUS_DESCRIPTION_PREFIX = 'Status changed to '
+    PICKUP_DESCRIPTION = 'Status changed to pickup'
+    DROPOFF_DESCRIPTION = 'Status changed to dropoff'
+
+    class Kind(models.IntegerChoices):
+        """
+        Typed form of the description: "Status changed to <status>" events get
+        the kind of that ride status, anything else is OTHER.
+        """
+        OTHER = 0, 'other'
+        EN_ROUTE = 1, 'en-route'
+        PICKUP = 2, 'pickup'
+        DROPOFF = 3, 'dropoff'
+        COMPLETED = 4, 'completed'
+        CANCELLED = 5, 'cancelled'
     
     # Primary key
     id_ride_event = models.AutoField(primary_key=True)
@@ -150,9 +270,160 @@ class RideEvent(models.Model):
         max_length=255,
         help_text="Description of what happened in this event"
     )
+
+    # Kind of event, classified from the description on save
+    kind = models.PositiveSmallIntegerField(
+        choices=Kind.choices,
+        default=Kind.OTHER,
+        editable=False,
+        help_text="Kind of event, e.g. pickup or dropoff"
+    )
     
     # Timestamp of when the event occurred
     created_at = models.DateTimeField(
         auto_now_add=True,
         help_text="Timestamp of when the event occurred"
     )
+
+    class Meta:
+        indexes = [
+            # Serves the per-ride recent events prefetch as an index range scan
+            models.Index(fields=['id_ride', 'created_at']),
+            # Pickup/dropoff lookups, per ride and over time (reports, durations)
+            models.Index(fields=['kind', 'id_ride', 'created_at']),
+        ]
+
+    @classmethod
+    def classify(cls, description):
+        status = description.removeprefix(cls.STATUS_DESCRIPTION_PREFIX)
+        if status == description:
+            return cls.Kind.OTHER
+        return next((kind for kind in cls.Kind if kind.label == status), cls.Kind.OTHER)
+
+    @classmethod
+    def description_for(cls, kind):
+        return f'{cls.STATUS_DESCRIPTION_PREFIX}{kind.label}'
+
+    def save(self, *args, **kwargs):
+        """
+        Keep kind in sync with the description.
+        Note: bulk_create/update bypass this, set kind or run backfill_event_kinds.
+        """
+        self.kind = self.classify(self.description)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'description' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'kind'}
+
+        # The ride's trip times are updated by signals, in the same transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class DriverMonthlyReport(models.Model):
+    """
+    Rollup of trips longer than an hour per driver and month (month of the pickup event).
+    Maintained incrementally from RideEvent signals, see base/reports.py.
+    """
+
+    month = models.DateField(
+        help_text="First day of the month the trips were picked up in"
+    )
+
+    id_driver = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='monthly_reports',
+        help_text="Driver the trips belong to"
+    )
+
+    trips_count_over_1hr = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of pickup/dropoff pairs more than an hour apart"
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-month', '-trips_count_over_1hr']
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'id_driver'], name='unique_driver_monthly_report'),
+        ]
+
+
+class ArchivedRide(models.Model):
+    """
+    A completed or cancelled ride moved out of the ride/event tables by
+    archive_rides, together with all its events, as one compressed JSON
+    document. Append-only; see base/archive.py.
+    """
+
+    # Same id the ride had, so archived rides are looked up by their usual id
+    id_ride = models.IntegerField(primary_key=True)
+
+    # Plain ids, archived rides don't hold on to users
+    id_rider = models.IntegerField(
+        db_index=True,
+        help_text="Id of the user who requested the ride"
+    )
+
+    id_driver = models.IntegerField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Id of the driver assigned to the ride"
+    )
+
+    status = models.CharField(max_length=50)
+
+    pickup_time = models.DateTimeField(db_index=True)
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    # zlib-compressed JSON of the ride and its events
+    document = models.BinaryField()
+
+    class Meta:
+        ordering = ['-pickup_time']
+
+    @staticmethod
+    def compress(document):
+        return zlib.compress(json.dumps(document, separators=(',', ':')).encode(), 9)
+
+    def load(self):
+        return json.loads(zlib.decompress(bytes(self.document)))
+
+
+class ArchivedTrips(models.Model):
+    """
+    Trips over an hour whose events are gone, per month of their pickup, so
+    report rebuilds still count them (see base/reports.py). Saved per ride by
+    archive_rides, and per driver and month by event retention (no ride).
+    """
+
+    id_ride = models.ForeignKey(
+        ArchivedRide,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='trips',
+        help_text="Archived ride the trips belong to, empty for trips of expired events"
+    )
+
+    # Plain id, like ArchivedRide.id_driver
+    id_driver = models.IntegerField(
+        help_text="Id of the driver of the trips"
+    )
+
+    month = models.DateField(
+        help_text="First day of the month the trips were picked up in"
+    )
+
+    trips_count_over_1hr = models.PositiveIntegerField(
+        help_text="Number of pickup/dropoff pairs more than an hour apart"
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id_driver', 'month'], name='archived_trips_driver_month'),
+        ]
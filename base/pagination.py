@@ -1,15 +1,103 @@
+import binascii
+import hashlib
+import json
+import math
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage, Page
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import aget_data_version, get_data_version
+
+Cursor = namedtuple('Cursor', ['value', 'pk', 'reverse'])
+
+
+def keyset_q(field, descending, value, pk):
+    """
+    Q object matching rows strictly after (value, pk) in (field, pk) order.
+    """
+    op = 'lt' if descending else 'gt'
+    return Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'pk__{op}': pk})
+
+
+def is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_number(value):
+    # JSON also decodes NaN and Infinity
+    return (is_integer(value) or isinstance(value, float)) and math.isfinite(value)
+
+
+def estimate_count(queryset):
+    """
+    The PostgreSQL planner's row estimate for queryset (from table statistics,
+    as in pg_class.reltuples), or None on other databases.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_cache_key(queryset, data_version):
+    """
+    Cache key of the count of queryset, from the data version and its SQL and
+    parameters, so every combination of filters is counted separately.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}{params!r}'.encode(), usedforsecurity=False).hexdigest()
+    # Writes bump the data version, so counts cached before them are never read again
+    return f'count:{data_version}:{queryset.model._meta.label_lower}:{digest}'
+
+
+class ApproximatePage(Page):
+    """
+    Page of an approximate count: whether a next page exists comes from the
+    rows fetched, not from the count, so neighbours are never checked against it.
+    """
+    next_exists = False
+
+    def has_next(self):
+        return self.next_exists
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
 
 
 class BasePagination(PageNumberPagination):
     """
     Base pagination class that can be extended/customized.
-    
+
     Default settings:
     - page_size: 10 items per page
     - max_page_size: 100 items per page
     - Allow client to override page_size via query param
-    
+
+    Cursor mode:
+    - Sending the `cursor` query param (empty for the first page) switches to
+      keyset pagination on (first ordering field, pk). No COUNT(*) and no OFFSET,
+      so every page costs the same. The response has next/previous/results only.
+
     Usage:
         class MyPagination(BasePagination):
             page_size = 20
@@ -18,7 +106,271 @@ class BasePagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
     page_query_param = 'page'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    cursor_mode = False
+
+    # How page mode counts rows, overridable per view with a `count_strategy` attribute:
+    # - 'exact': COUNT(*) on every request
+    # - 'estimate': the planner's row estimate (PostgreSQL), exact below COUNT_ESTIMATE_THRESHOLD
+    # - 'cached': exact counts cached per query (filters included) for COUNT_CACHE_TIMEOUT seconds
+    count_strategy = 'exact'
+    count_approximate = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            page_size = self.get_page_size(request)
+            if not page_size:
+                return None
+            paginator = self.django_paginator_class(queryset, page_size)
+            paginator.count = self.get_count(self.get_count_queryset(queryset, request), view)
+            page = self.get_page(paginator, request)
+            if self.count_approximate:
+                return self.finish_approximate_page(list(page.object_list), page_size)
+            return list(page)
+
+        queryset, page_size = self.get_cursor_queryset(queryset, request)
+        return self.finish_cursor_page(list(queryset[:page_size + 1]), page_size)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async variant of paginate_queryset, for async views.
+        """
+        if self.cursor_query_param in request.query_params:
+            queryset, page_size = self.get_cursor_queryset(queryset, request)
+            rows = queryset[:page_size + 1]
+            return self.finish_cursor_page([obj async for obj in rows.aiterator(chunk_size=page_size + 1)], page_size)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Fill the cached count asynchronously so the paginator never runs it sync
+        paginator.count = await self.aget_count(self.get_count_queryset(queryset, request), view)
+        page = self.get_page(paginator, request)
+
+        # chunk_size lets prefetch_related run once for the whole page
+        rows = [obj async for obj in page.object_list.aiterator(chunk_size=page_size + 1)]
+        if self.count_approximate:
+            return self.finish_approximate_page(rows, page_size)
+        page.object_list = rows
+        return list(page)
+
+    def get_page(self, paginator, request):
+        """
+        Sets self.page for the requested page number. With an approximate count
+        the number is only checked to be positive, and the page's object_list
+        is left unevaluated with one extra row, see finish_approximate_page.
+        """
+        self.request = request
+        page_number = self.get_page_number(request, paginator)
+        if self.count_approximate:
+            try:
+                number = int(page_number)
+                if number < 1:
+                    raise ValueError
+            except (TypeError, ValueError):
+                raise NotFound(self.invalid_page_message.format(
+                    page_number=page_number, message='That page number is not a positive integer'
+                ))
+            offset = (number - 1) * paginator.per_page
+            self.page = ApproximatePage(paginator.object_list[offset:offset + paginator.per_page + 1], number, paginator)
+        else:
+            try:
+                self.page = paginator.page(page_number)
+            except InvalidPage as exc:
+                raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def finish_approximate_page(self, rows, page_size):
+        """
+        Trims the page_size + 1 rows fetched for an ApproximatePage, which has a
+        next page when the extra row exists.
+        """
+        if not rows and self.page.number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.page.number, message='That page contains no results'
+            ))
+        self.page.next_exists = len(rows) > page_size
+        self.page.object_list = rows[:page_size]
+        return list(self.page)
+
+    def get_count_queryset(self, queryset, request):
+        """
+        The queryset page mode counts. A filter that narrows queryset to the rows
+        one page needs sets request.count_queryset to every matching row instead.
+        """
+        return getattr(request, 'count_queryset', queryset)
+
+    def get_count_strategy(self, view):
+        strategy = getattr(view, 'count_strategy', self.count_strategy)
+        if strategy not in ('exact', 'estimate', 'cached'):
+            raise ImproperlyConfigured(f'Unknown count_strategy {strategy!r}')
+        return strategy
+
+    def get_count(self, queryset, view=None):
+        """
+        Row count of queryset by the view's count strategy. Sets count_approximate
+        when the count may differ from the current number of rows.
+        """
+        strategy = self.get_count_strategy(view)
+        self.count_approximate = False
+        if strategy == 'estimate':
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate >= getattr(settings, 'COUNT_ESTIMATE_THRESHOLD', 10_000):
+                self.count_approximate = True
+                return estimate
+        elif strategy == 'cached':
+            key = count_cache_key(queryset, get_data_version())
+            count = cache.get(key)
+            if count is not None:
+                self.count_approximate = True
+                return count
+            count = queryset.count()
+            cache.set(key, count, getattr(settings, 'COUNT_CACHE_TIMEOUT', 60))
+            return count
+        return queryset.count()
+
+    async def aget_count(self, queryset, view=None):
+        """
+        Async variant of get_count. Only the planner estimate, which needs a raw
+        cursor, still runs in a thread.
+        """
+        strategy = self.get_count_strategy(view)
+        if strategy == 'estimate':
+            return await sync_to_async(self.get_count)(queryset, view)
+        self.count_approximate = False
+        if strategy == 'cached':
+            key = count_cache_key(queryset, await aget_data_version())
+            count = await cache.aget(key)
+            if count is not None:
+                self.count_approximate = True
+                return count
+            count = await queryset.acount()
+            await cache.aset(key, count, getattr(settings, 'COUNT_CACHE_TIMEOUT', 60))
+            return count
+        return await queryset.acount()
+
+    def get_cursor_queryset(self, queryset, request):
+        """
+        Applies the cursor position and keyset ordering. Returns (queryset, page_size).
+        """
+        self.cursor_mode = True
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.page_query_param)
+        page_size = self.get_page_size(request)
+
+        self.cursor = self.decode_cursor(request)
+        self.keyset_field, descending = self.get_keyset_ordering(queryset)
+        self.reverse = self.cursor is not None and self.cursor.reverse
+
+        # Walking backwards flips the direction, then the page is flipped back
+        direction = descending != self.reverse
+        if self.cursor is not None:
+            value = self.cursor_value_to_python(queryset.model, self.cursor.value)
+            queryset = queryset.filter(keyset_q(self.keyset_field, direction, value, self.cursor.pk))
+        prefix = '-' if direction else ''
+        return queryset.order_by(f'{prefix}{self.keyset_field}', f'{prefix}pk'), page_size
+
+    def finish_cursor_page(self, results, page_size):
+        """
+        Trims the page_size + 1 rows fetched after get_cursor_queryset and builds the links.
+        """
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if self.reverse:
+            results.reverse()
+
+        has_next, has_previous = (True, has_more) if self.reverse else (has_more, self.cursor is not None)
+        self.next_link = self.encode_cursor(results[-1], False) if has_next and results else None
+        self.previous_link = self.encode_cursor(results[0], True) if has_previous and results else None
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return Response({
+                'count': self.page.paginator.count,
+                'count_approximate': self.count_approximate,
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'results': data,
+            })
+        return Response({
+            'next': self.next_link,
+            'previous': self.previous_link,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_approximate'] = {
+            'type': 'boolean',
+            'description': 'True when count is a planner estimate or a cached count',
+        }
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Keyset pagination cursor. Send it empty to start cursor mode.',
+            'schema': {'type': 'string'},
+        })
+        return parameters
+
+    def get_keyset_ordering(self, queryset):
+        """
+        Returns (field, descending) for the first ordering term, defaulting to pk.
+        """
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        first = ordering[0] if ordering else 'pk'
+        if not isinstance(first, str):
+            first = 'pk'
+        return first.lstrip('-'), first.startswith('-')
+
+    def cursor_value_to_python(self, model, value):
+        try:
+            field = model._meta.get_field(self.keyset_field)
+        except FieldDoesNotExist:
+            # Annotations such as distance are numbers and round-trip through JSON as is
+            if not is_number(value):
+                raise NotFound(self.invalid_cursor_message)
+            return value
+        try:
+            return field.to_python(value)
+        except (DjangoValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode('ascii')))
+            cursor = Cursor(payload['v'], payload['pk'], bool(payload.get('r')))
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        # Decodable is not enough: the value and pk end up in SQL comparisons
+        if not (isinstance(cursor.value, str) or is_number(cursor.value)) or not is_integer(cursor.pk):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
 
+    def encode_cursor(self, obj, reverse):
+        value = getattr(obj, self.keyset_field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        payload = {'v': value, 'pk': obj.pk}
+        if reverse:
+            payload['r'] = 1
+        token = urlsafe_b64encode(json.dumps(payload).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
 
 
 class RidePagination(BasePagination):
@@ -0,0 +1,123 @@
+"""
+Monthly range partitions of RideEvent on created_at (PostgreSQL).
+
+Migration 0010 turns base_rideevent into a table partitioned by month, with
+one base_rideevent_pYYYYMM partition per month plus a default partition
+catching rows no monthly partition covers. manage_event_partitions
+pre-creates upcoming months and detaches or drops expired ones.
+
+On other databases base_rideevent stays a plain table and retention falls
+back to batched deletes.
+"""
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection
+
+TABLE = 'base_rideevent'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def partition_month(name):
+    """
+    Month of a partition from its name, or None for the default partition.
+    """
+    suffix = name.rsplit('_p', 1)[-1]
+    if not name.startswith(f'{TABLE}_p') or not suffix.isdigit() or len(suffix) != 6:
+        return None
+    return date(int(suffix[:4]), int(suffix[4:]), 1)
+
+
+def month_bound(month):
+    # Bounds in UTC so they don't depend on the session time zone
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def is_partitioned(using=connection):
+    if using.vendor != 'postgresql':
+        return False
+    with using.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def list_partitions(cursor):
+    """
+    Returns the names of the partitions currently attached to base_rideevent.
+    """
+    cursor.execute(
+        """
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = %s::regclass
+        ORDER BY child.relname
+        """,
+        [TABLE]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def create_partition(cursor, month):
+    """
+    Creates the partition of a month. Rows of that month already sitting in the
+    default partition are moved into it first, as PostgreSQL requires.
+    """
+    name = partition_name(month)
+    start, end = month_bound(month).isoformat(), month_bound(add_months(month, 1)).isoformat()
+    cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """,
+        [start, end]
+    )
+    cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')")
+    return name
+
+
+def create_default_partition(cursor):
+    cursor.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT')
+
+
+def can_detach_concurrently(existing, using=connection):
+    """
+    DETACH PARTITION ... CONCURRENTLY needs PostgreSQL 14+, no default
+    partition and no surrounding transaction.
+    """
+    return using.pg_version >= 140000 and DEFAULT_PARTITION not in existing and not using.in_atomic_block
+
+
+def set_lock_timeout(cursor, seconds):
+    """
+    Bounds how long the current transaction waits for a lock, so a DDL statement
+    queued behind a long query gives up instead of blocking everyone behind it.
+    """
+    cursor.execute("SELECT set_config('lock_timeout', %s, true)", [f'{int(seconds * 1000)}ms'])
+
+
+def detach_partition(cursor, name, concurrently=False):
+    """
+    Without CONCURRENTLY the detach holds an ACCESS EXCLUSIVE lock on
+    base_rideevent until the transaction commits.
+    """
+    suffix = ' CONCURRENTLY' if concurrently else ''
+    cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}{suffix}')
+
+
+def drop_partition(cursor, name):
+    cursor.execute(f'DROP TABLE {name}')
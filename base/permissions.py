@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework.permissions import BasePermission
 
 class IsAdmin(BasePermission):
@@ -15,3 +16,21 @@ class IsAdmin(BasePermission):
         
         # Check if user has 'admin' role
         return request.user.role == 'admin'
+
+    async def ahas_permission(self, request, view):
+        """
+        Async variant for async views. The role is already on the loaded user,
+        so no database access is needed.
+        """
+        return self.has_permission(request, view)
+
+
+class HasMetricsToken(BasePermission):
+    """
+    Allow requests sending `Authorization: Bearer <METRICS_TOKEN>`, or every
+    request when METRICS_TOKEN is not set, as /metrics does.
+    """
+
+    def has_permission(self, request, view):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        return not token or request.headers.get('Authorization') == f'Bearer {token}'
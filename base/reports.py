@@ -0,0 +1,277 @@
+"""
+Driver "trips over 1 hour" monthly report.
+
+The rollup in DriverMonthlyReport replaces the reporting SQL from the README.
+New pickup/dropoff events add their pairs to it incrementally; updates and
+deletes recompute the affected (driver, month) rows exactly. rebuild_reports
+recomputes everything, e.g. after bulk inserts or driver reassignments, which
+don't go through model signals.
+
+Archived rides no longer have events: archive_rides saves their trips in
+ArchivedTrips, and every recomputation adds them back (see trip_counts).
+Event retention does the same for the trips whose events expire, see
+save_expiring_trips.
+"""
+import threading
+from datetime import date, datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateTimeField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
+from django.utils import timezone
+
+from .models import ArchivedTrips, DriverMonthlyReport, RideEvent, User
+
+TRIP_THRESHOLD = timedelta(hours=1)
+TRIP_KINDS = (RideEvent.Kind.PICKUP, RideEvent.Kind.DROPOFF)
+
+_state = threading.local()
+
+
+class suspended:
+    """
+    Context manager that pauses incremental maintenance, for bulk jobs that
+    rebuild or wipe the rollup themselves.
+    """
+
+    def __enter__(self):
+        _state.suspended = True
+
+    def __exit__(self, *exc):
+        _state.suspended = False
+
+
+def is_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+def month_of(moment):
+    moment = timezone.localtime(moment)
+    return date(moment.year, moment.month, 1)
+
+
+def is_trip_event(event):
+    return event.kind in TRIP_KINDS
+
+
+def trip_pickups(*conditions, dropoff_filters=None, **filters):
+    """
+    Pickup events annotated with `trips`, the number of dropoffs of the same ride
+    more than TRIP_THRESHOLD later, optionally only the dropoffs matching dropoff_filters.
+    """
+    dropoffs = RideEvent.objects.filter(
+        id_ride=OuterRef('id_ride'),
+        kind=RideEvent.Kind.DROPOFF,
+        created_at__gt=ExpressionWrapper(OuterRef('created_at') + TRIP_THRESHOLD, output_field=DateTimeField()),
+        **(dropoff_filters or {})
+    ).order_by().values('id_ride').annotate(n=Count('pk')).values('n')
+
+    return RideEvent.objects.filter(
+        *conditions,
+        kind=RideEvent.Kind.PICKUP,
+        id_ride__id_driver__isnull=False,
+        **filters
+    ).annotate(trips=Coalesce(Subquery(dropoffs), 0))
+
+
+def monthly_trip_counts(*conditions, dropoff_filters=None, **filters):
+    """
+    Returns {(driver_id, month): trips} over pickups matching filters.
+    """
+    rows = (
+        trip_pickups(*conditions, dropoff_filters=dropoff_filters, **filters)
+        .annotate(month=TruncMonth('created_at'))
+        .values('month', 'id_ride__id_driver')
+        .annotate(total=Sum('trips'))
+        .order_by()
+    )
+    return {
+        (row['id_ride__id_driver'], month_of(row['month'])): row['total']
+        for row in rows if row['total']
+    }
+
+
+def ride_trip_counts(ride_ids):
+    """
+    Returns [(ride_id, driver_id, month, trips)] of the given rides, saved as
+    ArchivedTrips when they are archived.
+    """
+    rows = (
+        trip_pickups(id_ride__in=ride_ids)
+        .annotate(month=TruncMonth('created_at'))
+        .values('month', 'id_ride', 'id_ride__id_driver')
+        .annotate(total=Sum('trips'))
+        .order_by()
+    )
+    return [
+        (row['id_ride'], row['id_ride__id_driver'], month_of(row['month']), row['total'])
+        for row in rows if row['total']
+    ]
+
+
+def expiring_trip_counts(**filters):
+    """
+    Returns {(driver_id, month): trips} of the trips that lose an event when the
+    events matching filters are deleted. A trip is counted with the first of its
+    events to go: pickups among those events, plus pickups staying behind whose
+    dropoffs are among them.
+    """
+    counts = monthly_trip_counts(**filters)
+    expiring_dropoffs = RideEvent.objects.filter(kind=RideEvent.Kind.DROPOFF, **filters)
+    left_behind = monthly_trip_counts(
+        ~Q(**filters), dropoff_filters=filters, id_ride__in=expiring_dropoffs.values('id_ride')
+    )
+    for key, trips in left_behind.items():
+        counts[key] = counts.get(key, 0) + trips
+    return counts
+
+
+def save_expiring_trips(**filters):
+    """
+    Saves expiring_trip_counts(**filters) as ArchivedTrips without a ride, so the
+    report keeps counting those trips once their events are gone. Call it in the
+    transaction that deletes the events. Returns the rows saved.
+    """
+    return ArchivedTrips.objects.bulk_create([
+        ArchivedTrips(id_driver=driver_id, month=month, trips_count_over_1hr=trips)
+        for (driver_id, month), trips in expiring_trip_counts(**filters).items()
+    ])
+
+
+def trip_counts(driver_ids=None, first=None, last=None):
+    """
+    Returns {(driver_id, month): trips} of the hot events plus the archived
+    trips, optionally for some drivers and the months first to last.
+    """
+    filters = {}
+    # Archived trips of deleted drivers have no report row to go to
+    archived = ArchivedTrips.objects.filter(id_driver__in=User.objects.values('pk'))
+    if driver_ids is not None:
+        filters['id_ride__id_driver__in'] = driver_ids
+        archived = archived.filter(id_driver__in=driver_ids)
+    if first is not None:
+        filters['created_at__gte'], filters['created_at__lt'] = month_range(first, last)
+        archived = archived.filter(month__gte=first, month__lte=last)
+
+    counts = monthly_trip_counts(**filters)
+    for row in archived.values('id_driver', 'month').annotate(total=Sum('trips_count_over_1hr')).order_by():
+        key = (row['id_driver'], row['month'])
+        counts[key] = counts.get(key, 0) + row['total']
+    return counts
+
+
+def add_trips(driver_id, month, count):
+    report, _ = DriverMonthlyReport.objects.get_or_create(month=month, id_driver_id=driver_id)
+    DriverMonthlyReport.objects.filter(pk=report.pk).update(
+        trips_count_over_1hr=Greatest(F('trips_count_over_1hr') + count, 0)
+    )
+
+
+def record_new_event(event):
+    """
+    Adds the pickup/dropoff pairs formed by a newly created event.
+    """
+    others = list(
+        RideEvent.objects.filter(id_ride_id=event.id_ride_id, kind__in=TRIP_KINDS)
+        .exclude(pk=event.pk)
+        .values_list('kind', 'created_at', 'id_ride__id_driver')
+    )
+    if not others or others[0][2] is None:
+        return
+    driver_id = others[0][2]
+
+    added = {}
+    for kind, created_at, _ in others:
+        if event.kind == RideEvent.Kind.DROPOFF:
+            if kind == RideEvent.Kind.PICKUP and event.created_at - created_at > TRIP_THRESHOLD:
+                month = month_of(created_at)
+                added[month] = added.get(month, 0) + 1
+        elif kind == RideEvent.Kind.DROPOFF and created_at - event.created_at > TRIP_THRESHOLD:
+            month = month_of(event.created_at)
+            added[month] = added.get(month, 0) + 1
+
+    with transaction.atomic():
+        for month, count in added.items():
+            add_trips(driver_id, month, count)
+
+
+def next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def month_range(first, last):
+    """
+    Returns the (start, end) datetimes spanning the months first to last.
+    """
+    return tuple(timezone.make_aware(datetime(d.year, d.month, d.day)) for d in (first, next_month(last)))
+
+
+def ride_report_keys(ride_id):
+    """
+    Returns the (driver_id, month) rollup rows a ride currently contributes to.
+    """
+    return rides_report_keys([ride_id])
+
+
+def rides_report_keys(ride_ids):
+    return {
+        (driver_id, month_of(created_at))
+        for created_at, driver_id in RideEvent.objects.filter(
+            id_ride_id__in=ride_ids,
+            kind=RideEvent.Kind.PICKUP,
+            id_ride__id_driver__isnull=False,
+        ).values_list('created_at', 'id_ride__id_driver')
+    }
+
+
+def refresh_rides_reports(ride_ids):
+    """
+    Recomputes the rollup rows of the drivers of the given rides, over the months
+    their pickups span, in a fixed number of queries. For bulk event writes.
+    """
+    keys = rides_report_keys(ride_ids)
+    if not keys:
+        return
+    drivers = {driver_id for driver_id, _ in keys}
+    months = [month for _, month in keys]
+    counts = trip_counts(drivers, min(months), max(months))
+
+    with transaction.atomic():
+        DriverMonthlyReport.objects.filter(
+            id_driver__in=drivers, month__gte=min(months), month__lte=max(months)
+        ).delete()
+        DriverMonthlyReport.objects.bulk_create(
+            DriverMonthlyReport(month=month, id_driver_id=driver_id, trips_count_over_1hr=count)
+            for (driver_id, month), count in counts.items()
+        )
+
+
+def refresh_reports(keys):
+    """
+    Recomputes the given (driver_id, month) rollup rows exactly. Idempotent.
+    """
+    with transaction.atomic():
+        for driver_id, month in keys:
+            count = trip_counts([driver_id], month, month).get((driver_id, month), 0)
+
+            if count:
+                DriverMonthlyReport.objects.update_or_create(
+                    month=month, id_driver_id=driver_id, defaults={'trips_count_over_1hr': count}
+                )
+            else:
+                DriverMonthlyReport.objects.filter(month=month, id_driver_id=driver_id).delete()
+
+
+def rebuild_reports():
+    """
+    Recomputes the whole rollup from RideEvent and ArchivedTrips. Returns the
+    number of rows written.
+    """
+    counts = trip_counts()
+    with transaction.atomic():
+        DriverMonthlyReport.objects.all().delete()
+        DriverMonthlyReport.objects.bulk_create(
+            DriverMonthlyReport(month=month, id_driver_id=driver_id, trips_count_over_1hr=count)
+            for (driver_id, month), count in counts.items()
+        )
+    return len(counts)
@@ -1,6 +1,7 @@
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from django.contrib.auth import get_user_model
-from .models import Ride, RideEvent
+from .models import DriverMonthlyReport, Ride, RideEvent
 from django.utils import timezone
 from datetime import timedelta
 
@@ -25,19 +26,31 @@ class UserSerializer(serializers.ModelSerializer):
 
 class RideEventSerializer(serializers.ModelSerializer):
     """
-    Serializer for the RideEvent model.
+    Serializer for the RideEvent model. kind is derived from the description.
     """
+    kind = serializers.CharField(source='get_kind_display', read_only=True)
+
     class Meta:
         model = RideEvent
         fields = [
             'id_ride_event',
             'id_ride',
             'description',
+            'kind',
             'created_at',
         ]
         read_only_fields = ['id_ride_event', 'created_at']
 
 
+class RideEventBulkSerializer(serializers.Serializer):
+    """
+    One item of a bulk RideEvent upload. Validates fields only; the rides of
+    a whole batch are checked with one query by the view.
+    """
+    id_ride = serializers.IntegerField(min_value=1)
+    description = serializers.CharField(max_length=255)
+
+
 class RideSerializer(serializers.ModelSerializer):
     """
     Serializer for the Ride model.
@@ -59,6 +72,9 @@ class RideSerializer(serializers.ModelSerializer):
             'dropoff_latitude',
             'dropoff_longitude',
             'pickup_time',
+            'picked_up_at',
+            'dropped_off_at',
+            'duration_seconds',
             'created_at',
             'updated_at',
             'todays_ride_events',
@@ -72,4 +88,119 @@ class RideSerializer(serializers.ModelSerializer):
         events = obj.events.filter(
             created_at__gte=timezone.now() - timedelta(days=1)
         )
-        return RideEventSerializer(events, many=True).data
\ No newline at end of file
+        return RideEventSerializer(events, many=True).data
+
+
+def _iso_datetime(value, tz):
+    """
+    Same output as DRF's DateTimeField with the default ISO 8601 format.
+    """
+    if value is None:
+        return None
+    if timezone.is_aware(value):
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+class RideReadSerializer(serializers.BaseSerializer):
+    """
+    Read-only fast path for RideSerializer.
+
+    Builds the exact same JSON shape straight from the (select_related/prefetched)
+    model instances, without DRF's per-field to_representation dispatch.
+    Only valid with the default ISO 8601 DATETIME_FORMAT, see `is_supported`.
+    """
+
+    @staticmethod
+    def is_supported():
+        return api_settings.DATETIME_FORMAT == ISO_8601
+
+    @staticmethod
+    def user_representation(user):
+        if user is None:
+            return None
+        return {
+            'id': user.id,
+            'email': user.email,
+            'role': user.role,
+            'phone_number': user.phone_number,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+        }
+
+    @staticmethod
+    def event_representation(event, tz):
+        return {
+            'id_ride_event': event.id_ride_event,
+            'id_ride': event.id_ride_id,
+            'description': event.description,
+            'kind': event.get_kind_display(),
+            'created_at': _iso_datetime(event.created_at, tz),
+        }
+
+    def to_representation(self, obj):
+        tz = timezone.get_current_timezone()
+
+        if hasattr(obj, 'todays_events'):
+            events = obj.todays_events
+        else:
+            # Fallback for when serializer is used outside ViewSet context
+            events = obj.events.filter(created_at__gte=timezone.now() - timedelta(days=1))
+
+        return {
+            'id_ride': obj.id_ride,
+            'driver': self.user_representation(obj.id_driver),
+            'rider': self.user_representation(obj.id_rider),
+            'status': obj.status,
+            'pickup_latitude': _float(obj.pickup_latitude),
+            'pickup_longitude': _float(obj.pickup_longitude),
+            'dropoff_latitude': _float(obj.dropoff_latitude),
+            'dropoff_longitude': _float(obj.dropoff_longitude),
+            'pickup_time': _iso_datetime(obj.pickup_time, tz),
+            'picked_up_at': _iso_datetime(obj.picked_up_at, tz),
+            'dropped_off_at': _iso_datetime(obj.dropped_off_at, tz),
+            'duration_seconds': obj.duration_seconds,
+            'created_at': _iso_datetime(obj.created_at, tz),
+            'updated_at': _iso_datetime(obj.updated_at, tz),
+            'todays_ride_events': [self.event_representation(event, tz) for event in events],
+        }
+
+
+class DriverMonthlyReportSerializer(serializers.ModelSerializer):
+    """
+    Read Serializer for the driver "trips over 1 hour" monthly rollup.
+    """
+    month = serializers.DateField(format='%Y-%m', read_only=True)
+    driver = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DriverMonthlyReport
+        fields = [
+            'month',
+            'id_driver',
+            'driver',
+            'trips_count_over_1hr',
+        ]
+        read_only_fields = fields
+
+    def get_driver(self, obj):
+        # Same format as the reporting SQL: first name and last name initial
+        return f"{obj.id_driver.first_name} {obj.id_driver.last_name[:1]}"
+
+
+class ArchivedRideSerializer(serializers.BaseSerializer):
+    """
+    Read Serializer for archived rides: the archived document plus archived_at.
+    """
+
+    def to_representation(self, obj):
+        document = obj.load()
+        document['archived_at'] = serializers.DateTimeField().to_representation(obj.archived_at)
+        return document
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.db import transaction
+from django.dispatch import receiver
+
+from . import reports, trips
+from .tokens import publish_token_state
+from .cache import bump_data_version
+from .models import Ride, RideEvent
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=RideEvent)
+def capture_report_keys_before_update(sender, instance, raw=False, **kwargs):
+    # Updates can move an event between rides, months or kinds, remember where it was
+    if raw or instance.pk is None or reports.is_suspended():
+        return
+    instance._previous_ride_id = RideEvent.objects.filter(pk=instance.pk).values_list('id_ride', flat=True).first()
+    instance._report_keys = reports.ride_report_keys(instance._previous_ride_id)
+
+
+@receiver(post_save, sender=RideEvent)
+def update_trip_times_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or reports.is_suspended():
+        return
+    if created and not reports.is_trip_event(instance):
+        return
+    trips.refresh_trip_times(instance.id_ride_id)
+    previous_ride_id = getattr(instance, '_previous_ride_id', None)
+    if previous_ride_id != instance.id_ride_id:
+        trips.refresh_trip_times(previous_ride_id)
+
+
+@receiver(post_delete, sender=RideEvent)
+def update_trip_times_on_delete(sender, instance, **kwargs):
+    if reports.is_suspended() or not reports.is_trip_event(instance):
+        return
+    trips.refresh_trip_times(instance.id_ride_id)
+
+
+@receiver(post_save, sender=RideEvent)
+def update_reports_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or reports.is_suspended():
+        return
+    if created:
+        if reports.is_trip_event(instance):
+            reports.record_new_event(instance)
+        return
+    keys = getattr(instance, '_report_keys', set()) | reports.ride_report_keys(instance.id_ride_id)
+    reports.refresh_reports(keys)
+
+
+@receiver(pre_delete, sender=RideEvent)
+def capture_report_keys_before_delete(sender, instance, **kwargs):
+    if reports.is_suspended() or not reports.is_trip_event(instance):
+        return
+    instance._report_keys = reports.ride_report_keys(instance.id_ride_id)
+
+
+@receiver(post_delete, sender=RideEvent)
+def update_reports_on_delete(sender, instance, **kwargs):
+    if reports.is_suspended() or not hasattr(instance, '_report_keys'):
+        return
+    reports.refresh_reports(instance._report_keys)
+
+
+@receiver(post_save, sender=Ride)
+@receiver(post_save, sender=RideEvent)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Ride)
+@receiver(post_delete, sender=RideEvent)
+@receiver(post_delete, sender=User)
+def invalidate_response_cache(sender, **kwargs):
+    bump_data_version()
+
+
+@receiver(post_save, sender=User)
+def publish_user_token_state(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    state = (instance.pk, instance.token_version, instance.is_active)
+    transaction.on_commit(lambda: publish_token_state(*state))
@@ -1,11 +1,18 @@
 # base/tests/conftest.py
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # The locmem cache outlives the per-test database rollback
+    cache.clear()
+
+
 @pytest.fixture
 def admin_user(db):
     return User.objects.create_user(
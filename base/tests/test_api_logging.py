@@ -0,0 +1,76 @@
+# base/tests/test_api_logging.py
+import pytest
+from django.test import override_settings
+
+from app.middleware import api_logging
+from app.middleware.api_logging import LogWriter, sample_rate
+
+
+class FakeLogger:
+    def __init__(self):
+        self.records = []
+
+    def info(self, event, **kwargs):
+        self.records.append((event, kwargs))
+
+    warning = info
+
+    def exception(self, event, **kwargs):
+        raise AssertionError(event)
+
+
+@pytest.fixture
+def log_writer(monkeypatch):
+    writer = LogWriter(logger=FakeLogger())
+    monkeypatch.setattr(api_logging, 'writer', writer)
+    return writer
+
+
+@pytest.mark.django_db
+class TestAPILoggingMiddleware:
+    """Test the queued, sampled API request logging."""
+
+    def test_request_logged_off_thread(self, authenticated_client, log_writer):
+        authenticated_client.post('/api/base/ride-events/', {'description': 'x'}, format='json')
+        assert log_writer.flush(timeout=5)
+
+        event, record = log_writer.logger.records[-1]
+        assert event == 'api_request'
+        assert record['method'] == 'POST'
+        assert record['status_code'] == 400
+        # Bodies are logged as sent, not parsed again
+        assert record['request_body'] == '{"description":"x"}'
+        assert '"id_ride"' in record['response_body']
+
+    @override_settings(API_LOG_SAMPLE_RATES={'/api/base/users/': 0.0})
+    def test_sampled_out_path(self, authenticated_client, log_writer):
+        authenticated_client.get('/api/base/users/')
+        authenticated_client.get('/api/base/ride-events/')
+        assert log_writer.flush(timeout=5)
+
+        assert [record['path'] for _, record in log_writer.logger.records] == ['/api/base/ride-events/']
+
+
+class TestLogWriter:
+
+    def test_record_overrides_bound_context(self):
+        writer = LogWriter(logger=FakeLogger())
+        writer.write({'path': '/', 'user_id': 1, 'context': {'request_id': 'abc', 'user_id': 1}})
+        assert writer.logger.records[-1] == ('api_request', {'request_id': 'abc', 'user_id': 1, 'path': '/'})
+
+    def test_full_queue_drops_and_counts(self):
+        writer = LogWriter(maxsize=1, logger=FakeLogger())
+        # Not started yet, so nothing drains the queue
+        writer._ensure_started = lambda: None
+        for _ in range(3):
+            writer.submit({'path': '/', 'context': {}})
+        assert writer.dropped == 2
+
+        writer.write(writer.queue.get_nowait())
+        assert writer.logger.records[-1] == ('api_logging_dropped', {'dropped': 2, 'total_dropped': 2})
+
+    @override_settings(API_LOG_SAMPLE_RATE=0.5, API_LOG_SAMPLE_RATES={'/api/': 0.2, '/api/base/': 0.1})
+    def test_longest_prefix_rate(self):
+        assert sample_rate('/api/base/rides/') == 0.1
+        assert sample_rate('/api/schema/') == 0.2
+        assert sample_rate('/admin/') == 0.5
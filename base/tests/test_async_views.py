@@ -0,0 +1,87 @@
+# base/tests/test_async_views.py
+import json
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from base.models import RideEvent
+from base.tests import test_ride_viewset
+
+
+def _client(user):
+    return Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+
+@pytest.mark.django_db
+class TestAsyncRideView:
+    """Test the async ride endpoints against the sync ones."""
+
+    @pytest.fixture
+    def rides(self, rider):
+        points = test_ride_viewset.TestDistanceOrdering.POINTS
+        rides = [test_ride_viewset._make_ride(rider, lat, lng) for lat, lng in points]
+        RideEvent.objects.create(id_ride=rides[0], description='Driver assigned')
+        return rides
+
+    @pytest.mark.parametrize('query', [
+        'page_size=3',
+        'page=2&page_size=3',
+        'page_size=3&cursor=',
+        'lat=37.7749&lng=-122.4194&ordering=distance&page_size=3',
+        'lat=37.7749&lng=-122.4194&radius_km=50',
+    ])
+    def test_list_matches_sync(self, admin_user, authenticated_client, rides, query):
+        response = _client(admin_user).get(f'/api/base/async/rides/?{query}')
+        # Both count the same query, the sync request must not hit the cached count
+        cache.clear()
+        expected = authenticated_client.get(f'/api/base/rides/?{query}')
+
+        assert response.status_code == status.HTTP_200_OK
+        # Same pages; links point back at the async endpoint
+        body = response.content.decode().replace('/api/base/async/rides/', '/api/base/rides/')
+        assert json.loads(body) == expected.json()
+
+    def test_cached_count_stays_async(self, admin_user, rides):
+        cache.clear()
+        # The count strategy of the ride list is 'cached': miss, then hit
+        with mock.patch('base.pagination.sync_to_async', side_effect=AssertionError('count left the event loop')):
+            first = _client(admin_user).get('/api/base/async/rides/?page_size=3')
+            second = _client(admin_user).get('/api/base/async/rides/?page_size=3')
+
+        assert first.json()['count'] == second.json()['count'] == len(rides)
+        assert first.json()['count_approximate'] is False
+        assert second.json()['count_approximate'] is True
+
+    def test_retrieve_matches_sync(self, admin_user, authenticated_client, rides):
+        response = _client(admin_user).get(f'/api/base/async/rides/{rides[0].id_ride}/')
+        expected = authenticated_client.get(f'/api/base/rides/{rides[0].id_ride}/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == expected.json()
+        assert len(response.json()['todays_ride_events']) == 1
+
+    def test_retrieve_missing_ride(self, admin_user):
+        response = _client(admin_user).get('/api/base/async/rides/999999/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_requires_authentication(self, rides):
+        response = Client().get('/api/base/async/rides/')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert 'WWW-Authenticate' in response.headers
+
+    def test_requires_admin(self, rider):
+        response = _client(rider).get('/api/base/async/rides/')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_invalid_token(self):
+        response = Client(HTTP_AUTHORIZATION='Bearer nope').get('/api/base/async/rides/')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_validation_error(self, admin_user, rides):
+        response = _client(admin_user).get('/api/base/async/rides/?lat=10')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'coordinates' in response.json()
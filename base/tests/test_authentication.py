@@ -0,0 +1,98 @@
+# base/tests/test_authentication.py
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from base.authentication import ClaimsUser, user_cache
+from base.tokens import token_state_key
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    user_cache.clear()
+
+
+def _login(username):
+    response = APIClient().post(
+        '/api/auth/login/', {'username': username, 'password': 'testpass123'}, format='json'
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response.data
+
+
+def _client(access):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class TestStatelessJWT:
+    """Test role claims in tokens and claim-based authentication."""
+
+    def test_login_embeds_role_and_version(self, admin_user):
+        token = AccessToken(_login('admin1')['access'])
+        assert token['role'] == 'admin'
+        assert token['ver'] == 0
+
+    def test_no_user_query(self, admin_user):
+        client = _client(_login('admin1')['access'])
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get('/api/base/cache-stats')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not [q for q in captured.captured_queries if 'base_user' in q['sql']]
+
+    def test_role_change_rejects_stale_token(self, admin_user):
+        tokens = _login('admin1')
+        admin_user.role = 'rider'
+        admin_user.save()
+        assert admin_user.token_version == 1
+
+        response = _client(tokens['access']).get('/api/base/cache-stats')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        # Refreshing issues an access token with the new role
+        refreshed = APIClient().post('/api/auth/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        assert AccessToken(refreshed.data['access'])['role'] == 'rider'
+        response = _client(refreshed.data['access']).get('/api/base/cache-stats')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_stale_token_rejected_after_cache_miss(self, admin_user):
+        access = _login('admin1')['access']
+        admin_user.role = 'rider'
+        admin_user.save()
+        # Evicted, restarted or per-worker cache: the state is read from the database
+        cache.clear()
+
+        response = _client(access).get('/api/base/cache-stats')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert cache.get(token_state_key(admin_user.pk)) == (1, True)
+
+    def test_deactivated_user_rejected(self, admin_user):
+        access = _login('admin1')['access']
+        admin_user.is_active = False
+        admin_user.save()
+        cache.clear()
+
+        response = _client(access).get('/api/base/cache-stats')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_unrelated_changes_keep_version(self, admin_user):
+        admin_user.first_name = 'Changed'
+        admin_user.save()
+        assert admin_user.token_version == 0
+
+    def test_full_user_loaded_once(self, admin_user):
+        user = ClaimsUser(AccessToken(_login('admin1')['access']))
+        assert user.role == 'admin'
+        with CaptureQueriesContext(connection) as captured:
+            assert user.email == 'admin@example.com'
+            assert ClaimsUser(user.token).email == 'admin@example.com'
+
+        # Silk (dev settings) adds EXPLAIN queries of its own
+        assert len([q for q in captured.captured_queries if not q['sql'].startswith('EXPLAIN')]) == 1
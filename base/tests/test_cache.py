@@ -0,0 +1,133 @@
+import pytest
+from datetime import timedelta
+from types import SimpleNamespace
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from base import cache as base_cache, pagination
+from base.models import Ride, RideEvent
+from base.pagination import BasePagination
+from base.tests import test_ride_viewset
+
+
+@pytest.fixture
+def ride(rider, driver):
+    return Ride.objects.create(
+        id_rider=rider, id_driver=driver, status='en-route',
+        pickup_latitude=37.7749, pickup_longitude=-122.4194,
+        dropoff_latitude=37.7849, dropoff_longitude=-122.4094,
+        pickup_time=timezone.now() + timedelta(hours=1)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+    """Test the versioned list response cache."""
+
+    def test_hit_after_miss_and_normalized_params(self, authenticated_client, ride):
+        first = authenticated_client.get('/api/base/rides/?status=en-route&page_size=5')
+        second = authenticated_client.get('/api/base/rides/?page_size=5&status=en-route')
+
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT'
+        assert second.content == first.content
+
+    def test_writes_invalidate(self, authenticated_client, ride):
+        authenticated_client.get('/api/base/ride-events/')
+        RideEvent.objects.create(id_ride=ride, description="Driver assigned")
+
+        response = authenticated_client.get('/api/base/ride-events/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['count'] == 1
+
+        ride.id_rider.first_name = 'Renamed'
+        ride.id_rider.save()
+        response = authenticated_client.get('/api/base/rides/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'][0]['rider']['first_name'] == 'Renamed'
+
+    def test_stats_counters(self, authenticated_client, ride):
+        for _ in range(3):
+            authenticated_client.get('/api/base/rides/')
+
+        stats = authenticated_client.get('/api/base/cache-stats').data
+        assert stats['views']['RideViewSet'] == {'hits': 2, 'misses': 1}
+
+    def test_stats_admin_only(self, rider):
+        client = APIClient()
+        client.force_authenticate(user=rider)
+        assert client.get('/api/base/cache-stats').status_code == 403
+
+
+@pytest.mark.django_db
+class TestCountStrategy:
+    """Test the paginated count strategies."""
+
+    def paginate(self, strategy, queryset, query=''):
+        paginator = BasePagination()
+        request = Request(APIRequestFactory().get(f'/api/base/rides/?{query}'))
+        page = paginator.paginate_queryset(queryset, request, SimpleNamespace(count_strategy=strategy))
+        return paginator.get_paginated_response(page).data
+
+    def test_exact(self, ride):
+        data = self.paginate('exact', Ride.objects.order_by('pk'))
+        assert data['count'] == 1
+        assert data['count_approximate'] is False
+
+    def test_cached_count_is_flagged_approximate(self, ride, rider, driver):
+        cache.clear()
+        assert self.paginate('cached', Ride.objects.order_by('pk'))['count_approximate'] is False
+        data = self.paginate('cached', Ride.objects.order_by('pk'))
+        assert (data['count'], data['count_approximate']) == (1, True)
+        # Other filters are counted separately
+        assert self.paginate('cached', Ride.objects.filter(status='pickup'))['count'] == 0
+
+    def test_writes_invalidate_cached_counts(self, ride, rider):
+        cache.clear()
+        self.paginate('cached', Ride.objects.order_by('pk'))
+        test_ride_viewset._make_ride(rider, 40.0, -74.0)
+        # What bump_data_version runs once the write commits
+        base_cache._bump()
+
+        data = self.paginate('cached', Ride.objects.order_by('pk'))
+        assert (data['count'], data['count_approximate']) == (2, False)
+
+    def test_approximate_count_does_not_drive_pages(self, ride, rider, monkeypatch, settings):
+        for lat in (40.0, 41.0):
+            test_ride_viewset._make_ride(rider, lat, -74.0)
+        settings.COUNT_ESTIMATE_THRESHOLD = 1
+
+        # Overestimate: no next link past the last row, and no empty pages
+        monkeypatch.setattr(pagination, 'estimate_count', lambda queryset: 100)
+        data = self.paginate('estimate', Ride.objects.order_by('pk'), 'page=3&page_size=1')
+        assert (data['count'], len(data['results']), data['next']) == (100, 1, None)
+        assert data['previous'].endswith('page=2&page_size=1')
+        with pytest.raises(NotFound):
+            self.paginate('estimate', Ride.objects.order_by('pk'), 'page=4&page_size=1')
+
+        # Underestimate: real pages past the estimate are served and linked
+        monkeypatch.setattr(pagination, 'estimate_count', lambda queryset: 1)
+        data = self.paginate('estimate', Ride.objects.order_by('pk'), 'page=2&page_size=1')
+        assert (data['count'], len(data['results'])) == (1, 1)
+        assert data['next'].endswith('page=3&page_size=1')
+
+    def test_estimate(self, ride, monkeypatch, settings):
+        # Without an estimate (not PostgreSQL) rows are counted exactly
+        data = self.paginate('estimate', Ride.objects.order_by('pk'))
+        assert (data['count'], data['count_approximate']) == (1, False)
+
+        monkeypatch.setattr(pagination, 'estimate_count', lambda queryset: 12_000)
+        settings.COUNT_ESTIMATE_THRESHOLD = 10_000
+        data = self.paginate('estimate', Ride.objects.order_by('pk'))
+        assert (data['count'], data['count_approximate']) == (12_000, True)
+
+        settings.COUNT_ESTIMATE_THRESHOLD = 20_000
+        data = self.paginate('estimate', Ride.objects.order_by('pk'))
+        assert (data['count'], data['count_approximate']) == (1, False)
+
+    def test_unknown_strategy(self, ride):
+        with pytest.raises(ImproperlyConfigured):
+            self.paginate('guess', Ride.objects.order_by('pk'))
@@ -0,0 +1,265 @@
+import json
+import pytest
+from io import StringIO
+from types import SimpleNamespace
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from base import partitions
+from base.cache import cache_stats
+from base.models import ArchivedRide, ArchivedTrips, DriverMonthlyReport, Ride, RideEvent
+from base.tests.test_reports import create_event, report_rows
+from base.tests.test_ride_viewset import _make_ride
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestSeedData:
+    """Test bulk seeding."""
+
+    def test_bulk_seed_counts_and_timestamps(self):
+        out = StringIO()
+        call_command(
+            'seed_data', riders=4, drivers=3, rides=25, events_per_ride=3, batch_size=7, stdout=out
+        )
+
+        assert Ride.objects.count() == 25
+        assert RideEvent.objects.count() == 75
+        assert not Ride.objects.filter(pickup_cell__isnull=True).exists()
+
+        # Timestamps are written at insert time, not left at "now"
+        recent = timezone.now() - timedelta(minutes=30)
+        assert not RideEvent.objects.filter(created_at__gte=recent).exists()
+        for ride in Ride.objects.all()[:5]:
+            pickup = ride.events.get(description=RideEvent.PICKUP_DESCRIPTION)
+            assert pickup.created_at == ride.pickup_time
+            assert ride.created_at < ride.pickup_time
+
+        qualifying = int(out.getvalue().split(' rides with trips > 1 hour')[0].rsplit('- ', 1)[1])
+        assert sum(DriverMonthlyReport.objects.values_list('trips_count_over_1hr', flat=True)) == qualifying
+
+
+@pytest.mark.django_db
+class TestBenchmark:
+    """Test the benchmark command output and baseline comparison."""
+
+    def test_writes_results_and_compares_baseline(self, tmp_path, admin_user):
+        call_command('seed_data', rides=15, stdout=StringIO())
+        first, second = tmp_path / 'first.json', tmp_path / 'second.json'
+
+        call_command('benchmark', iterations=2, warmup=1, output=str(first), stdout=StringIO())
+        # Requests are timed without the response cache
+        assert not any(stats['hits'] for stats in cache_stats()['views'].values())
+        report = json.loads(first.read_text())
+        scenarios = {row['scenario'] for row in report['results']}
+        assert {'ride_list', 'ride_distance', 'ride_deep_cursor', 'ride_events_list', 'user_list'} <= scenarios
+        for row in report['results']:
+            assert row['status_code'] == 200
+            assert row['scale'] == 15
+            assert set(row['latency_ms']) >= {'p50', 'p95', 'p99'}
+
+        out = StringIO()
+        call_command(
+            'benchmark', iterations=2, warmup=0, output=str(second), baseline=str(first),
+            max_regression=1000, stdout=out
+        )
+        assert 'No regressions against baseline' in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestManageEventPartitions:
+    """Test event retention without partitions (SQLite) and partition naming."""
+
+    def test_deletes_expired_events_in_batches(self, rider):
+        sample_ride = _make_ride(rider, 40.0, -74.0)
+        now = timezone.now()
+        old = RideEvent.objects.create(id_ride=sample_ride, description='Old')
+        recent = RideEvent.objects.create(id_ride=sample_ride, description='Recent')
+        RideEvent.objects.filter(pk=old.pk).update(created_at=now - timedelta(days=200))
+        RideEvent.objects.filter(pk=recent.pk).update(created_at=now)
+
+        out = StringIO()
+        call_command('manage_event_partitions', retention_months=3, dry_run=True, stdout=out)
+        assert 'Dry run: 1 events would be deleted' in out.getvalue()
+        assert RideEvent.objects.filter(pk=old.pk).exists()
+
+        out = StringIO()
+        call_command('manage_event_partitions', retention_months=3, batch_size=1, stdout=out)
+        assert 'Retention Complete: 1 events deleted' in out.getvalue()
+        assert list(RideEvent.objects.values_list('pk', flat=True)) == [recent.pk]
+
+    def test_rebuilt_reports_keep_expired_trips(self, rider, driver):
+        cutoff = partitions.month_bound(partitions.add_months(partitions.month_start(timezone.now()), -2))
+        old = _make_ride(rider, 40.0, -74.0, id_driver=driver)
+        # Dropoff first, so a one-event batch deletes it before its pickup
+        create_event(old, RideEvent.DROPOFF_DESCRIPTION, cutoff - timedelta(days=40, hours=-2))
+        create_event(old, RideEvent.PICKUP_DESCRIPTION, cutoff - timedelta(days=40))
+        # Picked up before the cutoff, dropped off after it
+        straddling = _make_ride(rider, 40.0, -74.0, id_driver=driver)
+        create_event(straddling, RideEvent.PICKUP_DESCRIPTION, cutoff - timedelta(minutes=30))
+        create_event(straddling, RideEvent.DROPOFF_DESCRIPTION, cutoff + timedelta(minutes=45))
+        hot = _make_ride(rider, 40.0, -74.0, id_driver=driver)
+        create_event(hot, RideEvent.PICKUP_DESCRIPTION, cutoff + timedelta(days=3))
+        create_event(hot, RideEvent.DROPOFF_DESCRIPTION, cutoff + timedelta(days=3, hours=2))
+        expected = report_rows()
+        assert sum(count for _, _, count in expected) == 3
+
+        call_command('manage_event_partitions', retention_months=3, batch_size=1, stdout=StringIO())
+        assert RideEvent.objects.filter(created_at__lt=cutoff).count() == 0
+        assert sum(ArchivedTrips.objects.values_list('trips_count_over_1hr', flat=True)) == 2
+
+        call_command('rebuild_reports', stdout=StringIO())
+        assert report_rows() == expected
+
+        # Nothing is left to expire, so a second run saves nothing more
+        call_command('manage_event_partitions', retention_months=3, stdout=StringIO())
+        call_command('rebuild_reports', stdout=StringIO())
+        assert report_rows() == expected
+
+    def test_keeps_everything_without_retention(self, rider):
+        sample_ride = _make_ride(rider, 40.0, -74.0)
+        RideEvent.objects.create(id_ride=sample_ride, description='Kept')
+        call_command('manage_event_partitions', retention_months=0, stdout=StringIO())
+        assert RideEvent.objects.count() == 1
+
+    def test_partition_months(self):
+        assert partitions.add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+        assert partitions.add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+        assert partitions.partition_name(date(2026, 2, 1)) == 'base_rideevent_p202602'
+        assert partitions.partition_month('base_rideevent_p202602') == date(2026, 2, 1)
+        assert partitions.partition_month(partitions.DEFAULT_PARTITION) is None
+
+    def test_detaches_concurrently_only_when_postgresql_allows(self):
+        existing = ['base_rideevent_p202601']
+        pg16 = SimpleNamespace(pg_version=160002, in_atomic_block=False)
+        assert partitions.can_detach_concurrently(existing, using=pg16)
+        assert not partitions.can_detach_concurrently(existing + [partitions.DEFAULT_PARTITION], using=pg16)
+        assert not partitions.can_detach_concurrently(existing, using=SimpleNamespace(pg_version=130010, in_atomic_block=False))
+        assert not partitions.can_detach_concurrently(existing, using=SimpleNamespace(pg_version=160002, in_atomic_block=True))
+
+
+@pytest.mark.django_db
+class TestBackfillEventKinds:
+    """Test classifying events written without a kind."""
+
+    def test_classifies_bulk_created_events(self, rider, driver):
+        ride = _make_ride(rider, 40.0, -74.0, id_driver=driver)
+        picked_up = timezone.now() - timedelta(hours=3)
+        RideEvent.objects.bulk_create([
+            RideEvent(id_ride=ride, description=RideEvent.PICKUP_DESCRIPTION),
+            RideEvent(id_ride=ride, description=RideEvent.DROPOFF_DESCRIPTION),
+            RideEvent(id_ride=ride, description='Driver assigned'),
+        ])
+        RideEvent.objects.filter(description=RideEvent.PICKUP_DESCRIPTION).update(created_at=picked_up)
+        assert set(RideEvent.objects.values_list('kind', flat=True)) == {RideEvent.Kind.OTHER}
+
+        out = StringIO()
+        call_command('backfill_event_kinds', batch_size=2, stdout=out)
+
+        assert 'Backfill Complete: 3 events classified' in out.getvalue()
+        assert dict(RideEvent.objects.values_list('description', 'kind')) == {
+            RideEvent.PICKUP_DESCRIPTION: RideEvent.Kind.PICKUP,
+            RideEvent.DROPOFF_DESCRIPTION: RideEvent.Kind.DROPOFF,
+            'Driver assigned': RideEvent.Kind.OTHER,
+        }
+        # Trip times and the report are rebuilt from the new kinds
+        ride.refresh_from_db()
+        assert ride.picked_up_at == picked_up
+        assert ride.duration_seconds is not None and ride.duration_seconds >= 3 * 3600 - 1
+        assert [count for _, _, count in report_rows()] == [1]
+
+
+@pytest.mark.django_db
+class TestClearData:
+    """Test batched and truncating data wipes."""
+
+    @pytest.mark.parametrize('options', [{'batch_size': 2}, {'truncate': True}])
+    def test_wipes_data_and_keeps_admins(self, options, admin_user, rider, driver):
+        call_command('seed_data', riders=2, drivers=2, rides=5, events_per_ride=3, stdout=StringIO())
+        superuser = User.objects.create_superuser('root', 'root@example.com', 'testpass123', role='rider')
+
+        out = StringIO()
+        call_command('clear_data', stdout=out, **options)
+
+        assert not Ride.objects.exists()
+        assert not RideEvent.objects.exists()
+        assert not DriverMonthlyReport.objects.exists()
+        assert set(User.objects.values_list('pk', flat=True)) >= {admin_user.pk, superuser.pk}
+        assert not User.objects.filter(pk__in=[rider.pk, driver.pk]).exists()
+        assert '15 RideEvents deleted' in out.getvalue()
+        assert 'rows/s' in out.getvalue()
+
+    def test_batches_skip_gaps_in_ids(self, rider):
+        ride = _make_ride(rider, 40.0, -74.0)
+        RideEvent.objects.bulk_create([
+            RideEvent(id_ride_event=pk, id_ride=ride, description='Sparse') for pk in (1, 5_000, 90_000, 4_000_000, 4_000_001)
+        ])
+
+        out = StringIO()
+        call_command('clear_data', batch_size=2, stdout=out)
+
+        assert not RideEvent.objects.exists()
+        # One DELETE per 2 rows, however far apart their ids are
+        assert [line.split(' rows')[0] for line in out.getvalue().splitlines() if line.startswith('- RideEvent:')] == [
+            '- RideEvent: 2', '- RideEvent: 4', '- RideEvent: 5'
+        ]
+
+
+@pytest.mark.django_db
+class TestArchiveRides:
+    """Test moving old rides to the archive and reading them back."""
+
+    def _ride(self, rider, status, days_ago):
+        ride = _make_ride(rider, 40.0, -74.0, status=status)
+        Ride.objects.filter(pk=ride.pk).update(pickup_time=timezone.now() - timedelta(days=days_ago))
+        RideEvent.objects.create(id_ride=ride, description=RideEvent.PICKUP_DESCRIPTION)
+        RideEvent.objects.create(id_ride=ride, description='Driver waved')
+        return ride
+
+    def test_archives_in_resumable_batches(self, rider, authenticated_client):
+        old = [self._ride(rider, status, 400) for status in ('completed', 'cancelled')]
+        kept = [self._ride(rider, 'completed', 10), self._ride(rider, 'en-route', 400)]
+
+        call_command('archive_rides', older_than_days=365, batch_size=1, max_batches=1, stdout=StringIO())
+        assert list(ArchivedRide.objects.values_list('id_ride', flat=True)) == [old[0].pk]
+
+        out = StringIO()
+        call_command('archive_rides', older_than_days=365, batch_size=1, stdout=out)
+        assert 'Archive Complete: 1 rides, 2 events archived' in out.getvalue()
+
+        assert set(Ride.objects.values_list('pk', flat=True)) == {ride.pk for ride in kept}
+        assert not RideEvent.objects.filter(id_ride__in=[ride.pk for ride in old]).exists()
+
+        response = authenticated_client.get(f'/api/base/archived-rides/{old[0].pk}/')
+        assert response.status_code == 200
+        assert response.data['status'] == 'completed'
+        assert response.data['rider']['email'] == rider.email
+        assert [event['kind'] for event in response.data['events']] == ['pickup', 'other']
+
+        response = authenticated_client.get('/api/base/archived-rides/', {'ids': f'{old[1].pk},{kept[0].pk}'})
+        assert [ride['id_ride'] for ride in response.data['results']] == [old[1].pk]
+
+    def test_rebuilt_reports_keep_archived_trips(self, rider, driver):
+        picked_up = timezone.now() - timedelta(days=400)
+        ride = _make_ride(rider, 40.0, -74.0, status='completed', id_driver=driver)
+        Ride.objects.filter(pk=ride.pk).update(pickup_time=picked_up)
+        create_event(ride, RideEvent.PICKUP_DESCRIPTION, picked_up)
+        create_event(ride, RideEvent.DROPOFF_DESCRIPTION, picked_up + timedelta(hours=2))
+        # Another ride of the driver in the same month stays hot
+        hot = _make_ride(rider, 40.0, -74.0, id_driver=driver)
+        create_event(hot, RideEvent.PICKUP_DESCRIPTION, picked_up + timedelta(hours=1))
+        create_event(hot, RideEvent.DROPOFF_DESCRIPTION, picked_up + timedelta(hours=3))
+        expected = report_rows()
+        assert {count for _, _, count in expected} == {2}
+
+        call_command('archive_rides', older_than_days=365, stdout=StringIO())
+        assert list(ArchivedTrips.objects.values_list('id_ride', 'trips_count_over_1hr')) == [(ride.pk, 1)]
+
+        call_command('rebuild_reports', stdout=StringIO())
+        assert report_rows() == expected
+
+        # Refreshing a month after event deletes keeps them too
+        RideEvent.objects.filter(id_ride=hot).delete()
+        assert {count for _, _, count in report_rows()} == {1}
@@ -0,0 +1,61 @@
+# base/tests/test_health.py
+from unittest import mock
+
+import pytest
+from django.db import OperationalError
+from django.test import Client, override_settings
+from rest_framework import status
+
+from base import health
+
+
+class FakePool:
+    min_size = 2
+    max_size = 10
+
+    def get_stats(self):
+        # psycopg_pool leaves zero counters out
+        return {'pool_min': 2, 'pool_max': 10, 'pool_size': 4, 'pool_available': 3, 'requests_num': 7}
+
+
+@pytest.mark.django_db
+class TestHealthCheck:
+    """Test the plain and detailed health checks."""
+
+    def test_plain(self):
+        response = Client().get('/api/base/health-check')
+        assert response.json() == {'status': 'ok'}
+
+    def test_detailed_without_pool(self):
+        response = Client().get('/api/base/health-check/detailed')
+
+        assert response.status_code == status.HTTP_200_OK
+        database = response.json()['database']
+        assert database['status'] == 'ok'
+        assert database['latency_ms'] >= 0
+        assert database['pool'] is None
+
+    def test_pool_stats(self):
+        with mock.patch.object(type(health.connections['default']), 'pool', FakePool(), create=True):
+            stats = health.pool_stats()
+
+        assert stats['size'] == 4
+        assert stats['in_use'] == 1
+        assert stats['idle'] == 3
+        assert stats['checkouts'] == 7
+        assert stats['checkout_failures'] == 0
+
+    def test_database_down(self, monkeypatch):
+        def fail(alias='default'):
+            raise OperationalError('connection refused')
+        monkeypatch.setattr(health, 'database_latency', fail)
+
+        response = Client().get('/api/base/health-check/detailed')
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()['database']['error'] == 'connection refused'
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_detailed_requires_token(self):
+        assert Client().get('/api/base/health-check/detailed').status_code == status.HTTP_403_FORBIDDEN
+        response = Client(HTTP_AUTHORIZATION='Bearer secret').get('/api/base/health-check/detailed')
+        assert response.status_code == status.HTTP_200_OK
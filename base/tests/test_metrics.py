@@ -0,0 +1,47 @@
+# base/tests/test_metrics.py
+import pytest
+from django.test import Client, override_settings
+from prometheus_client import REGISTRY
+
+from base.tests import test_ride_viewset
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    """Test the Prometheus middleware and /metrics endpoint."""
+
+    def test_request_metrics_by_view(self, authenticated_client, rider):
+        ride = test_ride_viewset._make_ride(rider, 37.7749, -122.4194)
+        labels = {'view': 'RideViewSet.retrieve', 'method': 'GET', 'status': '200'}
+        before = _sample('api_request_duration_seconds_count', **labels)
+        queries_before = _sample('api_request_queries_sum', view='RideViewSet.retrieve')
+
+        authenticated_client.get(f'/api/base/rides/{ride.id_ride}/')
+
+        assert _sample('api_request_duration_seconds_count', **labels) == before + 1
+        assert _sample('api_request_queries_sum', view='RideViewSet.retrieve') > queries_before
+        assert _sample('api_response_size_bytes_count', view='RideViewSet.retrieve') >= 1
+        assert _sample('api_requests_in_flight') == 0
+
+    def test_unresolved_paths_share_a_label(self, authenticated_client):
+        before = _sample('api_request_duration_seconds_count', view='unresolved', method='GET', status='404')
+        authenticated_client.get('/nope/1/')
+        authenticated_client.get('/nope/2/')
+        assert _sample('api_request_duration_seconds_count', view='unresolved', method='GET', status='404') == before + 2
+
+    def test_metrics_endpoint(self, authenticated_client):
+        authenticated_client.get('/api/base/users/')
+        response = Client().get('/metrics')
+
+        assert response.status_code == 200
+        assert b'api_request_duration_seconds_bucket{le="0.005",method="GET",status="200",view="UserViewSet.list"}' \
+            in response.content
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        assert Client().get('/metrics').status_code == 403
+        assert Client(HTTP_AUTHORIZATION='Bearer secret').get('/metrics').status_code == 200
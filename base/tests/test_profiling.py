@@ -0,0 +1,67 @@
+# base/tests/test_profiling.py
+import pytest
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.middleware import profiling
+
+
+@pytest.fixture(autouse=True)
+def clear_samples():
+    profiling.samples.clear()
+
+
+@pytest.mark.django_db
+class TestSamplingProfiler:
+    """Test the sampling profiler middleware and its admin endpoint."""
+
+    @override_settings(PROFILING_SAMPLE_EVERY=0, PROFILING_SLOW_MS=0)
+    def test_disabled_by_default(self, authenticated_client):
+        authenticated_client.get('/api/base/users/')
+        assert len(profiling.samples) == 0
+
+    @override_settings(PROFILING_SAMPLE_EVERY=1, PROFILING_SLOW_MS=0)
+    def test_sampled_request_is_profiled(self, authenticated_client):
+        authenticated_client.get('/api/base/users/')
+
+        sample = profiling.dump_samples()[0]
+        assert sample['reason'] == 'sampled'
+        assert sample['path'] == '/api/base/users/'
+        assert sample['queries'] >= 1
+        assert sample['top_queries'][0]['sql']
+        assert 'function calls' in sample['profile']
+
+    @override_settings(PROFILING_SAMPLE_EVERY=0, PROFILING_SLOW_MS=0.001)
+    def test_slow_request_summary(self, authenticated_client):
+        authenticated_client.get('/api/base/users/')
+
+        sample = profiling.dump_samples()[0]
+        assert sample['reason'] == 'slow'
+        assert 'profile' not in sample and 'top_queries' not in sample
+
+    @override_settings(PROFILING_SAMPLE_EVERY=0, PROFILING_SLOW_MS=0)
+    def test_signed_header(self, authenticated_client):
+        authenticated_client.get('/api/base/users/', HTTP_X_PROFILE='forged')
+        assert len(profiling.samples) == 0
+
+        response = authenticated_client.get('/api/base/profiles')
+        header = response.data['header']
+        authenticated_client.get('/api/base/users/', headers={header['name']: header['value']})
+
+        assert [sample['reason'] for sample in profiling.samples] == ['header']
+
+    def test_ring_buffer_keeps_recent(self):
+        size = profiling.samples.maxlen
+        for i in range(size + 5):
+            profiling.samples.append({'duration_ms': i})
+
+        durations = [sample['duration_ms'] for sample in profiling.dump_samples(min_ms=size)]
+        assert len(profiling.samples) == size
+        assert durations == list(range(size + 4, size - 1, -1))
+
+    def test_endpoint_requires_admin(self, rider):
+        client = APIClient()
+        client.force_authenticate(user=rider)
+        response = client.get('/api/base/profiles')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
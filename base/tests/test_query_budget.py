@@ -0,0 +1,56 @@
+# base/tests/test_query_budget.py
+import pytest
+from django.test import override_settings
+from prometheus_client import REGISTRY
+
+from app.middleware.query_budget import QueryBudgetExceeded, query_shape
+from base.models import Ride, RideEvent
+from base.tests import test_ride_viewset
+from base.views import RideViewSet
+
+
+@pytest.fixture
+def rides(rider):
+    rides = [test_ride_viewset._make_ride(rider, 37.7749, -122.4194) for _ in range(6)]
+    for ride in rides:
+        RideEvent.objects.create(id_ride=ride, description='Driver assigned')
+    return rides
+
+
+@pytest.fixture
+def without_prefetch(monkeypatch):
+    # Serializers then fall back to one events query per ride
+    monkeypatch.setattr(RideViewSet, 'get_queryset', lambda self: Ride.objects.select_related('id_rider', 'id_driver'))
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+    """Test per-view query budgets and N+1 detection."""
+
+    def test_list_within_budget(self, authenticated_client, rides):
+        response = authenticated_client.get('/api/base/rides/?lat=37.7749&lng=-122.4194&ordering=distance')
+        assert response.status_code == 200
+
+    def test_n_plus_one_raises(self, authenticated_client, rides, without_prefetch):
+        with pytest.raises(QueryBudgetExceeded, match='RideViewSet.list'):
+            authenticated_client.get('/api/base/rides/')
+
+    def test_budget_exceeded_raises(self, authenticated_client, rides, monkeypatch):
+        monkeypatch.setattr(RideViewSet, 'query_budgets', {'list': 1})
+        with pytest.raises(QueryBudgetExceeded, match='budget is 1'):
+            authenticated_client.get('/api/base/rides/')
+
+    @override_settings(QUERY_BUDGET_MODE='count')
+    def test_count_mode_only_counts(self, authenticated_client, rides, without_prefetch):
+        labels = {'view': 'RideViewSet.list', 'kind': 'n_plus_one'}
+        before = REGISTRY.get_sample_value('api_query_budget_violations_total', labels) or 0
+
+        response = authenticated_client.get('/api/base/rides/')
+
+        assert response.status_code == 200
+        assert REGISTRY.get_sample_value('api_query_budget_violations_total', labels) == before + 1
+
+
+def test_query_shape_collapses_lists():
+    assert query_shape('SELECT 1 WHERE id IN (%s, %s, %s)') == query_shape('SELECT 1 WHERE id IN (%s)')
+    assert query_shape('INSERT INTO t VALUES (%s, %s), (%s, %s)') == query_shape('INSERT INTO t VALUES (%s, %s)')
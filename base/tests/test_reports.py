@@ -0,0 +1,253 @@
+import pytest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+from base import bulk
+from base.models import DriverMonthlyReport, Ride, RideEvent
+
+PICKUP = RideEvent.PICKUP_DESCRIPTION
+DROPOFF = RideEvent.DROPOFF_DESCRIPTION
+
+
+@pytest.fixture
+def ride(rider, driver):
+    return Ride.objects.create(
+        id_rider=rider,
+        id_driver=driver,
+        status='en-route',
+        pickup_latitude=37.7749,
+        pickup_longitude=-122.4194,
+        dropoff_latitude=37.7849,
+        dropoff_longitude=-122.4094,
+        pickup_time=datetime(2026, 3, 31, 23, 0, tzinfo=dt_timezone.utc)
+    )
+
+
+def create_event(ride, description, at):
+    # created_at is auto_now_add, so events "arrive" at the patched time
+    with mock.patch('django.utils.timezone.now', return_value=at):
+        return RideEvent.objects.create(id_ride=ride, description=description)
+
+
+def report_rows():
+    return set(DriverMonthlyReport.objects.values_list('month', 'id_driver', 'trips_count_over_1hr'))
+
+
+@pytest.mark.django_db
+class TestIncrementalReport:
+    """Test the driver trips over 1 hour rollup."""
+
+    START = datetime(2026, 3, 31, 23, 0, tzinfo=dt_timezone.utc)
+
+    def test_long_trip_counted_in_pickup_month(self, ride, driver):
+        create_event(ride, PICKUP, self.START)
+        create_event(ride, "Driver waved", self.START + timedelta(minutes=10))
+        create_event(ride, DROPOFF, self.START + timedelta(minutes=90))
+
+        assert report_rows() == {(self.START.date().replace(day=1), driver.id, 1)}
+
+    def test_short_trip_not_counted(self, ride):
+        create_event(ride, PICKUP, self.START)
+        create_event(ride, DROPOFF, self.START + timedelta(minutes=59))
+
+        assert report_rows() == set()
+
+    def test_out_of_order_events(self, ride, driver):
+        create_event(ride, DROPOFF, self.START + timedelta(hours=2))
+        create_event(ride, PICKUP, self.START)
+
+        assert report_rows() == {(self.START.date().replace(day=1), driver.id, 1)}
+
+    def test_delete_and_update_are_reflected(self, ride):
+        create_event(ride, PICKUP, self.START)
+        dropoff = create_event(ride, DROPOFF, self.START + timedelta(hours=2))
+
+        dropoff.created_at = self.START + timedelta(minutes=30)
+        dropoff.save()
+        assert report_rows() == set()
+
+        dropoff.created_at = self.START + timedelta(hours=3)
+        dropoff.save()
+        assert len(report_rows()) == 1
+
+        dropoff.delete()
+        assert report_rows() == set()
+
+    def test_rebuild_matches_incremental(self, ride, rider, driver):
+        other = Ride.objects.create(
+            id_rider=rider, id_driver=driver, status='completed',
+            pickup_latitude=0, pickup_longitude=0, dropoff_latitude=0, dropoff_longitude=0,
+            pickup_time=self.START
+        )
+        create_event(ride, PICKUP, self.START)
+        create_event(ride, DROPOFF, self.START + timedelta(hours=2))
+        create_event(other, PICKUP, self.START + timedelta(days=1))
+        create_event(other, DROPOFF, self.START + timedelta(days=1, hours=5))
+
+        incremental = report_rows()
+        assert {count for _, _, count in incremental} == {1}
+        assert len(incremental) == 2
+
+        call_command('rebuild_reports', stdout=mock.Mock())
+        assert report_rows() == incremental
+
+
+@pytest.mark.django_db
+class TestReportEndpoint:
+    """Test the admin-only report endpoint."""
+
+    def test_lists_rollup_rows(self, authenticated_client, driver):
+        driver.first_name, driver.last_name = 'Chris', 'Halvorsen'
+        driver.save()
+        DriverMonthlyReport.objects.create(month=datetime(2026, 3, 1).date(), id_driver=driver, trips_count_over_1hr=4)
+
+        response = authenticated_client.get('/api/base/reports/driver-trips/?month=2026-03')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'] == [
+            {'month': '2026-03', 'id_driver': driver.id, 'driver': 'Chris H', 'trips_count_over_1hr': 4}
+        ]
+
+        response = authenticated_client.get('/api/base/reports/driver-trips/?month=2026-04')
+        assert response.data['results'] == []
+
+    def test_non_admin_forbidden(self, rider):
+        client = APIClient()
+        client.force_authenticate(user=rider)
+        response = client.get('/api/base/reports/driver-trips/')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestEventKind:
+    """Test kind classification and filtering."""
+
+    def test_kind_follows_description(self, ride):
+        event = RideEvent.objects.create(id_ride=ride, description=PICKUP)
+        assert event.kind == RideEvent.Kind.PICKUP
+
+        event.description = 'Driver waved'
+        event.save(update_fields=['description'])
+        event.refresh_from_db()
+        assert event.kind == RideEvent.Kind.OTHER
+        assert RideEvent.classify('Status changed to cancelled') == RideEvent.Kind.CANCELLED
+        assert RideEvent.classify('Status changed to unknown') == RideEvent.Kind.OTHER
+
+    def test_filter_by_kind(self, ride, authenticated_client):
+        RideEvent.objects.create(id_ride=ride, description=PICKUP)
+        RideEvent.objects.create(id_ride=ride, description=DROPOFF)
+        RideEvent.objects.create(id_ride=ride, description='Driver waved')
+
+        response = authenticated_client.get('/api/base/ride-events/?kind=pickup&kind=dropoff')
+        assert response.status_code == status.HTTP_200_OK
+        assert {event['kind'] for event in response.data['results']} == {'pickup', 'dropoff'}
+
+        response = authenticated_client.get('/api/base/ride-events/?kind=bogus')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestTripTimes:
+    """Test the pickup/dropoff times denormalized on Ride."""
+
+    START = datetime(2026, 3, 31, 23, 0, tzinfo=dt_timezone.utc)
+
+    def test_events_update_ride(self, ride):
+        create_event(ride, PICKUP, self.START)
+        ride.refresh_from_db()
+        assert (ride.picked_up_at, ride.dropped_off_at, ride.duration_seconds) == (self.START, None, None)
+
+        dropoff = create_event(ride, DROPOFF, self.START + timedelta(minutes=90))
+        ride.refresh_from_db()
+        assert ride.dropped_off_at == self.START + timedelta(minutes=90)
+        assert ride.duration_seconds == 5400
+
+        dropoff.description = 'Driver waved'
+        dropoff.save()
+        ride.refresh_from_db()
+        assert ride.duration_seconds is None
+
+        dropoff.description = DROPOFF
+        dropoff.save()
+        dropoff.delete()
+        ride.refresh_from_db()
+        assert (ride.dropped_off_at, ride.duration_seconds) == (None, None)
+
+    def test_rebuild_command(self, ride):
+        create_event(ride, PICKUP, self.START)
+        create_event(ride, DROPOFF, self.START + timedelta(minutes=30))
+        Ride.objects.filter(pk=ride.pk).update(picked_up_at=None, dropped_off_at=None, duration_seconds=None)
+
+        call_command('rebuild_trip_times', stdout=mock.Mock())
+        ride.refresh_from_db()
+        assert ride.picked_up_at == self.START
+        assert ride.duration_seconds == 1800
+
+
+@pytest.mark.django_db
+class TestBulkEvents:
+    """Test bulk RideEvent ingestion."""
+
+    def test_json_array_with_per_item_results(self, ride, driver, authenticated_client):
+        start = datetime(2026, 3, 31, 21, 0, tzinfo=dt_timezone.utc)
+        create_event(ride, PICKUP, start)
+
+        response = authenticated_client.post('/api/base/ride-events/bulk/', [
+            {'id_ride': ride.pk, 'description': DROPOFF},
+            {'id_ride': 999999, 'description': 'Driver waved'},
+            {'description': 'No ride'},
+            {'id_ride': ride.pk, 'description': 'Driver waved'},
+        ], format='json')
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert (response.data['created'], response.data['failed']) == (2, 2)
+        results = response.data['results']
+        assert [result['status'] for result in results] == [201, 400, 400, 201]
+        assert 'id_ride' in results[1]['errors'] and 'id_ride' in results[2]['errors']
+        assert RideEvent.objects.get(pk=results[0]['id_ride_event']).kind == RideEvent.Kind.DROPOFF
+
+        # Trip times and the rollup are maintained like single writes
+        ride.refresh_from_db()
+        assert ride.duration_seconds is not None
+        assert report_rows() == {(start.date().replace(day=1), driver.id, 1)}
+
+    def test_ndjson(self, ride, authenticated_client):
+        body = f'{{"id_ride": {ride.pk}, "description": "A"}}\n\n{{"id_ride": {ride.pk}, "description": "B"}}\n'
+        response = authenticated_client.post(
+            '/api/base/ride-events/bulk/', body, content_type='application/x-ndjson'
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert set(RideEvent.objects.values_list('description', flat=True)) == {'A', 'B'}
+
+        response = authenticated_client.post(
+            '/api/base/ride-events/bulk/', '{"id_ride": 1}\nnot json\n', content_type='application/x-ndjson'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'line 2' in response.data['detail']
+
+    def test_rejects_objects_and_oversized_batches(self, ride, authenticated_client, settings):
+        response = authenticated_client.post('/api/base/ride-events/bulk/', {'id_ride': ride.pk}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        settings.RIDE_EVENTS_BULK_MAX = 1
+        items = [{'id_ride': ride.pk, 'description': 'x'}] * 2
+        response = authenticated_client.post('/api/base/ride-events/bulk/', items, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not RideEvent.objects.exists()
+
+    def test_copy_rows_left_to_psycopg(self, ride):
+        # COPY only runs on PostgreSQL: check the rows handed to psycopg's write_row,
+        # which escapes control characters such as carriage returns itself
+        rows = []
+        copy = mock.MagicMock(write_row=rows.append)
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value.cursor.copy.return_value.__enter__.return_value = copy
+        event = RideEvent(id_ride=ride, description='Line one\r\nLine two\t', kind=0, created_at=ride.pickup_time)
+
+        with mock.patch.object(bulk.connection, 'cursor', return_value=cursor):
+            bulk.copy_objects(RideEvent, [event], include_pk=False)
+
+        sql = cursor.__enter__.return_value.cursor.copy.call_args.args[0]
+        assert sql.startswith('COPY base_rideevent (')
+        assert rows == [[ride.pk, 'Line one\r\nLine two\t', 0, ride.pickup_time]]
@@ -1,5 +1,12 @@
+import csv
+import io
+import json
+import math
 import pytest
+from base64 import urlsafe_b64encode
 from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework import status
@@ -63,6 +70,51 @@ class TestTodaysEventsFiltering:
         assert "23 hours ago" in descriptions
 
 
+@pytest.mark.django_db
+class TestEventsWindow:
+    """Test per-request events window for nested ride events."""
+
+    def _event(self, ride, description, age):
+        event = RideEvent.objects.create(id_ride=ride, description=description)
+        RideEvent.objects.filter(pk=event.pk).update(created_at=timezone.now() - age)
+
+    def _descriptions(self, client, ride, query=''):
+        response = client.get(f'/api/base/rides/{ride.id_ride}/{query}')
+        assert response.status_code == status.HTTP_200_OK
+        return {e['description'] for e in response.data['todays_ride_events']}
+
+    def test_events_window_hours(self, authenticated_client, sample_ride):
+        self._event(sample_ride, "2 hours ago", timedelta(hours=2))
+        self._event(sample_ride, "3 days ago", timedelta(days=3))
+
+        assert self._descriptions(authenticated_client, sample_ride, '?events_window=1') == set()
+        assert self._descriptions(authenticated_client, sample_ride, '?events_window=96') == {
+            "2 hours ago", "3 days ago"
+        }
+
+    def test_events_window_is_capped(self, authenticated_client, sample_ride):
+        self._event(sample_ride, "10 days ago", timedelta(days=10))
+
+        assert self._descriptions(authenticated_client, sample_ride, '?events_window=1000') == set()
+        since = (timezone.now() - timedelta(days=30)).isoformat().replace('+00:00', 'Z')
+        assert self._descriptions(authenticated_client, sample_ride, f'?events_since={since}') == set()
+
+    def test_events_since(self, authenticated_client, sample_ride):
+        self._event(sample_ride, "2 hours ago", timedelta(hours=2))
+        self._event(sample_ride, "5 hours ago", timedelta(hours=5))
+
+        since = (timezone.now() - timedelta(hours=3)).isoformat().replace('+00:00', 'Z')
+        assert self._descriptions(authenticated_client, sample_ride, f'?events_since={since}') == {"2 hours ago"}
+
+    @pytest.mark.parametrize('window', ['abc', '0', 'nan', 'inf', '-inf'])
+    def test_invalid_window_rejected(self, authenticated_client, sample_ride, window):
+        response = authenticated_client.get(f'/api/base/rides/{sample_ride.id_ride}/?events_window={window}')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = authenticated_client.get(f'/api/base/rides/{sample_ride.id_ride}/?events_since=yesterday')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.django_db
 class TestDistanceCoordinateValidation:
     """Test YOUR custom coordinate validation logic."""
@@ -94,4 +146,277 @@ class TestDistanceCoordinateValidation:
         # Valid should pass
         response = authenticated_client.get('/api/base/rides/?lat=37.7749&lng=-122.4194')
         assert response.status_code == status.HTTP_200_OK
-    
\ No newline at end of file
+    
+
+def _haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(a))
+
+
+def _make_ride(rider, lat, lng, **kwargs):
+    return Ride.objects.create(
+        id_rider=rider,
+        status=kwargs.pop('status', 'en-route'),
+        pickup_latitude=lat,
+        pickup_longitude=lng,
+        dropoff_latitude=lat,
+        dropoff_longitude=lng,
+        pickup_time=timezone.now(),
+        **kwargs
+    )
+
+
+@pytest.mark.django_db
+class TestDistanceOrdering:
+    """Test grid-indexed nearest ride ordering."""
+
+    POINTS = [
+        (37.7749, -122.4194),   # San Francisco
+        (37.8044, -122.2712),   # Oakland
+        (37.3382, -121.8863),   # San Jose
+        (34.0522, -118.2437),   # Los Angeles
+        (40.7128, -74.0060),    # New York
+        (51.5074, -0.1278),     # London
+        (-33.8688, 151.2093),   # Sydney
+        (37.7700, -122.4300),   # SF, a few hundred meters away
+    ]
+
+    def test_pickup_cell_kept_in_sync(self, rider):
+        ride = _make_ride(rider, 37.7749, -122.4194)
+        first_cell = ride.pickup_cell
+        assert first_cell is not None
+
+        ride.pickup_latitude = 51.5074
+        ride.save(update_fields=['pickup_latitude'])
+        ride.refresh_from_db()
+        assert ride.pickup_cell != first_cell
+
+    def test_nearest_pages_match_full_scan(self, authenticated_client, rider):
+        points = self.POINTS + [(37.7749 + i * 0.013, -122.4194 - (i % 7) * 0.021) for i in range(40)]
+        for lat, lng in points:
+            _make_ride(rider, lat, lng)
+        expected_ids = [
+            r.id_ride for r in sorted(
+                Ride.objects.all(),
+                key=lambda r: (_haversine_km(37.7749, -122.4194, r.pickup_latitude, r.pickup_longitude), r.pk)
+            )
+        ]
+
+        seen = []
+        for page in range(1, 6):
+            response = authenticated_client.get(
+                f'/api/base/rides/?lat=37.7749&lng=-122.4194&ordering=distance&page_size=10&page={page}'
+            )
+            assert response.status_code == status.HTTP_200_OK
+            # Counted over every ride, not just the candidates scanned for the page
+            assert response.data['count'] == len(points)
+            assert (response.data['next'] is not None) == (page < 5)
+            seen += [r['id_ride'] for r in response.data['results']]
+
+        assert seen == expected_ids
+
+
+@pytest.mark.django_db
+class TestRiderEmailFilter:
+    """Test exact, prefix and substring rider email search."""
+
+    @pytest.fixture
+    def rides(self, rider):
+        other = User.objects.create_user(
+            email='Alice.Smith@Example.com', password='testpass123', role='rider', username='alice'
+        )
+        return {
+            'rider': _make_ride(rider, 0, 0).id_ride,
+            'alice': _make_ride(other, 0, 0).id_ride,
+        }
+
+    @pytest.mark.parametrize('value, expected', [
+        ('rider@example.com', ['rider']),
+        ('RIDER@example.com', ['rider']),
+        ('r@example.com', []),
+        ('alice*', ['alice']),
+        ('lice*', []),
+        ('example.com', ['alice', 'rider']),
+        ('SMITH', ['alice']),
+        ('*', ['alice', 'rider']),
+    ])
+    def test_match_modes(self, authenticated_client, rides, value, expected):
+        response = authenticated_client.get('/api/base/rides/', {'rider_email': value})
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(r['id_ride'] for r in response.data['results']) == sorted(rides[key] for key in expected)
+
+
+@pytest.mark.django_db
+class TestDurationFilter:
+    """Test duration filters and ordering on the denormalized trip times."""
+
+    @pytest.fixture
+    def rides(self, rider):
+        rides = {}
+        for minutes in (None, 20, 90, 45):
+            ride = _make_ride(rider, 0, 0)
+            if minutes is not None:
+                Ride.objects.filter(pk=ride.pk).update(duration_seconds=minutes * 60)
+            rides[minutes] = ride.id_ride
+        return rides
+
+    def test_min_max_duration(self, authenticated_client, rides):
+        response = authenticated_client.get('/api/base/rides/', {'min_duration': 1800, 'max_duration': 3600})
+        assert [r['id_ride'] for r in response.data['results']] == [rides[45]]
+
+    def test_ordering_by_duration(self, authenticated_client, rides):
+        # Sorting never filters: rides without a finished trip come last either way
+        response = authenticated_client.get('/api/base/rides/', {'ordering': '-duration'})
+        assert [r['id_ride'] for r in response.data['results']] == [rides[90], rides[45], rides[20], rides[None]]
+        assert response.data['count'] == 4
+
+        url = '/api/base/rides/?ordering=duration&page_size=2&cursor='
+        ids, _ = TestCursorPagination()._walk(authenticated_client, url)
+        assert ids == [rides[20], rides[45], rides[90], rides[None]]
+
+        ids, _ = TestCursorPagination()._walk(authenticated_client, url.replace('=duration', '=-duration'))
+        assert ids == [rides[90], rides[45], rides[20], rides[None]]
+
+        response = authenticated_client.get('/api/base/rides/', {'ordering': 'duration', 'min_duration': 0})
+        assert [r['id_ride'] for r in response.data['results']] == [rides[20], rides[45], rides[90]]
+
+
+@pytest.mark.django_db
+class TestRadiusFilter:
+    """Test radius_km filtering around a point."""
+
+    def test_only_rides_within_radius_returned(self, authenticated_client, rider):
+        sf = _make_ride(rider, 37.7749, -122.4194)
+        oakland = _make_ride(rider, 37.8044, -122.2712)
+        _make_ride(rider, 34.0522, -118.2437)   # Los Angeles, ~560 km
+        _make_ride(rider, 37.7749, 57.5806)     # Same latitude, other side of the globe
+
+        response = authenticated_client.get('/api/base/rides/?lat=37.7749&lng=-122.4194&radius_km=50')
+        assert response.status_code == status.HTTP_200_OK
+        ids = {r['id_ride'] for r in response.data['results']}
+        assert ids == {sf.id_ride, oakland.id_ride}
+
+    def test_radius_across_antimeridian(self, authenticated_client, rider):
+        east = _make_ride(rider, 0.0, 179.9)
+        _make_ride(rider, 0.0, 170.0)
+
+        response = authenticated_client.get('/api/base/rides/?lat=0&lng=-179.9&radius_km=50')
+        ids = {r['id_ride'] for r in response.data['results']}
+        assert ids == {east.id_ride}
+
+    def test_radius_validation(self, authenticated_client, sample_ride):
+        response = authenticated_client.get('/api/base/rides/?radius_km=10')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = authenticated_client.get('/api/base/rides/?lat=37.7749&lng=-122.4194&radius_km=-1')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+    """Test keyset (cursor) pagination."""
+
+    def _walk(self, client, url, key='id_ride'):
+        ids, pages = [], []
+        while url:
+            response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert 'count' not in response.data
+            pages.append(response.data)
+            ids += [r[key] for r in response.data['results']]
+            url = response.data['next']
+        return ids, pages
+
+    @pytest.mark.parametrize('ordering', ['-created_at', 'pickup_time', '-pickup_time', 'distance'])
+    def test_cursor_pages_match_offset_pages(self, authenticated_client, rider, ordering):
+        for i, (lat, lng) in enumerate(TestDistanceOrdering.POINTS):
+            ride = _make_ride(rider, lat, lng)
+            # Duplicate pickup times exercise the pk tie-breaker
+            Ride.objects.filter(pk=ride.pk).update(pickup_time=timezone.now() - timedelta(hours=i // 2))
+
+        query = f'lat=37.7749&lng=-122.4194&ordering={ordering}'
+        offset = authenticated_client.get(f'/api/base/rides/?{query}&page_size=100')
+        ids, pages = self._walk(authenticated_client, f'/api/base/rides/?{query}&page_size=3&cursor=')
+
+        assert sorted(ids) == sorted(r['id_ride'] for r in offset.data['results'])
+        if 'pickup_time' not in ordering:
+            # Offset pages only match exactly when the ordering has no ties
+            assert ids == [r['id_ride'] for r in offset.data['results']]
+
+        # Walking back from the last page returns the previous one
+        previous = authenticated_client.get(pages[-1]['previous'])
+        assert previous.data['results'] == pages[-2]['results']
+
+    def test_ride_events_cursor(self, authenticated_client, sample_ride):
+        for i in range(5):
+            RideEvent.objects.create(id_ride=sample_ride, description=f"Event {i}")
+
+        ids, pages = self._walk(authenticated_client, '/api/base/ride-events/?page_size=2&cursor=', 'id_ride_event')
+        assert len(pages) == 3
+        assert ids == list(
+            RideEvent.objects.order_by('-created_at', '-pk').values_list('id_ride_event', flat=True)
+        )
+
+    def test_invalid_cursor(self, authenticated_client, sample_ride):
+        response = authenticated_client.get('/api/base/rides/?cursor=not-a-cursor')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize('query, payload', [
+        ('ordering=pickup_time', '{"v": "abc", "pk": 1}'),
+        ('ordering=pickup_time', '{"v": null, "pk": 1}'),
+        ('ordering=pickup_time', '{"v": "2026-01-01T00:00:00+00:00", "pk": "x"}'),
+        ('ordering=pickup_time', '{"v": [1], "pk": 1}'),
+        ('', '{"v": "abc", "pk": 1}'),
+        ('lat=37.7749&lng=-122.4194&ordering=distance', '{"v": "abc", "pk": 1}'),
+        ('lat=37.7749&lng=-122.4194&ordering=distance', '{"v": null, "pk": 1, "r": 1}'),
+        ('lat=37.7749&lng=-122.4194&ordering=distance', '{"v": NaN, "pk": 1}'),
+    ])
+    def test_malformed_cursor(self, authenticated_client, sample_ride, query, payload):
+        token = urlsafe_b64encode(payload.encode()).decode()
+        response = authenticated_client.get(f'/api/base/rides/?{query}&cursor={token}')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestRideExport:
+    """Test streaming NDJSON/CSV exports."""
+
+    def _content(self, response):
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_matches_list(self, authenticated_client, rider, settings):
+        settings.RIDE_EXPORT_CHUNK_SIZE = 2
+        for lat, lng in TestDistanceOrdering.POINTS:
+            ride = _make_ride(rider, lat, lng)
+            RideEvent.objects.create(id_ride=ride, description='Driver assigned')
+
+        query = 'lat=37.7749&lng=-122.4194&ordering=distance'
+        listed = authenticated_client.get(f'/api/base/rides/?{query}&page_size=100').json()['results']
+        with CaptureQueriesContext(connection) as captured:
+            content = self._content(authenticated_client.get(f'/api/base/rides/export/?{query}'))
+
+        assert [json.loads(line) for line in content.splitlines()] == listed
+        # One events query per chunk of 2 (Silk adds EXPLAIN queries of its own in dev settings)
+        events_queries = [
+            q for q in captured.captured_queries
+            if 'base_rideevent' in q['sql'] and not q['sql'].startswith('EXPLAIN')
+        ]
+        assert len(events_queries) == -(-len(listed) // 2)
+
+    def test_csv_with_filters(self, authenticated_client, rider, sample_ride):
+        _make_ride(rider, 0, 0, status='completed')
+        content = self._content(authenticated_client.get(
+            '/api/base/rides/export/', {'export_format': 'csv', 'status': 'completed'}
+        ))
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert len(rows) == 1
+        assert rows[0]['status'] == 'completed'
+        assert rows[0]['rider.email'] == rider.email
+        assert rows[0]['driver.id'] == ''
+
+    def test_invalid_format(self, authenticated_client):
+        response = authenticated_client.get('/api/base/rides/export/', {'export_format': 'xml'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
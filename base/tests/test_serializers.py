@@ -0,0 +1,53 @@
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from base.models import Ride, RideEvent
+from base.serializers import RideReadSerializer, RideSerializer
+
+
+@pytest.fixture
+def rides(rider, driver):
+    rider.phone_number = None
+    rider.save()
+    with_driver = Ride.objects.create(
+        id_rider=rider, id_driver=driver, status='en-route',
+        pickup_latitude=37.7749, pickup_longitude=-122.4194,
+        dropoff_latitude=37.7849, dropoff_longitude=-122.4094,
+        pickup_time=timezone.now() + timedelta(hours=1)
+    )
+    without_driver = Ride.objects.create(
+        id_rider=rider, status='cancelled',
+        pickup_latitude=0, pickup_longitude=0, dropoff_latitude=-1, dropoff_longitude=1,
+        pickup_time=timezone.now().replace(microsecond=0)
+    )
+    RideEvent.objects.create(id_ride=with_driver, description="Driver assigned")
+    RideEvent.objects.create(id_ride=with_driver, description="Unicode évent ✓")
+    return [with_driver, without_driver]
+
+
+@pytest.mark.django_db
+class TestRideReadSerializer:
+    """Test the fast read path against RideSerializer."""
+
+    def render(self, serializer_class, instance, many):
+        return JSONRenderer().render(serializer_class(instance, many=many).data)
+
+    def test_identical_json_without_prefetch(self, rides):
+        queryset = Ride.objects.all()
+        assert self.render(RideReadSerializer, queryset, True) == self.render(RideSerializer, queryset, True)
+
+    def test_custom_datetime_format_falls_back(self, authenticated_client, rides, settings):
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'DATETIME_FORMAT': '%Y-%m-%d'}
+        assert not RideReadSerializer.is_supported()
+
+        response = authenticated_client.get(f'/api/base/rides/{rides[1].id_ride}/')
+        assert response.data['pickup_time'] == rides[1].pickup_time.strftime('%Y-%m-%d')
+
+    def test_identical_api_output(self, authenticated_client, rides, monkeypatch):
+        fast_list = authenticated_client.get('/api/base/rides/').content
+        fast_detail = authenticated_client.get(f'/api/base/rides/{rides[0].id_ride}/').content
+
+        monkeypatch.setattr(RideReadSerializer, 'is_supported', staticmethod(lambda: False))
+        assert authenticated_client.get('/api/base/rides/').content == fast_list
+        assert authenticated_client.get(f'/api/base/rides/{rides[0].id_ride}/').content == fast_detail
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+ROLE_CLAIM = 'role'
+VERSION_CLAIM = 'ver'
+
+
+def token_state_key(user_id):
+    return f'auth:token_state:{user_id}'
+
+
+def token_state_timeout():
+    # As long as tokens issued before a change can still be valid
+    return int(settings.SIMPLE_JWT.get('ACCESS_TOKEN_LIFETIME').total_seconds())
+
+
+def publish_token_state(user_id, token_version, is_active):
+    """
+    Shares a user's current (token_version, is_active) with every worker.
+    """
+    cache.set(token_state_key(user_id), (token_version, is_active), token_state_timeout())
+
+
+class RoleRefreshToken(RefreshToken):
+    """
+    Refresh token whose access tokens carry the user's role and token_version,
+    so StatelessJWTAuthentication can authorize requests without loading the user.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[VERSION_CLAIM] = user.token_version
+        publish_token_state(user.pk, user.token_version, user.is_active)
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        # Refreshing picks up a role change instead of copying the old claims
+        claims = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: self[api_settings.USER_ID_CLAIM]}
+        ).values('pk', 'role', 'token_version', 'is_active').first()
+        if claims is not None:
+            access[ROLE_CLAIM] = claims['role']
+            access[VERSION_CLAIM] = claims['token_version']
+            publish_token_state(claims['pk'], claims['token_version'], claims['is_active'])
+        return access
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RoleRefreshToken
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RoleRefreshToken
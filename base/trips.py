@@ -0,0 +1,60 @@
+"""
+Trip times denormalized on Ride.
+
+picked_up_at is the first pickup event of a ride, dropped_off_at its last
+dropoff event and duration_seconds the time between them, so trip durations
+filter and sort on the ride table alone. RideEvent signals refresh the ride in
+the event's transaction; rebuild_trip_times recomputes them in batches, e.g.
+after bulk inserts, which don't go through model signals.
+"""
+from django.db.models import Max, Min, Q
+
+from .models import Ride, RideEvent
+
+TRIP_FIELDS = ['picked_up_at', 'dropped_off_at', 'duration_seconds']
+
+
+def trip_times(ride_ids):
+    """
+    Returns {ride_id: (picked_up_at, dropped_off_at, duration_seconds)} for the
+    given rides, with None values for rides missing a pickup or dropoff.
+    """
+    rows = (
+        RideEvent.objects.filter(id_ride__in=ride_ids, kind__in=[RideEvent.Kind.PICKUP, RideEvent.Kind.DROPOFF])
+        .values('id_ride')
+        .annotate(
+            picked_up_at=Min('created_at', filter=Q(kind=RideEvent.Kind.PICKUP)),
+            dropped_off_at=Max('created_at', filter=Q(kind=RideEvent.Kind.DROPOFF)),
+        )
+        .order_by()
+    )
+    times = dict.fromkeys(ride_ids, (None, None, None))
+    for row in rows:
+        picked_up_at, dropped_off_at = row['picked_up_at'], row['dropped_off_at']
+        duration = None
+        if picked_up_at and dropped_off_at and dropped_off_at >= picked_up_at:
+            duration = int((dropped_off_at - picked_up_at).total_seconds())
+        times[row['id_ride']] = (picked_up_at, dropped_off_at, duration)
+    return times
+
+
+def refresh_trip_times(ride_id):
+    """
+    Recomputes the trip times of one ride. Idempotent.
+    """
+    if ride_id is None:
+        return
+    values = trip_times([ride_id])[ride_id]
+    Ride.objects.filter(pk=ride_id).update(**dict(zip(TRIP_FIELDS, values)))
+
+
+def rebuild_trip_times(ride_ids):
+    """
+    Recomputes the trip times of many rides with one query and one bulk update.
+    Returns the number of rides updated.
+    """
+    rides = [
+        Ride(id_ride=ride_id, **dict(zip(TRIP_FIELDS, values)))
+        for ride_id, values in trip_times(ride_ids).items()
+    ]
+    return Ride.objects.bulk_update(rides, TRIP_FIELDS)
@@ -1,13 +1,31 @@
 from django.urls import path, include
-from .views import HealthCheckView, RideViewSet, UserViewSet, RideEventsViewSet
+from .async_views import AsyncRideView
+from .views import (
+    ArchivedRideViewSet,
+    CacheStatsView,
+    DriverMonthlyReportViewSet,
+    HealthCheckDetailView,
+    HealthCheckView,
+    ProfileSamplesView,
+    RideViewSet,
+    UserViewSet,
+    RideEventsViewSet,
+)
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
 router.register(r'rides', RideViewSet, basename='ride')
 router.register(r'ride-events', RideEventsViewSet, basename='ride-events')
 router.register(r'users', UserViewSet, basename='users')
+router.register(r'archived-rides', ArchivedRideViewSet, basename='archived-rides')
+router.register(r'reports/driver-trips', DriverMonthlyReportViewSet, basename='driver-trips-report')
 
 urlpatterns = [
     path('health-check', HealthCheckView.as_view(), name="health-check"),
+    path('health-check/detailed', HealthCheckDetailView.as_view(), name="health-check-detailed"),
+    path('cache-stats', CacheStatsView.as_view(), name="cache-stats"),
+    path('profiles', ProfileSamplesView.as_view(), name="profiles"),
+    path('async/rides/', AsyncRideView.as_view(), name="async-ride-list"),
+    path('async/rides/<int:id_ride>/', AsyncRideView.as_view(), name="async-ride-detail"),
     path('', include(router.urls))
 ]
\ No newline at end of file
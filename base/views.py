@@ -1,23 +1,45 @@
-from datetime import timedelta
+import math
+from datetime import date, timedelta
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db.models import Prefetch
 from django.contrib.auth import get_user_model
 from rest_framework.permissions import AllowAny
 
-from schema.base.health_check import schema_health_check
+from app.middleware.profiling import dump_samples, header_name, make_header_token
+from schema.base.archived_rides import schema_archived_rides
+from schema.base.health_check import schema_health_check, schema_health_check_detailed
 
-from .models import Ride, RideEvent
-from .permissions import IsAdmin
+from .bulk import create_events
+from .cache import CachedListMixin, cache_stats
+from .health import database_health
+from .models import ArchivedRide, DriverMonthlyReport, Ride, RideEvent
+from .permissions import HasMetricsToken, IsAdmin
 from .pagination import RidePagination, BasePagination
-from .serializers import RideSerializer, RideEventSerializer, UserSerializer
-from .filters import RideFilter
+from .parsers import NDJSONParser
+from .serializers import (
+    ArchivedRideSerializer,
+    DriverMonthlyReportSerializer,
+    RideReadSerializer,
+    RideSerializer,
+    RideEventBulkSerializer,
+    RideEventSerializer,
+    UserSerializer,
+)
+from .export import CONTENT_TYPES, export_lines, ride_rows
+from .filters import RideEventFilter, RideExportFilter, RideFilter
 
 User = get_user_model()
 
@@ -32,6 +54,57 @@ class HealthCheckView(APIView):
         return Response({"status": "ok"})
 
 
+class HealthCheckDetailView(APIView):
+    """
+    Health check with a database round trip and the connection pool statistics
+    of this worker. Requires the METRICS_TOKEN bearer token when it is set.
+    """
+    # The bearer token is the metrics token, not a JWT
+    authentication_classes = []
+    permission_classes = [HasMetricsToken]
+
+    @schema_health_check_detailed
+    def get(self, request):
+        database = database_health()
+        ok = database['status'] == 'ok'
+        return Response(
+            {"status": "ok" if ok else "error", "database": database},
+            status=status.HTTP_200_OK if ok else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+
+class CacheStatsView(APIView):
+    """
+    Response cache hit/miss counters and current data version (admin only).
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(cache_stats())
+
+
+class ProfileSamplesView(APIView):
+    """
+    Recent profiled and slow requests of this worker process (admin only).
+
+    `?min_ms=` keeps only samples slower than that. The response also carries a
+    signed header value that forces profiling of the requests sending it.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        min_ms = request.query_params.get('min_ms')
+        try:
+            min_ms = float(min_ms) if min_ms else None
+        except ValueError:
+            raise ValidationError({'min_ms': 'min_ms must be a number'})
+
+        return Response({
+            'header': {'name': header_name(), 'value': make_header_token()},
+            'samples': dump_samples(min_ms),
+        })
+
+
 class UserViewSet(viewsets.ModelViewSet):
 
     """
@@ -41,19 +114,127 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
     pagination_class = BasePagination
+    count_strategy = 'estimate'
+    query_budgets = {'list': 3, 'retrieve': 2}
 
 
-class RideEventsViewSet(viewsets.ModelViewSet):
+class RideEventsViewSet(CachedListMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Ride events (full CRUD).
+    Filter with `?kind=pickup` and `?id_ride=`. List responses are cached, see base/cache.py.
     """
     queryset = RideEvent.objects.all().order_by('-created_at')
     serializer_class = RideEventSerializer
     permission_classes = [IsAdmin]
     pagination_class = BasePagination
+    count_strategy = 'estimate'
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = RideEventFilter
+    # bulk: auth, rides check, insert, trip times and report refresh
+    query_budgets = {'list': 3, 'retrieve': 2, 'bulk': 13}
 
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Creates many events from a JSON array or an NDJSON body, in one transaction.
 
-class RideViewSet(viewsets.ReadOnlyModelViewSet):
+        Items are validated in one pass, with a single query for their rides.
+        Valid items are inserted even if others fail; `results` has one entry per
+        item, in order, with either `id_ride_event` or `errors`. Responds 201 when
+        every item was created, 207 when some were, 400 when none were.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ['Expected a JSON array or NDJSON body of events']})
+        max_items = getattr(settings, 'RIDE_EVENTS_BULK_MAX', 5000)
+        if len(items) > max_items:
+            raise ValidationError({'non_field_errors': [f'At most {max_items} events per request']})
+
+        item_serializers = [RideEventBulkSerializer(data=item) for item in items]
+        valid = [serializer.is_valid() for serializer in item_serializers]
+        ride_ids = {serializer.validated_data['id_ride'] for serializer, ok in zip(item_serializers, valid) if ok}
+        existing = set(Ride.objects.filter(pk__in=ride_ids).values_list('pk', flat=True))
+
+        results, rows = [], []
+        for serializer, ok in zip(item_serializers, valid):
+            if not ok:
+                results.append({'status': status.HTTP_400_BAD_REQUEST, 'errors': serializer.errors})
+            elif serializer.validated_data['id_ride'] not in existing:
+                message = f'Invalid pk "{serializer.validated_data["id_ride"]}" - object does not exist.'
+                results.append({'status': status.HTTP_400_BAD_REQUEST, 'errors': {'id_ride': [message]}})
+            else:
+                results.append(None)
+                rows.append(serializer.validated_data)
+
+        events = iter(create_events(rows) if rows else [])
+        results = [
+            result or {'status': status.HTTP_201_CREATED, 'id_ride_event': next(events).pk}
+            for result in results
+        ]
+
+        created = len(rows)
+        if created == len(results):
+            code = status.HTTP_201_CREATED
+        else:
+            code = status.HTTP_207_MULTI_STATUS if created else status.HTTP_400_BAD_REQUEST
+        return Response({'created': created, 'failed': len(results) - created, 'results': results}, status=code)
+
+
+class DriverMonthlyReportViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for the driver "trips over 1 hour" monthly report (read only).
+
+    Reads the incrementally maintained rollup instead of joining RideEvent.
+    Filter a single month with `?month=YYYY-MM`.
+    """
+    queryset = DriverMonthlyReport.objects.select_related('id_driver')
+    serializer_class = DriverMonthlyReportSerializer
+    permission_classes = [IsAdmin]
+    pagination_class = BasePagination
+    query_budgets = {'list': 3, 'retrieve': 2}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        month = self.request.query_params.get('month')
+        if month:
+            try:
+                year, month_number = (int(part) for part in month.split('-'))
+                queryset = queryset.filter(month=date(year, month_number, 1))
+            except ValueError:
+                raise ValidationError({'month': 'Invalid month. Use YYYY-MM.'})
+        return queryset
+
+
+@schema_archived_rides
+class ArchivedRideViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for rides moved to the cold archive by archive_rides (read only).
+
+    Each ride is returned as archived, with all its events under `events`.
+    Filter with `?ids=1,2,3` or `?id_rider=`.
+    """
+    queryset = ArchivedRide.objects.all()
+    serializer_class = ArchivedRideSerializer
+    permission_classes = [IsAdmin]
+    pagination_class = BasePagination
+    count_strategy = 'estimate'
+    query_budgets = {'list': 3, 'retrieve': 2}
+    lookup_field = 'id_ride'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        try:
+            if params.get('ids'):
+                queryset = queryset.filter(id_ride__in=[int(value) for value in params['ids'].split(',')])
+            if params.get('id_rider'):
+                queryset = queryset.filter(id_rider=int(params['id_rider']))
+        except ValueError:
+            raise ValidationError({'ids': 'ids and id_rider must be integers, e.g. ids=1,2,3'})
+        return queryset
+
+
+class RideViewSet(CachedListMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for managing rides (full CRUD).
 
@@ -61,22 +242,26 @@ class RideViewSet(viewsets.ReadOnlyModelViewSet):
     - Nested RideEvents and Users (id_rider, id_driver)
     - Pagination support
     - Optimized database queries
+    - Fast read-only serialization for list/retrieve (RideReadSerializer)
+    - Versioned response cache for list (CachedListMixin)
     - Admin-only access
     - Sorting & Filtering
+    - Recent events window via `events_window` (hours) or `events_since` (ISO datetime)
+    - SQL query budgets per action (query_budgets)
     """
-    queryset = Ride.objects.select_related('id_rider', 'id_driver').prefetch_related(
-        Prefetch(
-            'events',
-            queryset=RideEvent.objects.filter(
-                created_at__gte=timezone.now() - timedelta(days=1)
-            ),
-            to_attr='todays_events'
-        )
-    ).order_by('-created_at')
-    
+    queryset = Ride.objects.select_related('id_rider', 'id_driver').order_by('-created_at')
+
+    # Window of nested events, capped server-side so prefetch cost stays bounded
+    events_window = timedelta(days=1)
+    max_events_window = timedelta(days=7)
+
     serializer_class = RideSerializer
     permission_classes = [IsAdmin]
     pagination_class = RidePagination
+    # Counts per filter combination, cached for COUNT_CACHE_TIMEOUT seconds
+    count_strategy = 'cached'
+    # Auth, count, rides and events; the nearest-ride search adds its ring counts
+    query_budgets = {'list': 15, 'retrieve': 3}
     lookup_field = 'id_ride'
 
     # Modular Backends
@@ -84,5 +269,72 @@ class RideViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = RideFilter
     
     # Sorting Configuration
-    ordering_fields = ['pickup_time', 'distance', 'created_at']
+    ordering_fields = ['pickup_time', 'distance', 'duration', 'created_at']
     ordering = ['-created_at']
+
+    def get_events_since(self):
+        """
+        Start of the nested events window for this request, never older than max_events_window.
+        """
+        now = timezone.now()
+        params = self.request.query_params
+        since = now - self.events_window
+
+        if params.get('events_since'):
+            since = parse_datetime(params['events_since'])
+            if since is None:
+                raise ValidationError({'events_since': 'Invalid datetime. Use ISO 8601.'})
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        elif params.get('events_window'):
+            try:
+                hours = float(params['events_window'])
+                # float() also accepts nan and inf
+                if not math.isfinite(hours) or hours <= 0:
+                    raise ValueError
+            except ValueError:
+                raise ValidationError({'events_window': 'events_window must be a positive number of hours'})
+            since = now - timedelta(hours=min(hours, self.max_events_window.total_seconds() / 3600))
+
+        return max(since, now - self.max_events_window)
+
+    def get_serializer_class(self):
+        # Fast read path; schema generation still introspects the full serializer
+        if (
+            self.action in ('list', 'retrieve', 'export')
+            and not getattr(self, 'swagger_fake_view', False)
+            and RideReadSerializer.is_supported()
+        ):
+            return RideReadSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=['get'], filterset_class=RideExportFilter, pagination_class=None)
+    def export(self, request):
+        """
+        Streams every ride matching the list filters and ordering, as NDJSON
+        (default) or CSV with `?export_format=csv`. Rides are read in chunks of
+        RIDE_EXPORT_CHUNK_SIZE, each with its events prefetched in one query.
+        """
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in CONTENT_TYPES:
+            raise ValidationError({'export_format': f'Choose one of: {", ".join(CONTENT_TYPES)}'})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = ride_rows(queryset, self.get_serializer(), getattr(settings, 'RIDE_EXPORT_CHUNK_SIZE', 2000))
+        response = StreamingHttpResponse(
+            export_lines(export_format, rows), content_type=CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="rides.{export_format}"'
+        # Let proxies pass chunks through as they come
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def get_queryset(self):
+        # Built per request: a class-level timezone.now() would freeze at import time
+        return super().get_queryset().prefetch_related(
+            Prefetch(
+                'events',
+                queryset=RideEvent.objects.filter(created_at__gte=self.get_events_since()),
+                to_attr='todays_events'
+            )
+        )
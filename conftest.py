@@ -8,4 +8,6 @@ def setup_test_settings():
     # Faster password hashing
     settings.PASSWORD_HASHERS = [
         'django.contrib.auth.hashers.MD5PasswordHasher',
-    ]
\ No newline at end of file
+    ]
+    # Fail requests over their query budget or with N+1 queries
+    settings.QUERY_BUDGET_MODE = 'raise'
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""
+Gunicorn hooks for the Prometheus multiprocess mode (see app/metrics.py).
+Loaded automatically by gunicorn from the working directory.
+"""
+import glob
+import os
+
+
+def on_starting(server):
+    # Samples of a previous run would otherwise be aggregated again
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for db_file in glob.glob(os.path.join(path, '*.db')):
+            os.remove(db_file)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
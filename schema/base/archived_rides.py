@@ -0,0 +1,15 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view
+
+# ArchivedRideSerializer returns the stored document, which has no declared fields
+schema_archived_rides = extend_schema_view(
+    list=extend_schema(
+        summary="List Archived Rides",
+        description="Archived rides, each in the rides API shape with all its events under `events`.",
+        responses=OpenApiTypes.OBJECT,
+    ),
+    retrieve=extend_schema(
+        summary="Get an Archived Ride",
+        responses=OpenApiTypes.OBJECT,
+    ),
+)
@@ -1,4 +1,4 @@
-from drf_spectacular.utils import extend_schema, inline_serializer
+from drf_spectacular.utils import OpenApiResponse, extend_schema, inline_serializer
 from rest_framework import serializers
 
 schema_health_check = extend_schema(
@@ -13,4 +13,37 @@ schema_health_check = extend_schema(
             }
         )
     }
-)
\ No newline at end of file
+)
+schema_health_check_detailed = extend_schema(
+    summary="Detailed Health Check",
+    description=(
+        "Database round trip latency and connection pool statistics of the worker serving "
+        "the request. Requires `Authorization: Bearer <METRICS_TOKEN>` when it is set."
+    ),
+    auth=None,
+    responses={
+        (200, 'application/json'): inline_serializer(
+            name='HealthCheckDetailedResponse',
+            fields={
+                'status': serializers.CharField(default='ok'),
+                'database': inline_serializer(
+                    name='DatabaseHealth',
+                    fields={
+                        'vendor': serializers.CharField(),
+                        'status': serializers.CharField(),
+                        'latency_ms': serializers.FloatField(allow_null=True),
+                        'error': serializers.CharField(required=False),
+                        'pool': serializers.DictField(
+                            allow_null=True,
+                            child=serializers.IntegerField(),
+                            help_text='min_size, max_size, size, in_use, idle, waiting, checkouts, '
+                                      'checkouts_queued, wait_ms, checkout_failures, connections_lost, '
+                                      'bad_returns; null when not pooled',
+                        ),
+                    }
+                ),
+            }
+        ),
+        503: OpenApiResponse(description='The database probe failed'),
+    }
+)
@@ -36,6 +36,14 @@ if [ "$QCLUSTER" = "true" ]; then
 elif [ "$DJANGO_ENV" = "dev" ]; then
     echo "Starting dev env..."
     exec python manage.py runserver 0.0.0.0:8000
+fi
+
+# Gunicorn workers aggregate Prometheus metrics through files (gunicorn.conf.py)
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+
+if [ "$ASGI" = "true" ]; then
+    echo "Starting Gunicorn web server with Uvicorn workers (ASGI)..."
+    exec gunicorn app.asgi:application -k uvicorn_worker.UvicornWorker --bind 0.0.0.0:8000
 else
     echo "Starting Gunicorn web server..."
     exec gunicorn app.wsgi:application --bind 0.0.0.0:8000
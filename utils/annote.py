@@ -1,5 +1,5 @@
 from django.db.models import F, FloatField, ExpressionWrapper
-from django.db.models.functions import ACos, Cos, Radians, Sin
+from django.db.models.functions import ACos, Cos, Greatest, Least, Radians, Sin
 
 
 def annotate_distance(queryset, lat, lng):
@@ -10,11 +10,13 @@ def annotate_distance(queryset, lat, lng):
     try:
         lat, lng = float(lat), float(lng)
 
-        distance_expr = 6371 * ACos(
+        cosine = (
             Cos(Radians(lat)) * Cos(Radians(F('pickup_latitude'))) *
             Cos(Radians(F('pickup_longitude')) - Radians(lng)) +
             Sin(Radians(lat)) * Sin(Radians(F('pickup_latitude')))
         )
+        # Clamp rounding error so identical points don't fall outside ACos' domain
+        distance_expr = 6371 * ACos(Greatest(Least(cosine, 1.0), -1.0))
         
         return queryset.annotate(
             distance=ExpressionWrapper(distance_expr, output_field=FloatField())
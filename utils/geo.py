@@ -0,0 +1,101 @@
+import math
+
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Fixed lat/lng grid used to index pickup coordinates (~11 km per cell at the equator).
+# A cell key is row * GRID_COLS + col, so every row is a contiguous key range.
+GRID_CELL_DEGREES = 0.1
+GRID_ROWS = int(round(180 / GRID_CELL_DEGREES))
+GRID_COLS = int(round(360 / GRID_CELL_DEGREES))
+
+# Above this many grid rows a cell predicate stops being selective enough to be worth it.
+MAX_GRID_ROWS = 64
+
+
+def grid_row(lat):
+    return min(max(int((lat + 90) // GRID_CELL_DEGREES), 0), GRID_ROWS - 1)
+
+
+def grid_col(lng):
+    return int((lng + 180) // GRID_CELL_DEGREES) % GRID_COLS
+
+
+def grid_cell(lat, lng):
+    """
+    Returns the grid cell key for a coordinate, or None if either part is missing.
+    """
+    if lat is None or lng is None:
+        return None
+    return grid_row(float(lat)) * GRID_COLS + grid_col(float(lng))
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    Returns (min_lat, max_lat, lng_ranges) covering every point within radius_km
+    of (lat, lng). lng_ranges is a list of (min_lng, max_lng) tuples, split in two
+    when the box crosses the antimeridian.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angular)
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+
+    # A pole inside the circle means every longitude is reachable
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), [(-180, 180)]
+
+    ratio = math.sin(angular) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return min_lat, max_lat, [(-180, 180)]
+
+    delta_lng = math.degrees(math.asin(ratio))
+    min_lng, max_lng = lng - delta_lng, lng + delta_lng
+
+    if max_lng - min_lng >= 360:
+        return min_lat, max_lat, [(-180, 180)]
+    if min_lng < -180:
+        return min_lat, max_lat, [(min_lng + 360, 180), (-180, max_lng)]
+    if max_lng > 180:
+        return min_lat, max_lat, [(min_lng, 180), (-180, max_lng - 360)]
+    return min_lat, max_lat, [(min_lng, max_lng)]
+
+
+def bounding_box_q(lat, lng, radius_km, lat_field='pickup_latitude', lng_field='pickup_longitude'):
+    """
+    Builds a Q object with plain range predicates on the coordinate columns,
+    matching the bounding box of radius_km around (lat, lng).
+    """
+    min_lat, max_lat, lng_ranges = bounding_box(lat, lng, radius_km)
+
+    q = Q(**{f'{lat_field}__range': (min_lat, max_lat)})
+    if lng_ranges != [(-180, 180)]:
+        lng_q = Q()
+        for min_lng, max_lng in lng_ranges:
+            lng_q |= Q(**{f'{lng_field}__range': (min_lng, max_lng)})
+        q &= lng_q
+    return q
+
+
+def grid_cells_q(lat, lng, radius_km, field='pickup_cell'):
+    """
+    Builds a Q object matching every grid cell that intersects the bounding box
+    of radius_km around (lat, lng), as one key range per grid row.
+
+    Returns None when the box spans more than MAX_GRID_ROWS rows, in which case
+    callers should fall back to an unrestricted scan.
+    """
+    min_lat, max_lat, lng_ranges = bounding_box(lat, lng, radius_km)
+    first_row, last_row = grid_row(min_lat), grid_row(max_lat)
+    if last_row - first_row + 1 > MAX_GRID_ROWS:
+        return None
+
+    col_ranges = [(grid_col(lo), grid_col(hi) if hi < 180 else GRID_COLS - 1) for lo, hi in lng_ranges]
+
+    q = Q()
+    for row in range(first_row, last_row + 1):
+        base = row * GRID_COLS
+        for first_col, last_col in col_ranges:
+            q |= Q(**{f'{field}__range': (base + first_col, base + last_col)})
+    return q